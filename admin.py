@@ -1,8 +1,10 @@
 # admin.py
 from flask import Flask, request, render_template, redirect, url_for, session, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from db_engine import engine_options, enable_sqlite_pragmas
 import hashlib
 import os
+import stats_rollup
 
 # ========== 初始化 ==========
 app = Flask(__name__, static_folder='web/static', template_folder='web/templates')
@@ -11,7 +13,10 @@ app.secret_key = 'your-super-secret-key-change-it-please'  # 请修改！
 # ========== 数据库配置 ==========
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:////opt/pppoe-activation/instance/database.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options()
 db = SQLAlchemy(app)
+with app.app_context():
+    enable_sqlite_pragmas(db.engine)
 
 # ========== 数据库模型 ==========
 class Activation(db.Model):
@@ -83,15 +88,15 @@ def logout():
 def dashboard():
     if 'admin' not in session:
         return redirect('/admin/login')
-    total = Activation.query.count()
-    success = Activation.query.filter_by(success=True).count()
+    # 从日汇总表读取统计
+    total, success = stats_rollup.success_totals(db.session)
     failure = total - success
     success_rate = f"{success / total * 100:.1f}%" if total else "0%"
     # 按 ISP 统计成功数
+    isp_success = {isp: count for isp, _, count in stats_rollup.isp_stats(db.session)}
     stats = {}
     for isp_key, isp_name in ISP_DISPLAY.items():
-        count = Activation.query.filter_by(isp=isp_key, success=True).count()
-        stats[isp_name] = count
+        stats[isp_name] = isp_success.get(isp_key, 0)
     return render_template('admin/dashboard.html',
                          total=total, success=success,
                          failure=failure, success_rate=success_rate,
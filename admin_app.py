@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 import json
 from flask import Flask, render_template, redirect, url_for, request, flash
 from flask_sqlalchemy import SQLAlchemy
+from db_engine import engine_options, enable_sqlite_pragmas
 from flask_login import LoginManager, login_user, logout_user, login_required, UserMixin, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 import pandas as pd
@@ -18,7 +19,10 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:////opt/pppoe-activation/instance/database.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options()
 db = SQLAlchemy(app)
+with app.app_context():
+    enable_sqlite_pragmas(db.engine)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
@@ -1,17 +1,26 @@
 # app.py - 已验证拨号功能，补全日志字段
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session
-import subprocess
+from flask import Flask, request, jsonify, render_template, redirect, url_for, session, Response, stream_with_context
 import os
 import random
 import string
 import time
 import json
-import re
-import fcntl
+import shlex
 import logging
-from sqlalchemy import create_engine
+import atexit
+import signal
+import sys
 from sqlalchemy.orm import sessionmaker
-from models import ActivationLog, Base, NetworkConfig
+from models import ActivationLog, Base, NetworkConfig, migrate_db
+from db_engine import create_sqlite_engine
+from network import set_mac_address, get_ipv4_address
+from log_writer import ActivationLogWriter
+from runtime_config import RuntimeInterfaceCache
+import isp_registry
+from validators import validate_activate_payload, SchemaInvalid
+from dialer import (JobManager, DialScheduler, QueueFull, QueueTimeout, SessionRegistry, DialMetrics,
+                    PppdBackend, SimulatedBackend, PppErrorClassifier, OutcomeCache,
+                    SingleFlight, InterfaceHealth, normalize_username)
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 app.secret_key = os.environ.get('SECRET_KEY', os.urandom(32))
@@ -21,27 +30,104 @@ logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
 logger = logging.getLogger(__name__)
 
 # 数据库配置
-DATABASE_PATH = '/opt/pppoe-activation/instance/database.db'
-engine = create_engine(f'sqlite:///{DATABASE_PATH}', echo=False)
+DATABASE_PATH = os.environ.get("DATABASE_PATH", '/opt/pppoe-activation/instance/database.db')
+engine = create_sqlite_engine(DATABASE_PATH, echo=False)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base.metadata.create_all(bind=engine)
+migrate_db(engine)
+try:
+    # 升级后首次启动时根据历史日志建立统计汇总表（dashboard.py 启动时同样检查，只会执行一次）
+    if stats_rollup.ensure_built(engine):
+        logger.info("已根据 activation_logs 重建激活统计汇总表")
+except Exception as e:
+    logger.error(f"重建激活统计汇总表失败: {e}")
 
 # 从环境变量读取配置（不再从config.py导入）
 BASE_DIR = os.environ.get("BASE_DIR", "/opt/pppoe-activation")
 PPP_LOG_DIR = os.environ.get("LOGS_PATH", f"{BASE_DIR}/logs")
 APP_PORT = int(os.environ.get("APP_PORT", 8080))
+# 等待 pppd 获取 IP 的最长时间（秒）
+DIAL_TIMEOUT = 20
+# 锁内等待条件的上限（秒）：旧 pppd 退出、修改 MAC 后链路恢复
+PPPD_EXIT_TIMEOUT = 0.5
+LINK_UP_TIMEOUT = 1.0
+# 拨号失败后删除残留 ppp 接口，等待其从内核消失的上限（秒）
+PPP_CLEANUP_TIMEOUT = 0.5
+# pppd 命令（压测时可替换为 bench/fake_pppd.py）
+PPPD_COMMAND = shlex.split(os.environ.get("PPPD_COMMAND", "pppd"))
+# 自定义 PPPoE 错误规则文件（JSON，格式见 error_rules.example.json），不存在时只用内置规则
+ERROR_RULES_FILE = os.environ.get("ERROR_RULES_FILE", os.path.join(BASE_DIR, 'error_rules.json'))
+# 拨号后端：pppd（真实拨号）或 simulated（进程内模拟，用于容量测试）
+DIAL_BACKEND = os.environ.get("DIAL_BACKEND", "pppd")
 
 LOG_FILE = os.path.join(BASE_DIR, 'activation_log.jsonl')
 # 锁目录，用于存储每个网卡的锁文件
 LOCK_DIR = os.path.join(BASE_DIR, 'locks')
 os.makedirs(LOCK_DIR, exist_ok=True)
 
+# 拨号排队配置：最大排队人数、最长排队时间（秒）
+DIAL_QUEUE_MAX = int(os.environ.get("DIAL_QUEUE_MAX", 100))
+DIAL_QUEUE_TIMEOUT = float(os.environ.get("DIAL_QUEUE_TIMEOUT", 60))
+
+# 接口选择：health（最久未使用 × 健康度，连续 678 / 630 的接口临时隔离）或 ordered（按配置顺序）
+IFACE_SELECTION = os.environ.get("IFACE_SELECTION", "health")
+# 接口隔离：连续多少次 678 / 630 后隔离（0 为不隔离）、隔离时长（秒）
+IFACE_QUARANTINE_AFTER = int(os.environ.get("IFACE_QUARANTINE_AFTER", 3))
+IFACE_QUARANTINE_SECONDS = float(os.environ.get("IFACE_QUARANTINE_SECONDS", 60))
+
+# 异步激活任务的工作线程数
+ACTIVATION_WORKERS = int(os.environ.get("ACTIVATION_WORKERS", 16))
+
+# 拨号结果缓存：成功 / 失败结果的缓存时间（秒，0 为关闭）、最多缓存账号数、可缓存的失败错误码
+DIAL_CACHE_TTL = float(os.environ.get("DIAL_CACHE_TTL", 0))
+DIAL_CACHE_FAILURE_TTL = float(os.environ.get("DIAL_CACHE_FAILURE_TTL", DIAL_CACHE_TTL))
+DIAL_CACHE_MAX = int(os.environ.get("DIAL_CACHE_MAX", 4096))
+DIAL_CACHE_CODES = [c.strip() for c in os.environ.get("DIAL_CACHE_CODES", "691,646").split(',') if c.strip()]
+
+# 激活日志写队列：容量、每批条数、批次最长等待时间（秒）
+LOG_QUEUE_MAX = int(os.environ.get("LOG_QUEUE_MAX", 1000))
+LOG_BATCH_SIZE = int(os.environ.get("LOG_BATCH_SIZE", 50))
+LOG_FLUSH_INTERVAL = float(os.environ.get("LOG_FLUSH_INTERVAL", 0.5))
+
 # 接口轮询计数器（线程安全）
 # 已废弃：使用"锁即资源"模型替代轮询机制
 # import threading
 # interface_counter = 0
 # interface_counter_lock = threading.Lock()
 
+# 拨号各阶段耗时统计（/metrics）
+dial_metrics = DialMetrics()
+
+# 激活日志后台写线程（写库失败时追加到 activation_log.jsonl，由 sync.py 导入），退出前写完队列
+activation_log_writer = ActivationLogWriter(SessionLocal, LOG_FILE, max_queue=LOG_QUEUE_MAX,
+                                            batch_size=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL)
+atexit.register(activation_log_writer.close)
+
+# pppd 会话登记表（按 PID 定向清理）
+session_registry = SessionRegistry()
+
+# PPPoE 错误分类器（内置规则 + 可选规则文件，修改规则文件后自动重新加载）
+error_classifier = PppErrorClassifier(rules_file=ERROR_RULES_FILE)
+
+# 拨号结果缓存（默认关闭）
+outcome_cache = OutcomeCache(DIAL_CACHE_TTL, DIAL_CACHE_FAILURE_TTL, DIAL_CACHE_MAX, DIAL_CACHE_CODES)
+
+# 同账号并发请求合并
+dial_flights = SingleFlight()
+
+# 接口健康度（成功率、PADO 延迟、carrier 状态），决定接口选择顺序
+if IFACE_SELECTION == 'health':
+    interface_health = InterfaceHealth(quarantine_after=IFACE_QUARANTINE_AFTER,
+                                       quarantine_seconds=IFACE_QUARANTINE_SECONDS)
+elif IFACE_SELECTION == 'ordered':
+    interface_health = None
+else:
+    raise ValueError(f"未知的接口选择方式 IFACE_SELECTION={IFACE_SELECTION}（支持 health / ordered）")
+
+# 拨号通道调度器（公平排队 + "锁即资源"）
+dial_scheduler = DialScheduler(LOCK_DIR, max_queue=DIAL_QUEUE_MAX, queue_timeout=DIAL_QUEUE_TIMEOUT,
+                               health=interface_health)
+
 # 获取运行期网络接口（只读数据库，不做任何写入操作）
 def get_runtime_interfaces(session):
     """
@@ -95,31 +181,14 @@ def get_runtime_interfaces(session):
         return [net_config.base_interface]
 
 
+# 接口池缓存（save_config 更新 NetworkConfig.updated_at 后自动刷新）
+runtime_interfaces = RuntimeInterfaceCache(SessionLocal, get_runtime_interfaces)
+
+
 def log_activation(data):
-    """记录激活日志到数据库"""
-    try:
-        session = SessionLocal()
-        log_entry = ActivationLog(
-            name=data.get('name'),
-            role=data.get('role'),
-            isp=data.get('isp'),
-            username=data.get('username'),
-            success=data.get('success', False),
-            ip=data.get('ip'),
-            mac=data.get('mac'),
-            error_code=data.get('error_code'),
-            error_message=data.get('error_message'),
-            timestamp=data.get('timestamp', time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()))
-        )
-        session.add(log_entry)
-        session.commit()
-        logger.info(f"日志已写入数据库: {data.get('username')} - {data.get('success', False)}")
-    except Exception as e:
-        logger.error(f"写入数据库失败: {e}")
-        # 如果数据库写入失败，回滚事务
-        session.rollback()
-    finally:
-        session.close()
+    """记录激活日志（放入写队列，由后台写线程批量写入数据库）"""
+    activation_log_writer.submit(data)
+    logger.info(f"日志已提交写入: {data.get('username')} - {data.get('success', False)}")
 
 
 def random_mac():
@@ -134,34 +203,13 @@ def random_mac():
 
 
 def set_interface_mac(iface, mac):
-    """设置网卡 MAC 地址"""
-    try:
-        subprocess.run(['sudo', '/opt/pppoe-activation/mac_set.sh', iface, mac], check=True)
-        return True
-    except subprocess.CalledProcessError as e:
-        logger.error(f"设置 MAC 失败: {e}")
-        return False
-
-
-def clear_ppp_interface(iface):
-    """清理已存在的 pppd 进程（只清理与指定网卡关联的 pppd，避免误杀他人会话）"""
-    # 先尝试优雅终止（只清理与指定网卡关联的 pppd）
-    subprocess.run(['sudo', 'pkill', '-f', f'pppd.*rp-pppoe.so {iface}'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
-    time.sleep(0.5)
-    # 强制杀死残留
-    subprocess.run(['sudo', 'pkill', '-9', '-f', f'pppd.*rp-pppoe.so {iface}'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
-    time.sleep(0.5)
+    """设置网卡 MAC 地址（优先 netlink，失败时退回 mac_set.sh）"""
+    return set_mac_address(iface, mac)
 
 
 def get_ip_from_interface(iface):
     """获取接口分配的IP地址"""
-    try:
-        res = subprocess.run(f"ip addr show {iface}", shell=True, capture_output=True, text=True)
-        ip_match = re.search(r'inet (\d+\.\d+\.\d+\.\d+)', res.stdout)
-        return ip_match.group(1) if ip_match else None
-    except Exception as e:
-        logger.error(f"获取IP失败: {e}")
-        return None
+    return get_ipv4_address(iface)
 
 
 def check_interface_carrier(iface):
@@ -183,122 +231,58 @@ def check_interface_carrier(iface):
         return True  # 如果检查失败，假设有连接
 
 
-def ensure_interfaces_exist(interfaces):
+def detect_pppoe_error(log_file):
+    """检测PPPOE拨号错误，返回错误码和错误消息（规则见 dialer/classifier.py）"""
+    return error_classifier.classify_file(log_file)
+
+
+def apply_isp_suffix(isp, username):
     """
-    校验网络接口是否存在（只校验，不创建）
-    
-    Args:
-        interfaces: 接口列表（如 ['enp3s0'] 或 ['enp3s0.100', 'enp3s0.101']）
-    
+    根据ISP类型添加后缀（系统只负责添加尾缀，密码由用户手动输入）
+
+    - 校园网：输入学号 → 系统添加 @cdu 后缀
+    - 移动：输入纯数字手机号 → 系统添加 @cmccgx 后缀；修改过密码输入 scxy + 手机号 → 系统添加 @cmccgx 后缀
+    - 电信：输入纯数字手机号 → 系统添加 @96301 后缀
+    - 联通：输入纯数字手机号 → 系统添加 @10010 后缀
+    - 直拨：不添加任何后缀，用户自由输入完整账号
+
+    后缀规则见 isp_registry.ISPS
+
+    Returns:
+        str: 拨号使用的完整账号
+    """
+    return isp_registry.apply_suffix(isp, username)
+
+
+def record_iface_health(iface, error_code, timings):
+    """记录接口的拨号结果和 PADO 延迟（IFACE_SELECTION=health 时）"""
+    if interface_health is not None:
+        interface_health.record(iface, error_code, timings.get("pado"))
+
+
+def create_dial_backend():
+    """
+    按 DIAL_BACKEND 创建拨号后端
+
+    simulated 后端的耗时分布和失败比例由 SIM_DIAL_* 环境变量配置（见 dialer/simulated.py）
+
     Raises:
-        RuntimeError: 如果网络接口不存在
+        ValueError: 后端名称或模拟参数无效
     """
-    for iface in interfaces:
-        result = subprocess.run(
-            ['ip', 'link', 'show', iface],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
-        if result.returncode != 0:
-            raise RuntimeError(
-                f"网络接口不存在: {iface}，请重新初始化配置（http://192.168.0.112:9999）"
-            )
-        logger.info(f"网络接口存在性校验通过: {iface}")
+    if DIAL_BACKEND == 'pppd':
+        return PppdBackend(dial_scheduler, session_registry, PPP_LOG_DIR, error_classifier,
+                           pppd_command=PPPD_COMMAND, pppd_exit_timeout=PPPD_EXIT_TIMEOUT,
+                           link_up_timeout=LINK_UP_TIMEOUT, ppp_cleanup_timeout=PPP_CLEANUP_TIMEOUT)
+    if DIAL_BACKEND == 'simulated':
+        timings = {phase: os.environ.get(f"SIM_DIAL_{phase.upper()}")
+                   for phase in ('prepare', 'pado', 'auth', 'ipcp', 'hangup')}
+        seed = os.environ.get("SIM_DIAL_SEED")
+        return SimulatedBackend(dial_scheduler, timings, os.environ.get("SIM_DIAL_FAILURES", ''),
+                                seed=int(seed) if seed else None, classifier=error_classifier)
+    raise ValueError(f"不支持的拨号后端: {DIAL_BACKEND}（支持 pppd / simulated）")
 
 
-def detect_pppoe_error(log_file):
-    """检测PPPOE拨号错误，返回错误码和错误消息"""
-    try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 检查PAP认证失败，提取详细错误信息
-        if 'PAP authentication failed' in content or 'PAP AuthNak' in content:
-            # 尝试提取详细错误信息
-            auth_nak_match = re.search(r'AuthNak.*?"([^"]+)"', content)
-            if auth_nak_match:
-                error_detail = auth_nak_match.group(1)
-                # 解析常见的错误信息
-                if 'concurrency' in error_detail.lower():
-                    return "691", f"账号已在其他地方登录，请等待几分钟后重试（错误详情：{error_detail}）"
-                elif 'password' in error_detail.lower() or 'incorrect' in error_detail.lower():
-                    return "691", f"账号或密码错误，请核对后重试（错误详情：{error_detail}）"
-                elif 'disabled' in error_detail.lower() or 'deregistered' in error_detail.lower():
-                    return "691", f"账号已被停用或注销，请联系运营商（错误详情：{error_detail}）"
-                elif 'expired' in error_detail.lower():
-                    return "691", f"账号已过期，请联系运营商（错误详情：{error_detail}）"
-                elif 'locked' in error_detail.lower():
-                    return "691", f"账号已被锁定，请联系运营商（错误详情：{error_detail}）"
-                else:
-                    return "691", f"账号或密码错误，请核对后重试（错误详情：{error_detail}）"
-            return "691", "账号或密码错误，请核对后重试"
-        
-        # 检查CHAP认证失败（使用错误码646）
-        if 'CHAP authentication failed' in content or 'CHAP AuthNak' in content:
-            # 尝试提取详细错误信息
-            auth_nak_match = re.search(r'AuthNak.*?"([^"]+)"', content)
-            if auth_nak_match:
-                error_detail = auth_nak_match.group(1)
-                # 解析常见的错误信息
-                if 'concurrency' in error_detail.lower():
-                    return "646", f"账号已在其他地方登录，请等待几分钟后重试（错误详情：{error_detail}）"
-                elif 'password' in error_detail.lower() or 'incorrect' in error_detail.lower():
-                    return "646", f"账号或密码错误，请核对后重试（错误详情：{error_detail}）"
-                elif 'disabled' in error_detail.lower() or 'deregistered' in error_detail.lower():
-                    return "646", f"账号已被停用或注销，请联系运营商（错误详情：{error_detail}）"
-                elif 'expired' in error_detail.lower():
-                    return "646", f"账号已过期，请联系运营商（错误详情：{error_detail}）"
-                elif 'locked' in error_detail.lower():
-                    return "646", f"账号已被锁定，请联系运营商（错误详情：{error_detail}）"
-                else:
-                    return "646", f"账号或密码错误，请核对后重试（错误详情：{error_detail}）"
-            return "646", "账号或密码错误，请核对后重试"
-        
-        # 检查PPPOE Discovery失败（无法找到BRAS）
-        if 'Timeout waiting for PADO packets' in content or 'Unable to complete PPPoE Discovery' in content:
-            return "678", "远程计算机无响应，可能是网络不可达或线路未接通"
-        
-        # 检查LCP协商失败（MTU/MRU不匹配）
-        if 'LCP terminated by peer' in content:
-            return "734", "PPP链路控制协议终止，可能是MTU/MRU不匹配，网络异常请稍后再试"
-        
-        # 检查PPP协议超时
-        if 'LCP timeout' in content or ('LCP EchoReq' in content and 'LCP EchoRep' not in content):
-            return "718", "PPP协议超时，可能网络拥塞或服务器无响应"
-        
-        # 检查连接被远程计算机强制关闭
-        if 'Modem hangup' in content or 'Connection terminated' in content:
-            return "629", "远程计算机强制关闭连接，请稍后再试"
-        
-        # 检查没有收到PADO响应（网卡没有物理连接）
-        if 'Send PPPoE Discovery' in content and 'Recv PPPoE Discovery' not in content:
-            return "630", "连接失败，设备不可用，请检查本地网卡或线路"
-        
-        # 检查认证协议协商失败
-        if 'Authentication failed' in content and 'CHAP' not in content and 'PAP' not in content:
-            return "691", "认证失败，请检查账号和密码"
-        
-        # 检查IPCP协商失败
-        if 'IPCP' in content and ('failed' in content or 'terminated' in content):
-            return "734", "IPCP协商失败，可能是IP地址分配问题"
-        
-        # 检查物理连接问题
-        if 'No carrier' in content or 'Link down' in content:
-            return "630", "物理连接断开，请检查网线或网络设备"
-        
-        # 检查MAC地址冲突
-        if 'MAC address' in content and ('conflict' in content.lower() or 'duplicate' in content.lower()):
-            return "630", "MAC地址冲突，请稍后重试"
-        
-        # 检查服务器拒绝连接
-        if 'Server refused' in content or 'Access denied' in content:
-            return "691", "服务器拒绝连接，请检查账号状态"
-        
-        # 默认返回未获取到IP地址
-        return "815", "连接失败，未获取到IP地址"
-    except Exception as e:
-        logger.error(f"检测PPPOE错误失败: {e}")
-        return "815", "连接失败，未获取到IP地址"
+dial_backend = create_dial_backend()
 
 
 @app.route('/')
@@ -306,9 +290,39 @@ def index():
     return render_template('index.html')
 
 
-@app.route('/activate', methods=['POST'])
-def activate():
-    data = request.get_json()
+def perform_activation(data, report=None):
+    """
+    执行一次完整的激活拨号（不依赖 Flask 请求上下文，可在后台任务线程中运行）
+
+    Args:
+        data: 激活请求数据
+        report: 阶段回调 report(phase, **info)，用于异步任务上报进度
+
+    Returns:
+        dict: 与 /activate 同步接口一致的响应内容
+    """
+    if report is None:
+        report = lambda phase, **info: None
+
+    timings = {}
+    started = time.monotonic()
+    result = _run_activation(data, report, timings)
+    timings["total"] = time.monotonic() - started
+    if result.get("cached") or result.get("shared"):
+        # 未实际拨号，不计入拨号耗时（次数见 pppoe_dial_cache_hits_total / pppoe_dial_shared_total）
+        return result
+
+    dial_metrics.observe_dial(
+        result.get("iface"),
+        data.get('isp') if isinstance(data, dict) else None,
+        timings,
+        "success" if result.get("success") else (result.get("error_code") or "unknown")
+    )
+    return result
+
+
+def _run_activation(data, report, timings):
+    """激活拨号主流程，各阶段耗时写入 timings（秒）"""
     name = data.get('name')
     role = data.get('role')
     isp = data.get('isp')
@@ -332,296 +346,200 @@ def activate():
 
     if not all([name, role, isp, username, password]):
         log_activation(log_data)
-        return jsonify({
+        return {
             "success": False,
             "error_code": "999",
             "error_message": "参数缺失",
             "username": username
-        })
+        }
 
     # 更新日志（参数完整）
     log_data["error_code"] = None
     log_data["error_message"] = None
 
-    # 为每个网卡创建单独的锁文件（实现网卡级别的并发）
-    def release_iface_lock(lock_fd):
-        """释放网卡的锁"""
-        fcntl.flock(lock_fd.fileno(), fcntl.LOCK_UN)
-        lock_fd.close()
-    
-    def try_acquire_iface(iface_list):
-        """
-        从 iface_list 中尝试获取一个可用接口（"锁即资源"模型）
-        
-        使用非阻塞锁遍历接口列表，成功获取锁的接口即为可用接口
-        这样"选接口 + 加锁"一步完成，没有竞态窗口
-        
-        Args:
-            iface_list: 接口列表（如 ['enp3s0.100', 'enp3s0.101']）
-        
-        Returns:
-            (iface, lock_fd): 成功返回 (接口名, 锁文件描述符)
-            (None, None): 失败返回 (None, None)
-        """
-        for iface in iface_list:
-            lock_path = os.path.join(LOCK_DIR, f'{iface}.lock')
-            try:
-                fd = open(lock_path, 'w')
-                # 使用非阻塞锁尝试获取接口
-                fcntl.flock(fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-                logger.info(f"成功抢占接口 {iface}")
-                return iface, fd
-            except BlockingIOError:
-                # 该接口已被占用，关闭文件描述符，尝试下一个
-                fd.close()
-                continue
-            except Exception as e:
-                # 其他异常，关闭文件描述符，尝试下一个
-                logger.warning(f"获取接口 {iface} 锁失败: {e}")
-                try:
-                    fd.close()
-                except:
-                    pass
-                continue
-        
-        # 所有接口都不可用
-        logger.warning(f"所有接口均不可用: {iface_list}")
-        return None, None
-    
-    # 兼容性：如果 LOCK_DIR 不存在，创建锁目录
-    try:
-        os.makedirs(LOCK_DIR, exist_ok=True)
-    except:
-        pass
-    
-    # 使用"锁即资源"的方式查找可用网卡（避免竞态窗口）
+    dial_username = apply_isp_suffix(isp, username)
+
+    # 短时间内相同账号、相同密码的重试直接返回缓存结果（DIAL_CACHE_TTL > 0 时开启）
+    cache_key = outcome_cache.key(isp, dial_username, password)
+    cached = outcome_cache.get(cache_key)
+    if cached is not None:
+        # 未实际拨号，不写激活日志，避免重复计入统计、看板和 CSV 导出
+        logger.info(f"命中拨号结果缓存: {dial_username}（{cached['cached_age']} 秒前的结果）")
+        return cached
+
+    # 同一账号的并发请求合并为一次拨号，密码相同的重复请求共享结果
+    result, dialed = dial_flights.run(
+        normalize_username(dial_username), password,
+        lambda flight_report: _dial_account(log_data, username, dial_username, password,
+                                            flight_report, timings, cache_key),
+        report
+    )
+    if not dialed:
+        # 共享的结果已由执行拨号的请求记录，不重复写激活日志
+        result = dict(result, shared=True)
+    return result
+
+
+def _dial_account(log_data, username, dial_username, password, report, timings, cache_key):
+    """排队获取接口并拨号（同一账号同一时刻只有一个请求执行）"""
+    # 排队获取可用网卡（调度器内部仍使用"锁即资源"模型，避免竞态窗口）
     # 从数据库读取网络配置（只读，不做任何写入操作）
     iface = None
     lock_fd = None
     
     try:
-        # 获取 PPPoE 使用的接口列表（仅从数据库读取）
-        session = SessionLocal()
-        iface_list = get_runtime_interfaces(session)
-        session.close()
-        
-        logger.info(f"从数据库读取接口列表: {iface_list}")
+        # 获取 PPPoE 使用的接口列表（缓存，配置版本号变化时重新读取数据库）
+        iface_list = runtime_interfaces.get()
         
-        # 使用"锁即资源"模型选择接口（一步完成选接口 + 加锁）
-        iface, lock_fd = try_acquire_iface(iface_list)
-        
-        if not iface:
+        # 按先来先服务排队，分配下一个空闲接口
+        lock_started = time.monotonic()
+        try:
+            iface, lock_fd = dial_backend.acquire(iface_list)
+            timings["lock_wait"] = time.monotonic() - lock_started
+        except (QueueFull, QueueTimeout) as e:
+            timings["lock_wait"] = time.monotonic() - lock_started
+            queue_stats = dial_scheduler.stats()
             log_data["success"] = False
             log_data["error_code"] = "998"
-            log_data["error_message"] = "系统忙，暂无可用拨号通道"
+            log_data["error_message"] = f"系统忙，暂无可用拨号通道（{e}）"
             log_activation(log_data)
-            logger.error(f"所有接口均不可用")
-            return jsonify({
+            logger.error(f"排队失败: {e}")
+            return {
                 "success": False,
                 "error_code": "998",
-                "error_message": "系统忙，暂无可用拨号通道",
+                "error_message": f"系统忙，暂无可用拨号通道（{e}）",
                 "username": username,
-                "iface": "none"
-            })
+                "iface": "none",
+                "queue_depth": queue_stats["queue_depth"],
+                "estimated_wait": queue_stats["estimated_wait"]
+            }
         
         # 校验接口是否存在（只校验，不创建）
-        ensure_interfaces_exist([iface])
+        dial_backend.check_interface(iface)
+        report('iface_acquired', iface=iface)
         
     except RuntimeError as e:
+        if lock_fd:
+            dial_backend.release(iface, lock_fd)
         log_data["success"] = False
         log_data["error_code"] = "997"
         log_data["error_message"] = f"网络配置错误: {str(e)}"
         log_activation(log_data)
         logger.error(f"网络配置错误: {e}")
-        return jsonify({
+        return {
             "success": False,
             "error_code": "997",
             "error_message": f"网络配置错误: {str(e)}",
             "username": username,
             "iface": "none"
-        })
+        }
+    except BaseException:
+        # 其他异常（如读取接口状态时的 OSError）同样要释放已获取的接口锁，再向上抛出
+        if lock_fd:
+            dial_backend.release(iface, lock_fd)
+        raise
     
     try:
-        timestamp = int(time.time())
-        log_file = os.path.join(PPP_LOG_DIR, f"pppoe_{timestamp}_{iface}.log")
-        open(log_file, 'w').close()
-
-        # 清理旧连接（在锁内执行，防止并发冲突）
-        clear_ppp_interface(iface)
-
-        # 更改 MAC
+        # 清理旧连接、更改 MAC、等待链路恢复（在锁内执行，防止并发冲突）
         new_mac = random_mac()
-        if not set_interface_mac(iface, new_mac):
+        if not dial_backend.prepare_link(iface, new_mac, timings):
             log_data["success"] = False
             log_data["mac"] = new_mac
             log_data["error_code"] = "MAC_FAIL"
             log_data["error_message"] = "MAC地址设置失败"
             log_activation(log_data)
-            return jsonify({
+            record_iface_health(iface, "MAC_FAIL", timings)
+            return {
                 "success": False,
                 "error_code": "MAC_FAIL",
                 "error_message": "MAC地址设置失败",
                 "username": username,
                 "iface": iface
-            })
+            }
 
-        # 等待 MAC 生效（某些网卡需要 100-300ms）
-        time.sleep(0.3)
+        logger.info(f"接口 {iface} 锁内各阶段耗时: " + ", ".join(
+            f"{k}={timings[k] * 1000:.0f}ms" for k in ("clear_ppp", "set_mac", "link_up")))
 
         # 保存 MAC 到日志
         log_data["mac"] = new_mac
+        report('mac_set', mac=new_mac)
 
     finally:
         # 释放网卡锁
         if lock_fd:
             try:
-                release_iface_lock(lock_fd)
+                dial_backend.release(iface, lock_fd)
                 logger.info(f"成功释放网卡 {iface} 的锁")
             except Exception as e:
                 logger.error(f"释放网卡锁失败: {e}")
 
     # === 锁外执行拨号（避免长时间持有锁）===
 
-    # 根据ISP类型添加后缀（系统只负责添加尾缀，密码由用户手动输入）
-    # 校园网：输入学号 → 系统添加 @cdu 后缀
-    # 移动：输入纯数字手机号 → 系统添加 @cmccgx 后缀；修改过密码输入 scxy + 手机号 → 系统添加 @cmccgx 后缀
-    # 电信：输入纯数字手机号 → 系统添加 @96301 后缀
-    # 联通：输入纯数字手机号 → 系统添加 @10010 后缀
-    # 直拨：不添加任何后缀，用户自由输入完整账号
-    if isp != 'direct' and '@' not in username:
-        # 检查是否为纯数字
-        if username.isdigit():
-            # 根据ISP类型添加后缀
-            if isp == 'cmccgx':
-                # 移动用户
-                username = f"{username}@cmccgx"
-                logger.info(f"移动用户，添加@cmccgx后缀: {username}")
-            elif isp == '96301':
-                # 电信用户
-                username = f"{username}@96301"
-                logger.info(f"电信用户，添加@96301后缀: {username}")
-            elif isp == '10010':
-                # 联通用户
-                username = f"{username}@10010"
-                logger.info(f"联通用户，添加@10010后缀: {username}")
-            else:
-                # 校园网用户（默认）
-                username = f"{username}@cdu"
-                logger.info(f"校园网用户，添加@cdu后缀: {username}")
-        elif username.startswith('scxy'):
-            # 修改过密码的移动用户，添加@cmccgx后缀
-            username = f"{username}@cmccgx"
-            logger.info(f"修改过密码的移动用户，添加@cmccgx后缀: {username}")
-        
-        # 更新日志记录为完整账号（在调用log_activation之前）
-        log_data["username"] = username
-    elif isp == 'direct':
-        # 直拨模式：不添加任何后缀，直接使用用户输入的账号
-        logger.info(f"直拨模式，使用原始账号: {username}")
-        # 更新日志记录为完整账号（在调用log_activation之前）
-        log_data["username"] = username
-
-    ppp_cmd = [
-        'pppd',
-        'plugin', 'rp-pppoe.so', iface,
-        'user', username,
-        'password', password,
-        'mtu', '1492', 'mru', '1492',
-        'noauth',
-        'usepeerdns',
-        'nodetach',
-        'logfile', log_file,
-        'debug'
-    ]
+    # 使用补全后缀的完整账号拨号（更新日志记录为完整账号，在调用log_activation之前）
+    username = dial_username
+    log_data["username"] = username
 
     try:
-        proc = subprocess.Popen(ppp_cmd)
+        attempt = dial_backend.dial(iface, username, password)
+        phase_times = {"start": time.monotonic()}
     except Exception as e:
         log_data["success"] = False
         log_data["error_code"] = "START_FAIL"
         log_data["error_message"] = f"启动失败: {str(e)}"
         log_activation(log_data)
-        return jsonify({
+        return {
             "success": False,
             "error_code": "START_FAIL",
             "error_message": f"启动失败: {str(e)}",
             "username": username,
             "iface": iface,
             "mac": new_mac
-        })
+        }
 
-    # 等待获取IP
-    ip = None
-    ppp_interface = None  # 记录实际使用的 ppp 接口名
-    for _ in range(20):
-        time.sleep(1)
-        # 读取日志，找 "Using interface pppX" 和各种错误
-        try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # 检查是否获取到IP
-                match = re.search(r'Using interface (ppp\d+)', content)
-                if match:
-                    ppp_interface = match.group(1)
-                    ip = get_ip_from_interface(ppp_interface)
-                    if ip:
-                        break
-        except:
-            continue
+    def on_phase(phase, **info):
+        phase_times[phase] = time.monotonic()
+        report(phase, **info)
+
+    # 等待获取IP（pppd 后端增量跟踪日志，IPCP 完成即返回）
+    ip = dial_backend.await_ip(attempt, DIAL_TIMEOUT, on_phase=on_phase)
+
+    # 各协商阶段耗时：开始拨号 → PADO → 认证通过 → 获取 IP
+    previous = "start"
+    for phase, metric in (("pado", "pado"), ("auth", "auth"), ("ip", "ipcp")):
+        if phase not in phase_times:
+            break
+        timings[metric] = phase_times[phase] - phase_times[previous]
+        previous = phase
 
     if not ip:
-        # 优雅终止 pppd 进程
-        proc.terminate()
-        try:
-            proc.wait(timeout=3)
-        except subprocess.TimeoutExpired:
-            # 如果优雅终止失败，强制终止
-            proc.kill()
-            try:
-                proc.wait(timeout=2)
-            except subprocess.TimeoutExpired:
-                # 如果强制终止也失败，使用 pkill -9 -P 作为后备方案
-                logger.warning(f"无法正常终止 pppd 进程 (PID: {proc.pid})，使用 pkill -9 -P 强制终止")
-                subprocess.run(['sudo', 'pkill', '-9', '-P', str(proc.pid)], check=False)
-                time.sleep(1)
-        
-        # 异常情况下尝试删除 ppp 接口（避免内核残留）
-        if ppp_interface:
-            logger.info(f"异常情况下尝试删除 ppp 接口: {ppp_interface}")
-            subprocess.run(['sudo', 'ip', 'link', 'delete', ppp_interface], check=False)
-            time.sleep(0.5)
-        
+        # 挂断拨号并清理残留的 ppp 接口
+        teardown_started = time.monotonic()
+        dial_backend.hangup(attempt, failed=True)
+        timings["teardown"] = time.monotonic() - teardown_started
+
         # 检测错误类型
-        error_code, error_message = detect_pppoe_error(log_file)
+        error_code, error_message = dial_backend.diagnose(attempt)
         logger.info(f"检测到错误: {error_code} - {error_message}")
         log_data["success"] = False
         log_data["error_code"] = error_code
         log_data["error_message"] = error_message
         log_activation(log_data)
-        return jsonify({
+        record_iface_health(iface, error_code, timings)
+        result = {
             "success": False,
             "error_code": error_code,
             "error_message": error_message,
             "username": username,
             "iface": iface,
             "mac": new_mac
-        })
+        }
+        outcome_cache.put(cache_key, result)
+        return result
 
     # ✅ 成功获取IP，现在准备挂断
-    # 优雅终止 pppd 进程（使用记录的 PID）
-    proc.terminate()
-    try:
-        proc.wait(timeout=3)
-    except subprocess.TimeoutExpired:
-        # 如果优雅终止失败，强制终止
-        proc.kill()
-        try:
-            proc.wait(timeout=2)
-        except subprocess.TimeoutExpired:
-            # 如果强制终止也失败，使用 pkill -9 -P 作为后备方案
-            logger.warning(f"无法正常终止 pppd 进程 (PID: {proc.pid})，使用 pkill -9 -P 强制终止")
-            subprocess.run(['sudo', 'pkill', '-9', '-P', str(proc.pid)], check=False)
-            time.sleep(1)
+    teardown_started = time.monotonic()
+    dial_backend.hangup(attempt)
+    timings["teardown"] = time.monotonic() - teardown_started
     
     # ✅ 成功：补全所有字段
     log_data["success"] = True
@@ -631,16 +549,127 @@ def activate():
 
     # 写入日志
     log_activation(log_data)
+    record_iface_health(iface, None, timings)
 
     # 返回响应（可精简）
-    return jsonify({
+    result = {
         "success": True,
         "username": username,
         "iface": iface,
         "mac": new_mac,
         "ip": ip,
         "log": "拨号成功，已自动挂断"
+    }
+    outcome_cache.put(cache_key, result)
+    return result
+
+
+# 异步激活任务管理器
+job_manager = JobManager(perform_activation, max_workers=ACTIVATION_WORKERS)
+
+
+@app.route('/activate', methods=['POST'])
+def activate():
+    """
+    激活接口
+
+    默认同步执行并返回拨号结果；带 ?mode=async 时立即返回任务 ID，
+    由 GET /activate/<job_id> 轮询或 GET /activate/<job_id>/events（SSE）获取进度
+    """
+    data = request.get_json(silent=True)
+
+    # 格式不符的请求在读取接口配置、排队加锁之前直接拒绝（不写激活日志）
+    try:
+        validate_activate_payload(data)
+    except SchemaInvalid as e:
+        logger.info(f"激活请求格式错误: {'; '.join(error['path'] for error in e.errors)}")
+        return jsonify({
+            "success": False,
+            "error_code": "999",
+            "error_message": "参数缺失或格式错误",
+            "errors": e.errors
+        }), 400
+
+    if request.args.get('mode') == 'async':
+        job = job_manager.submit(data)
+        return jsonify({
+            "success": True,
+            "job_id": job.id,
+            "phase": job.phase
+        }), 202
+
+    return jsonify(perform_activation(data))
+
+
+@app.route('/activate/<job_id>')
+def activation_status(job_id):
+    """查询异步激活任务状态"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "任务不存在或已过期"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/activate/<job_id>/events')
+def activation_events(job_id):
+    """以 Server-Sent Events 推送异步激活任务的阶段变化，任务结束后关闭连接"""
+    if not job_manager.get(job_id):
+        return jsonify({"success": False, "error": "任务不存在或已过期"}), 404
+
+    def stream():
+        seen = 0
+        while True:
+            snapshot = job_manager.wait_for_update(job_id, seen, timeout=15)
+            if snapshot is None:
+                return
+            if len(snapshot["phases"]) == seen and not snapshot["done"]:
+                # 心跳，防止代理断开空闲连接
+                yield ": keep-alive\n\n"
+                continue
+            for event in snapshot["phases"][seen:]:
+                yield f"event: phase\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            seen = len(snapshot["phases"])
+            if snapshot["done"]:
+                yield f"event: result\ndata: {json.dumps(snapshot['result'], ensure_ascii=False)}\n\n"
+                return
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/queue')
+def api_queue():
+    """获取拨号排队状态（排队人数、预计等待时间）"""
+    return jsonify(dial_scheduler.stats())
+
+
+@app.route('/api/interfaces/health')
+def api_interface_health():
+    """获取各拨号接口的健康状态（成功率、PADO 延迟、carrier、隔离剩余时间）"""
+    if interface_health is None:
+        return jsonify({"selection": IFACE_SELECTION, "interfaces": {}})
+    return jsonify({"selection": IFACE_SELECTION, "interfaces": interface_health.snapshot()})
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 文本格式的拨号指标"""
+    queue_stats = dial_scheduler.stats()
+    cache_stats = outcome_cache.stats()
+    body = dial_metrics.render({
+        "pppoe_dial_queue_depth": ("Activation requests waiting for an interface.", queue_stats["queue_depth"]),
+        "pppoe_dial_interfaces_busy": ("Interfaces currently locked for dialing.", len(queue_stats["busy"])),
+        "pppoe_dial_interfaces_quarantined": ("Interfaces quarantined after repeated 678/630.", len(queue_stats["quarantined"])),
+        "pppoe_dial_sessions": ("Registered pppd sessions.", len(session_registry.sessions())),
+        "pppoe_activation_log_pending": ("Activation log records waiting to be written.", activation_log_writer.pending()),
+        "pppoe_dial_cache_entries": ("Cached dial outcomes.", cache_stats["size"]),
+        "pppoe_dial_inflight_accounts": ("Accounts with a dial in progress.", dial_flights.inflight())
+    }, counters={
+        "pppoe_activation_log_spilled_total": ("Activation log records spilled to JSONL since start.", activation_log_writer.spilled),
+        "pppoe_dial_cache_hits_total": ("Activations answered from the outcome cache since start.", cache_stats["hits"]),
+        "pppoe_dial_shared_total": ("Duplicate activations that shared an in-flight dial since start.", dial_flights.shared)
     })
+    return Response(body, mimetype='text/plain; version=0.0.4')
 
 
 @app.route('/api/dial-logs')
@@ -685,4 +714,8 @@ def api_dial_logs():
 if __name__ == '__main__':
     # 确保锁目录存在
     os.makedirs(LOCK_DIR, exist_ok=True)
+    # 清理上次运行遗留的 pppd 进程（崩溃或重启后登记表已丢失）
+    session_registry.reap_orphans()
+    # systemd / docker stop 发送 SIGTERM：转为正常退出，触发 atexit 写完日志队列
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     app.run(host='0.0.0.0', port=APP_PORT, threaded=True, debug=False)
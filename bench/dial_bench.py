@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# bench/dial_bench.py - 并发拨号压测
+"""
+并发拨号压测（不依赖真实 BRAS 和账号）
+
+在临时目录中启动一个独立的 app.py 实例：
+- 数据库、日志、锁目录均位于临时目录
+- 在 dummy 网卡上创建 VLAN 子接口作为拨号接口池（需要 root）
+- pppd 替换为 bench/fake_pppd.py，按参数模拟 PADO / 认证 / IPCP 耗时和失败比例
+
+--backend simulated 时改用 app.py 的进程内模拟拨号后端（dialer/simulated.py）：
+不创建网卡、不启动子进程、无需 root，用于测量 Web / 排队 / 数据库层的吞吐上限
+
+然后以 N 个并发客户端调用 /activate，输出吞吐量、p50/p95/p99 延迟、错误码分布，
+以及 /metrics 中各拨号阶段的平均耗时
+
+用法：
+    sudo python3 bench/dial_bench.py --requests 200 --concurrency 16 --vlans 8 \\
+        --pado-ms 50 --auth-ms 80 --ipcp-ms 120 --failures 691:0.05,678:0.02
+    python3 bench/dial_bench.py --backend simulated --requests 2000 --concurrency 64 --vlans 32
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import math
+import os
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+FAKE_PPPD = os.path.join(ROOT_DIR, 'bench', 'fake_pppd.py')
+
+# 等待 app.py 启动的最长时间（秒）
+STARTUP_TIMEOUT = 30
+
+
+def percentile(values: list, pct: float) -> float:
+    """最近秩百分位数（values 需已排序）"""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run(cmd: list):
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+
+
+class BenchEnvironment:
+    """压测用的临时目录、网卡和 app.py 进程"""
+
+    def __init__(self, args):
+        self.args = args
+        self.work_dir = tempfile.mkdtemp(prefix='pppoe-bench-')
+        self.db_path = os.path.join(self.work_dir, 'database.db')
+        self.base_url = f'http://127.0.0.1:{args.port or free_port()}'
+        self.created_base = False
+        self.proc = None
+
+    def vlan_ids(self) -> list:
+        return list(range(self.args.first_vlan, self.args.first_vlan + self.args.vlans))
+
+    def simulated(self) -> bool:
+        return self.args.backend == 'simulated'
+
+    def setup(self):
+        if not self.simulated():
+            self._setup_interfaces()
+        self._setup_database()
+        self._start_app()
+
+    def _setup_interfaces(self):
+        base = self.args.base
+        if not os.path.exists(f'/sys/class/net/{base}'):
+            if os.geteuid() != 0:
+                raise SystemExit(f"接口 {base} 不存在，创建 dummy 网卡需要 root 权限")
+            run(['ip', 'link', 'add', base, 'type', 'dummy'])
+            self.created_base = True
+        run(['ip', 'link', 'set', base, 'up'])
+        for vlan_id in self.vlan_ids():
+            vlan_if = f'{base}.{vlan_id}'
+            if not os.path.exists(f'/sys/class/net/{vlan_if}'):
+                run(['ip', 'link', 'add', 'link', base, 'name', vlan_if, 'type', 'vlan', 'id', str(vlan_id)])
+            run(['ip', 'link', 'set', vlan_if, 'up'])
+
+    def _setup_database(self):
+        from sqlalchemy.orm import sessionmaker
+        from db_engine import create_sqlite_engine
+        from models import Base, NetworkConfig
+
+        engine = create_sqlite_engine(self.db_path)
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        try:
+            net_config = NetworkConfig(
+                net_mode='vlan',
+                base_interface=self.args.base,
+                vlan_id=','.join(map(str, self.vlan_ids()))
+            )
+            net_config.touch()
+            session.add(net_config)
+            session.commit()
+        finally:
+            session.close()
+        engine.dispose()
+
+    def _start_app(self):
+        args = self.args
+        env = dict(os.environ)
+        env.update({
+            "BASE_DIR": self.work_dir,
+            "LOGS_PATH": os.path.join(self.work_dir, 'logs'),
+            "DATABASE_PATH": self.db_path,
+            "APP_PORT": self.base_url.rsplit(':', 1)[1],
+            "PPPD_COMMAND": f'{sys.executable} {FAKE_PPPD}',
+            "FAKE_PPPD_PADO_MS": str(args.pado_ms),
+            "FAKE_PPPD_AUTH_MS": str(args.auth_ms),
+            "FAKE_PPPD_IPCP_MS": str(args.ipcp_ms),
+            "FAKE_PPPD_JITTER": str(args.jitter),
+            "FAKE_PPPD_FAILURES": args.failures,
+            "DIAL_QUEUE_MAX": str(max(args.concurrency * 2, 100)),
+        })
+        if self.simulated():
+            # 与 fake_pppd 相同的均值和抖动，换成进程内的均匀分布
+            env.update({
+                "DIAL_BACKEND": 'simulated',
+                "SIM_DIAL_PADO": self._uniform(args.pado_ms),
+                "SIM_DIAL_AUTH": self._uniform(args.auth_ms),
+                "SIM_DIAL_IPCP": self._uniform(args.ipcp_ms),
+                "SIM_DIAL_FAILURES": args.failures,
+            })
+        os.makedirs(env["LOGS_PATH"], exist_ok=True)
+        app_log = open(os.path.join(self.work_dir, 'app.log'), 'w')
+        self.proc = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, 'app.py')],
+                                     cwd=ROOT_DIR, env=env, stdout=app_log, stderr=subprocess.STDOUT)
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise SystemExit(f"app.py 启动失败，日志: {app_log.name}")
+            try:
+                urllib.request.urlopen(f'{self.base_url}/api/queue', timeout=1).read()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise SystemExit(f"app.py 在 {STARTUP_TIMEOUT} 秒内未就绪，日志: {app_log.name}")
+
+    def _uniform(self, mean_ms: float) -> str:
+        jitter = self.args.jitter
+        return f"uniform:{mean_ms * (1 - jitter)},{mean_ms * (1 + jitter)}"
+
+    def metrics(self) -> str:
+        try:
+            return urllib.request.urlopen(f'{self.base_url}/metrics', timeout=5).read().decode()
+        except OSError:
+            return ''
+
+    def teardown(self):
+        if self.proc and self.proc.poll() is None:
+            self.proc.send_signal(signal.SIGTERM)
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        if not self.simulated():
+            for vlan_id in self.vlan_ids():
+                subprocess.run(['ip', 'link', 'delete', f'{self.args.base}.{vlan_id}'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if self.created_base:
+            subprocess.run(['ip', 'link', 'delete', self.args.base],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if self.args.keep:
+            print(f"临时目录已保留: {self.work_dir}")
+        else:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def activate(base_url: str, index: int, timeout: float):
+    """
+    发起一次激活
+
+    Returns:
+        (耗时秒数, 结果)：结果为 success、错误码、HTTP 状态或异常类型
+    """
+    payload = json.dumps({
+        "name": f"压测用户{index}",
+        "role": "学生",
+        "isp": "cdu",
+        "username": f"2026{index:06d}",
+        "password": "bench-password"
+    }).encode()
+    request = urllib.request.Request(f'{base_url}/activate', data=payload,
+                                     headers={"Content-Type": "application/json"})
+    started = time.monotonic()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            result = json.loads(resp.read())
+        outcome = 'success' if result.get('success') else str(result.get('error_code') or 'unknown')
+    except urllib.error.HTTPError as e:
+        outcome = f'HTTP {e.code}'
+    except Exception as e:
+        outcome = type(e).__name__
+    return time.monotonic() - started, outcome
+
+
+def phase_means(metrics_text: str) -> dict:
+    """从 /metrics 汇总各阶段平均耗时（秒）"""
+    sums = collections.defaultdict(float)
+    counts = collections.defaultdict(int)
+    pattern = re.compile(r'^pppoe_dial_phase_seconds_(sum|count)\{phase="([^"]+)",[^}]*\} (\S+)$')
+    for line in metrics_text.splitlines():
+        match = pattern.match(line)
+        if not match:
+            continue
+        kind, phase, value = match.groups()
+        if kind == 'sum':
+            sums[phase] += float(value)
+        else:
+            counts[phase] += int(float(value))
+    return {phase: sums[phase] / counts[phase] for phase in counts if counts[phase]}
+
+
+def run_load(base_url: str, total: int, concurrency: int, timeout: float) -> dict:
+    latencies = []
+    outcomes = collections.Counter()
+    started = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(activate, base_url, i, timeout) for i in range(total)]
+        for future in concurrent.futures.as_completed(futures):
+            latency, outcome = future.result()
+            latencies.append(latency)
+            outcomes[outcome] += 1
+    wall = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(total / wall, 2) if wall else 0.0,
+        "success_rate": round(outcomes['success'] / total, 4) if total else 0.0,
+        "latency_seconds": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0
+        },
+        "outcomes": dict(outcomes.most_common())
+    }
+
+
+def print_report(report: dict):
+    print('=' * 60)
+    print(f"请求数: {report['requests']}  并发: {report['concurrency']}  "
+          f"总耗时: {report['wall_seconds']}s  吞吐: {report['throughput_rps']} req/s")
+    lat = report['latency_seconds']
+    print(f"延迟: p50={lat['p50']}s  p95={lat['p95']}s  p99={lat['p99']}s  max={lat['max']}s")
+    print(f"成功率: {report['success_rate'] * 100:.1f}%")
+    print("结果分布:")
+    for outcome, count in report['outcomes'].items():
+        print(f"  {outcome:>12}: {count}")
+    if report.get('phase_means'):
+        print("各阶段平均耗时:")
+        for phase, seconds in sorted(report['phase_means'].items()):
+            print(f"  {phase:>12}: {seconds * 1000:.1f}ms")
+    print('=' * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PPPoE 并发拨号压测（模拟 pppd）')
+    parser.add_argument('--requests', type=int, default=200, help='激活请求总数')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发客户端数')
+    parser.add_argument('--backend', choices=('fake-pppd', 'simulated'), default='fake-pppd',
+                        help='拨号后端：fake-pppd（真实网卡 + 模拟 pppd）或 simulated（进程内模拟）')
+    parser.add_argument('--vlans', type=int, default=8, help='拨号接口池大小（VLAN 子接口数）')
+    parser.add_argument('--first-vlan', type=int, default=3001, help='第一个 VLAN ID')
+    parser.add_argument('--base', default='pbench0', help='VLAN 基础网卡（不存在时创建 dummy 网卡）')
+    parser.add_argument('--pado-ms', type=float, default=50, help='模拟 PADO 耗时（毫秒）')
+    parser.add_argument('--auth-ms', type=float, default=80, help='模拟认证耗时（毫秒）')
+    parser.add_argument('--ipcp-ms', type=float, default=120, help='模拟 IPCP 耗时（毫秒）')
+    parser.add_argument('--jitter', type=float, default=0.3, help='耗时随机抖动比例')
+    parser.add_argument('--failures', default='', help='失败错误码比例，如 691:0.05,678:0.02')
+    parser.add_argument('--timeout', type=float, default=120, help='单个请求超时（秒）')
+    parser.add_argument('--port', type=int, default=0, help='app.py 监听端口（默认随机）')
+    parser.add_argument('--json', help='把结果写入 JSON 文件')
+    parser.add_argument('--keep', action='store_true', help='保留临时目录（含 app.log 和 pppd 日志）')
+    args = parser.parse_args()
+
+    env = BenchEnvironment(args)
+    try:
+        env.setup()
+        print(f"app.py 已启动: {env.base_url}（接口池 {args.vlans} 个，临时目录 {env.work_dir}）")
+        report = run_load(env.base_url, args.requests, args.concurrency, args.timeout)
+        report["phase_means"] = phase_means(env.metrics())
+        report["simulation"] = {
+            "pado_ms": args.pado_ms, "auth_ms": args.auth_ms, "ipcp_ms": args.ipcp_ms,
+            "jitter": args.jitter, "failures": args.failures, "interfaces": args.vlans,
+            "backend": args.backend
+        }
+    finally:
+        env.teardown()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# bench/fake_pppd.py - 模拟 pppd + rp-pppoe 拨号过程（压测用）
+"""
+模拟 pppd 拨号
+接受与 app.py 相同的 pppd 命令行参数（plugin rp-pppoe.so <iface> user ... logfile ...），
+按环境变量配置的耗时和失败比例向 logfile 写入与真实 pppd 相同格式的日志：
+
+    FAKE_PPPD_PADO_MS=50      启动到收到 PADO 的平均耗时（毫秒）
+    FAKE_PPPD_AUTH_MS=80      PADO 到认证结果的平均耗时
+    FAKE_PPPD_IPCP_MS=120     认证通过到获取 IP 的平均耗时
+    FAKE_PPPD_JITTER=0.3      耗时随机抖动比例（±30%）
+    FAKE_PPPD_FAILURES=691:0.05,678:0.02
+                              失败错误码及比例，支持 691 / 646 / 678 / 734 / 815
+
+成功时保持运行（nodetach）直到收到 SIGTERM；失败时与真实 pppd 一样写完日志后退出
+（815 模拟 IPCP 无响应，不写结果也不退出，直到被终止）
+"""
+import os
+import random
+import signal
+import sys
+import time
+
+# 失败时的退出码（与 pppd 一致）
+EXIT_CONNECT_FAILED = 8
+EXIT_HANGUP = 16
+EXIT_AUTH_TOPEER_FAILED = 19
+
+SUPPORTED_FAILURES = ('691', '646', '678', '734', '815')
+
+
+def _env_ms(name, default):
+    return float(os.environ.get(name, default)) / 1000
+
+
+def parse_failures(spec: str) -> list:
+    """解析 '691:0.05,678:0.02' 形式的失败比例"""
+    failures = []
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        code, _, ratio = part.partition(':')
+        if code not in SUPPORTED_FAILURES:
+            raise ValueError(f"不支持的错误码: {code}（支持 {', '.join(SUPPORTED_FAILURES)}）")
+        failures.append((code, float(ratio or 0)))
+    return failures
+
+
+def choose_outcome(failures: list, rng=random) -> str:
+    """按比例抽取本次拨号结果：错误码或 'ok'"""
+    roll = rng.random()
+    for code, ratio in failures:
+        if roll < ratio:
+            return code
+        roll -= ratio
+    return 'ok'
+
+
+def parse_args(argv: list) -> dict:
+    """从 pppd 命令行中取出接口、账号和日志路径"""
+    opts = {"iface": None, "user": '', "logfile": None}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == 'plugin' and i + 2 < len(argv):
+            opts["iface"] = argv[i + 2]
+            i += 3
+            continue
+        if arg in ('user', 'logfile') and i + 1 < len(argv):
+            opts[arg] = argv[i + 1]
+            i += 2
+            continue
+        i += 1
+    return opts
+
+
+class FakePppd:
+    def __init__(self, opts: dict):
+        self.iface = opts["iface"] or 'eth0'
+        self.user = opts["user"]
+        self.log = open(opts["logfile"], 'a', buffering=1) if opts["logfile"] else sys.stdout
+        self.jitter = float(os.environ.get('FAKE_PPPD_JITTER', 0.3))
+        self.connected = False
+        signal.signal(signal.SIGTERM, self._on_term)
+        signal.signal(signal.SIGINT, self._on_term)
+
+    def write(self, *lines):
+        for line in lines:
+            self.log.write(line + '\n')
+
+    def sleep(self, seconds: float):
+        time.sleep(max(0.0, seconds * random.uniform(1 - self.jitter, 1 + self.jitter)))
+
+    def _on_term(self, signum, frame):
+        self.write(f"Terminating on signal {signum}")
+        if self.connected:
+            self.write('sent [LCP TermReq id=0x2 "User request"]',
+                       'rcvd [LCP TermAck id=0x2]',
+                       'Connection terminated.',
+                       'Sent PADT')
+        sys.exit(5)
+
+    def run(self, outcome: str):
+        pado = _env_ms('FAKE_PPPD_PADO_MS', 50)
+        auth = _env_ms('FAKE_PPPD_AUTH_MS', 80)
+        ipcp = _env_ms('FAKE_PPPD_IPCP_MS', 120)
+        mac = '02:%02x:%02x:%02x:%02x:%02x' % tuple(random.randint(0, 255) for _ in range(5))
+
+        self.write('Send PPPOE Discovery V1T1 PADI session 0x0 length 12',
+                   f' dst ff:ff:ff:ff:ff:ff  src {mac}')
+        if outcome == '678':
+            self.sleep(pado)
+            self.write('Timeout waiting for PADO packets',
+                       'Unable to complete PPPoE Discovery phase 1')
+            sys.exit(EXIT_CONNECT_FAILED)
+
+        self.sleep(pado)
+        session_id = random.randint(1, 0xffff)
+        self.write('Recv PPPOE Discovery V1T1 PADO session 0x0 length 46',
+                   f' dst {mac}  src 4c:6d:58:4c:37:d8',
+                   ' [AC-name BENCH-BRAS] [service-name]',
+                   'Send PPPOE Discovery V1T1 PADR session 0x0 length 32',
+                   f'Recv PPPOE Discovery V1T1 PADS session 0x{session_id:x} length 46',
+                   f'PPP session is {session_id}',
+                   f'Connected to 4C:6D:58:4C:37:D8 via interface {self.iface}',
+                   'Using interface ppp0',
+                   f'Connect: ppp0 <--> {self.iface}')
+        self.connected = True
+
+        if outcome == '734':
+            self.sleep(auth)
+            self.write('rcvd [LCP TermReq id=0x98 "LCP terminated by peer"]',
+                       'LCP terminated by peer',
+                       'Connection terminated.')
+            sys.exit(EXIT_HANGUP)
+
+        method = 'CHAP' if outcome == '646' else 'PAP'
+        self.write(f'sent [{method} AuthReq id=0x1 user="{self.user}" password=<hidden>]')
+        self.sleep(auth)
+        if outcome in ('691', '646'):
+            self.write(f'rcvd [{method} AuthNak id=0x1 "Authentication failure: password incorrect"]',
+                       f'{method} authentication failed',
+                       'Modem hangup',
+                       'Connection terminated.')
+            sys.exit(EXIT_AUTH_TOPEER_FAILED)
+
+        self.write(f'rcvd [{method} AuthAck id=0x1 ""]',
+                   f'{method} authentication succeeded',
+                   'sent [IPCP ConfReq id=0x1 <addr 0.0.0.0>]')
+        if outcome == '815':
+            # IPCP 无响应：等待被终止
+            while True:
+                time.sleep(1)
+
+        self.sleep(ipcp)
+        ip = f'10.{random.randint(16, 31)}.{random.randint(0, 255)}.{random.randint(1, 254)}'
+        self.write(f'rcvd [IPCP ConfAck id=0x2 <addr {ip}>]',
+                   f'local  IP address {ip}',
+                   'remote IP address 192.168.168.129')
+        while True:
+            time.sleep(1)
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    outcome = choose_outcome(parse_failures(os.environ.get('FAKE_PPPD_FAILURES', '')))
+    FakePppd(opts).run(outcome)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# bench/validate_bench.py - 激活请求校验微基准
+"""
+激活请求校验微基准（纯 CPU，不启动 app.py）
+
+1. 请求体 schema 校验：
+- draft7：jsonschema.Draft7Validator.iter_errors（未安装 jsonschema 时跳过）
+- fast：validators/fast.py 在导入时由 schemas/activate.schema.json 编译的快速校验
+
+2. 账号格式校验：
+- legacy：原 validators/activate.py 的写法，每次调用 re.fullmatch(字符串模式)，
+  经过 re 模块的模式缓存查找后再匹配
+- registry：isp_registry.validate_username，导入时预编译，按 isp 查表后直接匹配
+
+样本为合法 / 非法请求（账号）混合，两种实现先逐条核对结果一致，再分别计时
+
+用法：
+    python3 bench/validate_bench.py --iterations 200000
+    python3 bench/validate_bench.py --json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import isp_registry  # noqa: E402
+from isp_registry import UsernameFormatError  # noqa: E402
+from validators.activate import validator as draft7_validator, fast_validator  # noqa: E402
+
+# 请求体样本：前端实际提交的合法请求，以及缺字段、枚举不符、超长、多余字段等非法请求
+PAYLOADS = [
+    {"name": "张三", "role": "学生", "isp": "cdu", "username": "2023012345@cdu", "password": "pw"},
+    {"name": "李四", "role": "教职工", "isp": "cmccgx", "username": "scxy13800138000@cmccgx",
+     "password": "pw", "lang": "zh", "client": {"ua": "Mozilla/5.0", "timezone": "Asia/Shanghai"}},
+    {"name": "王五", "role": "外包", "isp": "direct", "username": "user@example", "password": "pw"},
+    {"name": "赵六", "role": "学生", "isp": "cdu", "username": "2023012345@cdu"},
+    {"name": "", "role": "student", "isp": "cdu", "username": "abc", "password": "pw"},
+    {"name": "钱七", "role": "学生", "isp": "unknown", "username": 13800138000, "password": "pw",
+     "lang": "ZH", "debug": True},
+    None,
+]
+
+# (isp, 账号) 样本：合法、非法、不校验的直拨各占一部分
+SAMPLES = [
+    ('cdu', '2023012345'),
+    ('cdu', '12345'),
+    ('cmccgx', '13800138000'),
+    ('cmccgx', 'scxy13800138000'),
+    ('96301', '18912345678'),
+    ('96301', '1891234567'),
+    ('10010', '13012345678'),
+    ('10010', '2301234567a'),
+    ('direct', 'user@example'),
+]
+
+
+def legacy_validate(isp: str, username: str):
+    """原实现（逐个分支、每次调用 re.fullmatch）"""
+    if isp == "cmccgx":
+        if not re.fullmatch(r"1\d{10}", username):
+            raise UsernameFormatError("INVALID_CMCC_MOBILE")
+    elif isp == "96301":
+        if not re.fullmatch(r"1\d{10}", username):
+            raise UsernameFormatError("INVALID_TELECOM_MOBILE")
+    elif isp == "10010":
+        if not re.fullmatch(r"1\d{10}", username):
+            raise UsernameFormatError("INVALID_UNICOM_MOBILE")
+    elif isp == "cdu":
+        if not re.fullmatch(r"\d{6,12}", username):
+            raise UsernameFormatError("INVALID_STUDENT_ID")
+
+
+def outcome(fn, isp: str, username: str):
+    try:
+        fn(isp, username)
+        return None
+    except UsernameFormatError as e:
+        return str(e)
+
+
+def check_equivalent(fn_a, fn_b, samples: list):
+    """两种实现对每个样本给出相同结果，否则抛出 AssertionError"""
+    for isp, username in samples:
+        a, b = outcome(fn_a, isp, username), outcome(fn_b, isp, username)
+        if a != b:
+            raise AssertionError(f"结果不一致: isp={isp} username={username}: {a} != {b}")
+
+
+def draft7_errors(payload) -> list:
+    """Draft7Validator 的错误列表（与 validate_activate_payload 的格式相同）"""
+    return [
+        {"path": ".".join(map(str, e.path)) if e.path else "root", "message": e.message}
+        for e in sorted(draft7_validator.iter_errors(payload), key=lambda e: e.path)
+    ]
+
+
+def time_schema(fn, payloads: list, iterations: int) -> float:
+    """
+    计时（schema 校验）
+
+    Returns:
+        float: 每次校验的平均耗时（微秒）
+    """
+    count = len(payloads)
+    started = time.perf_counter()
+    for i in range(iterations):
+        fn(payloads[i % count])
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def time_validator(fn, samples: list, iterations: int) -> float:
+    """
+    计时
+
+    Returns:
+        float: 每次校验的平均耗时（微秒）
+    """
+    count = len(samples)
+    started = time.perf_counter()
+    for i in range(iterations):
+        isp, username = samples[i % count]
+        try:
+            fn(isp, username)
+        except UsernameFormatError:
+            pass
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='激活请求校验微基准')
+    parser.add_argument('--iterations', type=int, default=200000, help='每种实现的校验次数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    check_equivalent(legacy_validate, isp_registry.validate_username, SAMPLES)
+
+    # 先各跑一轮预热（填充 re 模块缓存）
+    for fn in (legacy_validate, isp_registry.validate_username):
+        time_validator(fn, SAMPLES, len(SAMPLES))
+
+    report = {
+        'iterations': args.iterations,
+        'schema_us': {},
+        'username_us': {
+            'legacy': round(time_validator(legacy_validate, SAMPLES, args.iterations), 3),
+            'registry': round(time_validator(isp_registry.validate_username, SAMPLES, args.iterations), 3),
+        }
+    }
+
+    if fast_validator is not None:
+        report['schema_us']['fast'] = round(time_schema(fast_validator, PAYLOADS, args.iterations), 3)
+    if draft7_validator is not None:
+        for payload in PAYLOADS:
+            if fast_validator is not None and draft7_errors(payload) != fast_validator(payload):
+                raise AssertionError(f"结果不一致: {payload}")
+        # Draft7Validator 慢一个数量级以上，减少次数
+        draft7_iterations = max(len(PAYLOADS), args.iterations // 20)
+        report['schema_us']['draft7'] = round(time_schema(draft7_errors, PAYLOADS, draft7_iterations), 3)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print('=' * 60)
+    print(f"校验次数: {report['iterations']}（请求体样本 {len(PAYLOADS)} 条、账号样本 {len(SAMPLES)} 条循环使用）")
+    print("请求体 schema 校验（每次平均）:")
+    for name, us in report['schema_us'].items():
+        print(f"  {name:>12}: {us:.3f}us")
+    if draft7_validator is None:
+        print("  （未安装 jsonschema，跳过 draft7）")
+    print("账号格式校验（每次平均）:")
+    for name, us in report['username_us'].items():
+        print(f"  {name:>12}: {us:.3f}us")
+    print('=' * 60)
+
+
+if __name__ == '__main__':
+    main()
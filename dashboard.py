@@ -1,7 +1,9 @@
 # dashboard.py
-from flask import Flask, jsonify, render_template, request, make_response, redirect, url_for, session
-from models import SessionLocal, ActivationLog, NetworkConfig, AdminUser, Config, init_db
-from sync import sync_logs
+from flask import Flask, jsonify, render_template, request, redirect, url_for, session, Response, stream_with_context
+from models import engine, SessionLocal, ActivationLog, NetworkConfig, AdminUser, Config, init_db
+from sync import start_sync_thread
+import stats_rollup
+import isp_registry
 from config import ADMIN_PORT
 import logging
 import csv
@@ -9,9 +11,11 @@ from io import StringIO
 from datetime import datetime
 import hashlib
 from flask_sqlalchemy import SQLAlchemy
+from db_engine import engine_options, enable_sqlite_pragmas
 import subprocess
 import json
 import os
+import base64
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -22,7 +26,10 @@ app.secret_key = 'your-super-secret-key-change-it-please'  # 请修改！
 # ========== 数据库配置 ==========
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:////opt/pppoe-activation/instance/database.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options()
 db = SQLAlchemy(app)
+with app.app_context():
+    enable_sqlite_pragmas(db.engine)
 
 # ========== 启动时创建表和默认管理员 ==========
 import secrets
@@ -47,32 +54,96 @@ with app.app_context():
     finally:
         session_db.close()
 
-# ISP 显示映射
-ISP_DISPLAY = {
-    'cdu': '校园网',
-    'cmccgx': '中国移动',
-    '96301': '中国电信',
-    '10010': '中国联通',
-    'direct': '直拨'
-}
+# ISP 显示映射 / 颜色映射（来自 isp_registry，与拨号和校验使用同一张表）
+ISP_DISPLAY = isp_registry.DISPLAY_NAMES
 
 # CSV 导出ISP显示映射
-CSV_ISP_DISPLAY = {
-    'cdu': '校园网',
-    'cmccgx': '中国移动',
-    '10010': '中国联通',
-    '96301': '中国电信',
-    'direct': '直拨'
-}
-
-# ISP 颜色映射
-ISP_COLORS = {
-    '校园网': '#FF8C00',  # 橙色
-    '中国移动': '#32CD32',  # 绿色
-    '中国电信': '#1E90FF',  # 蓝色
-    '中国联通': '#FF0000',  # 红色
-    '直拨': '#00CED1'  # 青色
-}
+CSV_ISP_DISPLAY = isp_registry.DISPLAY_NAMES
+
+ISP_COLORS = isp_registry.COLORS
+
+# =============================
+# 日志游标分页
+# =============================
+
+# JSON 接口单页最大条数
+LOG_PAGE_MAX = 200
+
+
+class LogPage:
+    """
+    按 id 倒序的一页日志（keyset 分页，不使用 OFFSET，深页与首页代价相同）
+
+    Attributes:
+        items: 本页日志
+        next_cursor / prev_cursor: 下一页 / 上一页游标，没有时为 None
+        total: 日志总数（取自日汇总表，近似值）
+    """
+
+    def __init__(self, items, per_page, next_cursor, prev_cursor, total):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.has_next = next_cursor is not None
+        self.has_prev = prev_cursor is not None
+        self.total = total
+
+
+def _encode_cursor(direction, log_id):
+    raw = json.dumps({"d": direction, "id": log_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """解析游标，无效时返回 (None, None)（即第一页）"""
+    if not cursor:
+        return None, None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        direction, log_id = data['d'], int(data['id'])
+    except (ValueError, TypeError, KeyError):
+        return None, None
+    if direction not in ('next', 'prev'):
+        return None, None
+    return direction, log_id
+
+
+def _log_page(db, cursor, per_page):
+    """
+    读取一页日志
+
+    Args:
+        db: 数据库会话
+        cursor: 上一次返回的 next_cursor / prev_cursor，为空时取第一页
+        per_page: 每页条数
+
+    Returns:
+        LogPage
+    """
+    direction, log_id = _decode_cursor(cursor)
+    query = db.query(ActivationLog)
+    if direction == 'prev':
+        # 向前翻页：取比游标新的 per_page 条，再按倒序排列
+        rows = (query.filter(ActivationLog.id > log_id)
+                .order_by(ActivationLog.id.asc()).limit(per_page + 1).all())
+        has_more = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_prev, has_next = has_more, True
+    else:
+        if direction == 'next':
+            query = query.filter(ActivationLog.id < log_id)
+        rows = query.order_by(ActivationLog.id.desc()).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = rows[:per_page]
+        has_prev, has_next = direction == 'next', has_more
+
+    next_cursor = _encode_cursor('next', items[-1].id) if has_next and items else None
+    prev_cursor = _encode_cursor('prev', items[0].id) if has_prev and items else None
+    total, _ = stats_rollup.success_totals(db)
+    return LogPage(items, per_page, next_cursor, prev_cursor, total)
+
 
 # =============================
 # 管理员登录/登出
@@ -122,31 +193,17 @@ def logout():
 @app.route('/logs')
 def admin_logs():
     if 'admin' not in session:
+        if request.args.get('format') == 'json':
+            return jsonify({"error": "未登录"}), 401
         return redirect('/login')
 
+    # JSON 分页接口与页面共用同一 URL（Flask 只会匹配先注册的 /logs 路由）
+    if request.args.get('format') == 'json':
+        return get_logs()
+
     db = SessionLocal()
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = 50
-        query = db.query(ActivationLog).order_by(ActivationLog.id.desc())
-        total = query.count()
-        offset = (page - 1) * per_page
-        logs = query.offset(offset).limit(per_page).all()
-
-        # 创建一个简单的Pagination对象
-        class Pagination:
-            def __init__(self, items, page, per_page, total):
-                self.items = items
-                self.page = page
-                self.per_page = per_page
-                self.total = total
-                self.pages = (total + per_page - 1) // per_page if total > 0 else 1
-                self.has_prev = page > 1
-                self.has_next = page < self.pages
-                self.prev_num = page - 1 if self.has_prev else None
-                self.next_num = page + 1 if self.has_next else None
-
-        pagination = Pagination(logs, page, per_page, total)
+        pagination = _log_page(db, request.args.get('cursor'), 50)
         
         # 获取当前用户角色
         current_role = session.get('admin_role')
@@ -424,6 +481,7 @@ def save_config(data):
             net_config.net_mode = net_mode
             net_config.base_interface = base_interface
             net_config.vlan_id = vlan_id_str
+            net_config.touch()
             db.session.add(net_config)
             
             print(f"VLAN 模式：物理网卡={base_interface}, VLAN ID={vlan_id_str}")
@@ -436,6 +494,7 @@ def save_config(data):
             net_config.net_mode = net_mode
             net_config.base_interface = interfaces[0] if interfaces else 'eth0'
             net_config.vlan_id = None
+            net_config.touch()
             db.session.add(net_config)
             
             print(f"物理模式：物理网卡={net_config.base_interface}")
@@ -569,16 +628,13 @@ def save():
 # =============================
 # 分页日志接口
 # =============================
-@app.route('/logs')
 def get_logs():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
-    offset = (page - 1) * per_page
+    """日志 JSON 分页（/logs?format=json&cursor=...&per_page=20）"""
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), LOG_PAGE_MAX)
 
     db = SessionLocal()
     try:
-        total = db.query(ActivationLog).count()
-        logs = db.query(ActivationLog).order_by(ActivationLog.timestamp.desc()).offset(offset).limit(per_page).all()
+        page = _log_page(db, request.args.get('cursor'), per_page)
     except Exception as e:
         logger.error(f"Database error in /logs: {str(e)}")
         return jsonify({'error': 'Failed to fetch logs'}), 500
@@ -596,14 +652,15 @@ def get_logs():
         'error_code': log.error_code or '',
         'error_message': log.error_message or '',
         'timestamp': log.timestamp or ''
-    } for log in logs]
+    } for log in page.items]
 
     return jsonify({
         'data': data,
-        'total': total,
-        'page': page,
+        'total': page.total,
+        'total_approximate': True,
         'per_page': per_page,
-        'pages': (total + per_page - 1) // per_page
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor
     })
 
 
@@ -615,40 +672,18 @@ def dashboard():
     if 'admin' not in session:
         return redirect('/login')
 
-    try:
-        sync_logs(latest_only=True)
-    except Exception as e:
-        logger.error(f"自动同步失败: {e}")
-
-    # 获取统计数据
+    # 获取统计数据（读取日汇总表，行数与日志量无关）
     db = SessionLocal()
     try:
         # 按日期统计
-        logs = db.query(ActivationLog).all()
-        count_by_day = {}
-        for log in logs:
-            if log.timestamp:
-                date = log.timestamp.split()[0] if ' ' in log.timestamp else log.timestamp
-                if date not in count_by_day:
-                    count_by_day[date] = 0
-                count_by_day[date] += 1
+        count_by_day = stats_rollup.count_by_day(db)
 
         # 按ISP统计
-        isp_count = {}
-        for log in logs:
-            isp = log.isp or 'Unknown'
-            if isp not in isp_count:
-                isp_count[isp] = 0
-            isp_count[isp] += 1
+        isp_count = stats_rollup.count_by_isp(db)
 
         # 统计成功和失败次数
-        success_count = 0
-        failure_count = 0
-        for log in logs:
-            if log.success:
-                success_count += 1
-            else:
-                failure_count += 1
+        total, success_count = stats_rollup.success_totals(db)
+        failure_count = total - success_count
 
         period = "最近记录"
     finally:
@@ -657,7 +692,8 @@ def dashboard():
     # 获取当前用户角色
     current_role = session.get('admin_role')
     
-    return render_template('dashboard.html', period=period, count_by_day=count_by_day, isp_count=isp_count, success_count=success_count, failure_count=failure_count, current_role=current_role)
+    return render_template('dashboard.html', period=period, count_by_day=count_by_day, isp_count=isp_count, success_count=success_count, failure_count=failure_count, current_role=current_role,
+                           isp_display=ISP_DISPLAY, isp_chart_colors=isp_registry.CHART_COLORS)
 
 
 @app.route('/admin_list')
@@ -819,30 +855,20 @@ def admin_change_password():
 def get_stats():
     db = SessionLocal()
     try:
-        logs = db.query(ActivationLog).all()
+        rows = stats_rollup.isp_stats(db)
     except Exception as e:
         logger.error(f"Database error in /stats: {str(e)}")
         return jsonify([]), 500
     finally:
         db.close()
 
-    stats = {}
-    for log in logs:
-        isp = log.isp or 'Unknown'
-        if isp not in stats:
-            stats[isp] = {"total": 0, "success": 0}
-        stats[isp]["total"] +=1
-        if log.success:
-            stats[isp]["success"] += 1
-
     result = []
-    for isp, data in stats.items():
-        total = data["total"]
-        success = data["success"]
+    for isp, total, success in rows:
         failure = total - success
         rate = f"{success / total * 100:.1f}%" if total > 0 else "0%"
         result.append({
             "isp": isp,
+            "name": isp_registry.display_name(isp),
             "total": total,
             "success": success,
             "failure": failure,
@@ -855,64 +881,71 @@ def get_stats():
 # =============================
 # CSV 导出接口
 # =============================
+PARAM_TIME_FORMAT = '%Y-%m-%dT%H:%M'
+# 每批从数据库读取并输出的行数
+CSV_BATCH_SIZE = 1000
+
+
 @app.route('/export_csv')
 def export_csv():
-    db = SessionLocal()
-    try:
-        logs = db.query(ActivationLog).all()
-    except Exception as e:
-        logger.error(f"Database error when fetching logs for CSV export: {str(e)}")
-        return jsonify({'error': 'Failed to fetch logs for export'}), 500
-    finally:
-        db.close()
-
     start_str = request.args.get('start')
     end_str = request.args.get('end')
-    LOG_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
-    PARAM_TIME_FORMAT = '%Y-%m-%dT%H:%M'
-    filtered_logs = []
 
-    for log in logs:
-        if not log.timestamp or not isinstance(log.timestamp, str):
-            continue
+    # 时间范围过滤在 SQL 中完成（走 ts_epoch 索引），时间戳格式不符的记录 ts_epoch 为空，不导出
+    query_filters = [ActivationLog.ts_epoch.isnot(None)]
+    start_time = _parse_export_time(start_str)
+    if start_time:
+        query_filters.append(ActivationLog.ts_epoch >= int(start_time.timestamp()))
+    end_time = _parse_export_time(end_str)
+    if end_time:
+        query_filters.append(ActivationLog.ts_epoch <= int(end_time.timestamp()))
+
+    def generate():
+        db = SessionLocal()
         try:
-            log_time = datetime.strptime(log.timestamp.strip(), LOG_TIME_FORMAT)
-        except ValueError:
-            continue
-        skip_log = False
-        if start_str:
-            try:
-                start_time = datetime.strptime(start_str, PARAM_TIME_FORMAT)
-                if log_time < start_time:
-                    skip_log = True
-            except ValueError:
-                pass
-        if not skip_log and end_str:
-            try:
-                end_time = datetime.strptime(end_str, PARAM_TIME_FORMAT)
-                if log_time > end_time:
-                    skip_log = True
-            except ValueError:
-                pass
-        if not skip_log:
-            filtered_logs.append(log)
-
-    si = StringIO()
-    si.write('\ufeff')
-    cw = csv.writer(si)
-    cw.writerow(['姓名', '角色', '运营商', '账号', '状态', 'IP地址', 'MAC地址', '时间戳', '错误码', '错误信息'])
-    for log in filtered_logs:
-        status = '成功' if log.success else '失败'
-        cw.writerow([log.name or '', log.role or '', log.isp or '', log.username or '',
-                     status, log.ip or '', log.mac or '', log.timestamp or '',
-                     log.error_code or '', log.error_message or ''])
-    output = make_response(si.getvalue())
+            logs = (
+                db.query(ActivationLog)
+                .filter(*query_filters)
+                .order_by(ActivationLog.id)
+                .yield_per(CSV_BATCH_SIZE)
+            )
+            si = StringIO()
+            cw = csv.writer(si)
+            si.write('\ufeff')
+            cw.writerow(['姓名', '角色', '运营商', '账号', '状态', 'IP地址', 'MAC地址', '时间戳', '错误码', '错误信息'])
+            for i, log in enumerate(logs, 1):
+                status = '成功' if log.success else '失败'
+                cw.writerow([log.name or '', log.role or '', log.isp or '', log.username or '',
+                             status, log.ip or '', log.mac or '', log.timestamp or '',
+                             log.error_code or '', log.error_message or ''])
+                if i % CSV_BATCH_SIZE == 0:
+                    yield si.getvalue()
+                    si.seek(0)
+                    si.truncate()
+            yield si.getvalue()
+        except Exception as e:
+            # 响应头已发出，只能记录错误并截断输出
+            logger.error(f"Database error when exporting logs to CSV: {str(e)}")
+        finally:
+            db.close()
+
     filename = f"pppoe_logs_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+    output = Response(stream_with_context(generate()))
     output.headers["Content-Disposition"] = f"attachment; filename={filename}"
     output.headers["Content-type"] = "text/csv; charset=utf-8-sig"
     return output
 
 
+def _parse_export_time(value):
+    """解析导出参数中的时间（如 2026-01-20T08:30），为空或格式错误时返回 None"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, PARAM_TIME_FORMAT)
+    except ValueError:
+        return None
+
+
 # =============================
 # 启动 Flask
 # =============================
@@ -922,4 +955,11 @@ if __name__ == '__main__':
         logger.info("Database initialized successfully.")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
+    try:
+        if stats_rollup.ensure_built(engine):
+            logger.info("Activation stats rollup rebuilt from activation_logs.")
+    except Exception as e:
+        logger.error(f"Failed to build activation stats rollup: {e}")
+    # activation_log.jsonl 在后台增量导入，不占用页面请求
+    start_sync_thread()
     app.run(host='0.0.0.0', port=ADMIN_PORT, debug=False)
@@ -0,0 +1,82 @@
+# db_engine.py - 共享的 SQLite engine 工厂
+"""
+SQLite 连接参数
+所有入口（app.py、models.py、dashboard.py、admin.py、admin_app.py、init_config.py）
+通过这里创建 engine，统一启用 WAL 和连接级 PRAGMA：
+
+- journal_mode=WAL：读写互不阻塞，拨号写日志时后台页面仍可查询
+- synchronous=NORMAL：WAL 模式下只在检查点时 fsync，断电最多丢失最近的事务
+- busy_timeout：写锁被占用时等待而不是立即抛出 "database is locked"
+- mmap_size / cache_size：减少统计、导出等读操作的系统调用
+"""
+from sqlalchemy import create_engine, event
+
+# 等待写锁的最长时间（毫秒）
+BUSY_TIMEOUT_MS = 5000
+
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', BUSY_TIMEOUT_MS),
+    ('mmap_size', 256 * 1024 * 1024),
+    ('cache_size', -16000),  # 负数表示 KiB，约 16MB
+)
+
+
+def sqlite_uri(path):
+    """数据库文件路径对应的 SQLAlchemy URI"""
+    return f'sqlite:///{path}'
+
+
+def engine_options():
+    """
+    create_engine 的通用参数（Flask-SQLAlchemy 通过 SQLALCHEMY_ENGINE_OPTIONS 使用）
+
+    Returns:
+        dict: create_engine 关键字参数
+    """
+    return {
+        "connect_args": {
+            # sqlite3 模块自身的锁等待（秒），与 busy_timeout 保持一致
+            "timeout": BUSY_TIMEOUT_MS / 1000,
+            # 连接由连接池在线程间复用
+            "check_same_thread": False
+        }
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def enable_sqlite_pragmas(engine):
+    """
+    为已创建的 engine 注册连接钩子（用于 Flask-SQLAlchemy 管理的 engine）
+
+    Args:
+        engine: SQLAlchemy engine
+    """
+    if not event.contains(engine, 'connect', _set_sqlite_pragmas):
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+    return engine
+
+
+def create_sqlite_engine(path, **kwargs):
+    """
+    创建启用 WAL 和调优 PRAGMA 的 SQLite engine
+
+    Args:
+        path: 数据库文件路径
+        **kwargs: 额外的 create_engine 参数
+
+    Returns:
+        Engine
+    """
+    options = engine_options()
+    options.update(kwargs)
+    return enable_sqlite_pragmas(create_engine(sqlite_uri(path), **options))
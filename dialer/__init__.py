@@ -0,0 +1,40 @@
+"""
+PPPoE 拨号引擎
+提供拨号过程中的就绪检测、异步任务、排队调度、会话登记、耗时统计、拨号后端、错误分类、结果缓存、并发合并、接口健康度等组件
+"""
+
+from .readiness import PppLogWatcher
+from .jobs import ActivationJob, JobManager
+from .scheduler import DialScheduler, QueueFull, QueueTimeout
+from .sessions import PppSession, SessionRegistry
+from .metrics import Histogram, DialMetrics
+from .backend import DialAttempt, DialerBackend
+from .pppd import PppdBackend
+from .simulated import SimulatedBackend
+from .classifier import ClassifierStream, PppErrorClassifier
+from .outcomes import OutcomeCache, normalize_username
+from .singleflight import SingleFlight
+from .health import InterfaceHealth
+
+__all__ = [
+    'PppLogWatcher',
+    'ActivationJob',
+    'JobManager',
+    'DialScheduler',
+    'QueueFull',
+    'QueueTimeout',
+    'PppSession',
+    'SessionRegistry',
+    'Histogram',
+    'DialMetrics',
+    'DialAttempt',
+    'DialerBackend',
+    'PppdBackend',
+    'SimulatedBackend',
+    'ClassifierStream',
+    'PppErrorClassifier',
+    'OutcomeCache',
+    'normalize_username',
+    'SingleFlight',
+    'InterfaceHealth'
+]
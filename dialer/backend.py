@@ -0,0 +1,136 @@
+"""
+拨号后端接口
+把一次激活拆成 获取接口 → 准备链路 → 拨号 → 等待 IP → 挂断 五个步骤，
+app.py 只负责编排、计时和写日志，具体实现由后端提供：
+
+- PppdBackend：真实拨号（pppd + rp-pppoe、netlink 修改 MAC）
+- SimulatedBackend：进程内模拟，耗时按分布抽样，用于测量 Web / 排队 / 数据库层的吞吐上限
+"""
+
+import time
+
+
+class DialAttempt:
+    """
+    一次拨号尝试（由 DialerBackend.dial() 创建）
+
+    Attributes:
+        iface: 拨号使用的网卡
+        username: 完整拨号账号
+        started: 开始拨号的时间（time.monotonic()）
+        ppp_interface: 协商出的 ppp 接口名，未知时为 None
+        log_file: 拨号日志路径（没有日志的后端为 None）
+        abort_reason: 未等到超时就判定失败的原因（如 'error:pap_auth_failed'、'exited'），
+            成功或超时为 None
+        session: PppdBackend 登记的 pppd 会话（SessionRegistry），其他后端为 None
+        outcome: SimulatedBackend 预先抽样的结果（'ok' 或错误码），其他后端为 None
+        watcher: PppdBackend 等待 IP 时使用的日志跟踪器（PppLogWatcher），未开始等待时为 None
+    """
+
+    def __init__(self, iface: str, username: str, log_file: str = None):
+        self.iface = iface
+        self.username = username
+        self.started = time.monotonic()
+        self.ppp_interface = None
+        self.log_file = log_file
+        self.abort_reason = None
+        self.session = None
+        self.outcome = None
+        self.watcher = None
+
+
+class DialerBackend:
+    """
+    拨号后端基类
+
+    接口占用统一由 DialScheduler 管理（FIFO 排队 + flock 文件锁），
+    子类实现 check_interface / prepare_link / dial / await_ip / hangup / diagnose
+
+    Args:
+        scheduler: DialScheduler
+    """
+
+    name = 'base'
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+
+    def acquire(self, iface_list: list, timeout: float = None):
+        """
+        排队获取空闲接口
+
+        Returns:
+            (iface, lock_fd)
+
+        Raises:
+            QueueFull / QueueTimeout: 见 DialScheduler.acquire
+        """
+        return self.scheduler.acquire(iface_list, timeout)
+
+    def release(self, iface: str, lock_fd):
+        """释放接口"""
+        self.scheduler.release(iface, lock_fd)
+
+    def report_carrier(self, iface: str, up: bool):
+        """记录链路状态（调度器启用健康度跟踪时影响接口选择顺序）"""
+        if self.scheduler.health is not None:
+            self.scheduler.health.set_carrier(iface, up)
+
+    def check_interface(self, iface: str):
+        """
+        校验接口可用（只校验，不创建）
+
+        Raises:
+            RuntimeError: 接口不存在
+        """
+        raise NotImplementedError
+
+    def prepare_link(self, iface: str, mac: str, timings: dict) -> bool:
+        """
+        在接口锁内准备链路：清理旧会话、修改 MAC、等待链路恢复
+
+        Args:
+            iface: 网卡
+            mac: 新 MAC 地址
+            timings: 写入 clear_ppp / set_mac / link_up 耗时（秒）
+
+        Returns:
+            bool: MAC 是否设置成功
+        """
+        raise NotImplementedError
+
+    def dial(self, iface: str, username: str, password: str) -> DialAttempt:
+        """
+        开始拨号（不等待结果）
+
+        Raises:
+            Exception: 拨号进程无法启动
+        """
+        raise NotImplementedError
+
+    def await_ip(self, attempt: DialAttempt, timeout: float, on_phase=None):
+        """
+        等待拨号获取 IP（确定失败时应立即返回，不必等到超时）
+
+        Args:
+            attempt: dial() 返回的拨号尝试
+            timeout: 最长等待时间（秒）
+            on_phase: 阶段回调 on_phase(phase, **info)，phase 为 pado / auth / ip
+
+        Returns:
+            str: IP 地址，失败或超时返回 None
+        """
+        raise NotImplementedError
+
+    def hangup(self, attempt: DialAttempt, failed: bool = False):
+        """挂断拨号；failed 为 True 时同时清理失败残留（如 ppp 接口）"""
+        raise NotImplementedError
+
+    def diagnose(self, attempt: DialAttempt):
+        """
+        拨号失败时判断错误类型
+
+        Returns:
+            (错误码, 错误信息)
+        """
+        raise NotImplementedError
@@ -0,0 +1,317 @@
+"""
+PPPoE 拨号错误分类
+把 pppd 日志中的错误特征写成声明式规则表（特征串 → 错误码、提示信息），
+所有规则的特征串去重后编译成一张特征表，日志每段新内容只扫描一遍得到出现过的特征集合，
+再按规则顺序判定错误码：
+
+- 特征串用 str 的 C 实现子串查找（CPython 的 re 没有多模式匹配，
+  组合成一个正则反而比逐个子串查找慢 2~5 倍），已出现的特征串不再查找
+- 日志可以流式输入（PppLogWatcher 边跟踪边分类，拨号失败时无需重读日志）
+- 规则可以通过 JSON 规则文件在运行期扩充或覆盖，无需改代码
+
+规则字段：
+    name     规则名（同名规则文件中的规则会覆盖内置规则）
+    code     错误码
+    message  提示信息；带 detail 的规则为无详情时的提示
+    all      必须全部出现的特征串
+    any      至少出现一个的特征串
+    none     不能出现的特征串
+    detail   为 true 时提取 AuthNak 中的服务器返回信息，按 DETAIL_RULES 细分提示
+    terminal 为 true 表示命中后本次拨号不可能再成功，等待 IP 时可立即放弃
+特征串区分大小写，以 "i:" 开头表示不区分大小写
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 没有任何规则命中时的结果
+DEFAULT_ERROR = ("815", "连接失败，未获取到IP地址")
+
+# 内置规则（按优先级排列，第一条命中的规则生效）
+DEFAULT_RULES = [
+    {"name": "pap_auth_failed", "code": "691", "message": "账号或密码错误，请核对后重试",
+     "any": ["PAP authentication failed", "PAP AuthNak"], "detail": True, "terminal": True},
+    {"name": "chap_auth_failed", "code": "646", "message": "账号或密码错误，请核对后重试",
+     "any": ["CHAP authentication failed", "CHAP AuthNak"], "detail": True, "terminal": True},
+    {"name": "pado_timeout", "code": "678", "message": "远程计算机无响应，可能是网络不可达或线路未接通",
+     "any": ["Timeout waiting for PADO packets", "Unable to complete PPPoE Discovery"], "terminal": True},
+    {"name": "lcp_terminated", "code": "734", "message": "PPP链路控制协议终止，可能是MTU/MRU不匹配，网络异常请稍后再试",
+     "any": ["LCP terminated by peer"], "terminal": True},
+    {"name": "lcp_timeout", "code": "718", "message": "PPP协议超时，可能网络拥塞或服务器无响应",
+     "any": ["LCP timeout"]},
+    {"name": "lcp_echo_unanswered", "code": "718", "message": "PPP协议超时，可能网络拥塞或服务器无响应",
+     "all": ["LCP EchoReq"], "none": ["LCP EchoRep"]},
+    {"name": "modem_hangup", "code": "629", "message": "远程计算机强制关闭连接，请稍后再试",
+     "any": ["Modem hangup", "Connection terminated"], "terminal": True},
+    # rp-pppoe 的报文日志写作 "PPPOE Discovery"，错误信息写作 "PPPoE Discovery"，不区分大小写
+    {"name": "no_pado", "code": "630", "message": "连接失败，设备不可用，请检查本地网卡或线路",
+     "all": ["i:Send PPPoE Discovery"], "none": ["i:Recv PPPoE Discovery"]},
+    {"name": "auth_failed", "code": "691", "message": "认证失败，请检查账号和密码",
+     "all": ["Authentication failed"], "none": ["CHAP", "PAP"]},
+    {"name": "ipcp_failed", "code": "734", "message": "IPCP协商失败，可能是IP地址分配问题",
+     "all": ["IPCP"], "any": ["failed", "terminated"]},
+    {"name": "no_carrier", "code": "630", "message": "物理连接断开，请检查网线或网络设备",
+     "any": ["No carrier", "Link down"]},
+    {"name": "mac_conflict", "code": "630", "message": "MAC地址冲突，请稍后重试",
+     "all": ["MAC address"], "any": ["i:conflict", "i:duplicate"]},
+    {"name": "server_refused", "code": "691", "message": "服务器拒绝连接，请检查账号状态",
+     "any": ["Server refused", "Access denied"]},
+]
+
+# AuthNak 详情细分（按顺序匹配小写后的详情，{detail} 替换为服务器返回信息）
+DETAIL_RULES = [
+    (("concurrency",), "账号已在其他地方登录，请等待几分钟后重试（错误详情：{detail}）"),
+    (("password", "incorrect"), "账号或密码错误，请核对后重试（错误详情：{detail}）"),
+    (("disabled", "deregistered"), "账号已被停用或注销，请联系运营商（错误详情：{detail}）"),
+    (("expired",), "账号已过期，请联系运营商（错误详情：{detail}）"),
+    (("locked",), "账号已被锁定，请联系运营商（错误详情：{detail}）"),
+]
+DETAIL_FALLBACK = "账号或密码错误，请核对后重试（错误详情：{detail}）"
+
+AUTH_NAK_DETAIL_RE = re.compile(r'AuthNak.*?"([^"]+)"')
+
+# 读取日志文件的分段大小（字节）
+READ_CHUNK_SIZE = 64 * 1024
+
+# 两次检查规则文件是否变化的最短间隔（秒）
+RULES_CHECK_INTERVAL = 1.0
+
+
+class _Rule:
+    __slots__ = ('name', 'code', 'message', 'all', 'any', 'none', 'detail', 'terminal')
+
+    def __init__(self, spec: dict):
+        if not spec.get('name') or not spec.get('code') or not spec.get('message'):
+            raise ValueError(f"规则缺少 name / code / message: {spec}")
+        if not (spec.get('all') or spec.get('any')):
+            raise ValueError(f"规则 {spec['name']} 至少需要 all 或 any 特征串")
+        self.name = spec['name']
+        self.code = str(spec['code'])
+        self.message = spec['message']
+        self.all = frozenset(spec.get('all') or ())
+        self.any = frozenset(spec.get('any') or ())
+        self.none = frozenset(spec.get('none') or ())
+        self.detail = bool(spec.get('detail'))
+        self.terminal = bool(spec.get('terminal'))
+
+    def tokens(self):
+        return self.all | self.any | self.none
+
+    def matches(self, seen: set) -> bool:
+        return (self.all <= seen
+                and (not self.any or not self.any.isdisjoint(seen))
+                and self.none.isdisjoint(seen))
+
+
+class _CompiledRules:
+    """一组规则及其特征表（不可变，重新加载规则时整体替换）"""
+
+    def __init__(self, specs: list):
+        self.rules = [_Rule(spec) for spec in specs]
+        self.terminal_rules = [rule for rule in self.rules if rule.terminal]
+        tokens = {t for rule in self.rules for t in rule.tokens()}
+        self.tokens = tuple(sorted(t for t in tokens if not t.startswith('i:')))
+        # 不区分大小写的特征串：在小写化的文本中查找小写特征串
+        self.ci_tokens = tuple(sorted((t, t[2:].lower()) for t in tokens if t.startswith('i:')))
+
+
+class ClassifierStream:
+    """
+    流式分类状态（分段输入日志，随时可取当前分类结果）
+
+    Attributes:
+        seen: 已出现的特征串
+        detail: 第一条带引号信息的 AuthNak 详情
+    """
+
+    def __init__(self, compiled: _CompiledRules):
+        self._compiled = compiled
+        self._tokens = compiled.tokens
+        self._ci_tokens = compiled.ci_tokens
+        self.seen = set()
+        self.detail = None
+
+    def feed(self, text: str):
+        """
+        输入一段日志（应以完整行为单位，特征串不会跨行）
+        """
+        if not text:
+            return
+        found = [t for t in self._tokens if t in text]
+        if found:
+            self.seen.update(found)
+            self._tokens = tuple(t for t in self._tokens if t not in self.seen)
+        if self._ci_tokens:
+            lowered = text.lower()
+            found = [t for t, low in self._ci_tokens if low in lowered]
+            if found:
+                self.seen.update(found)
+                self._ci_tokens = tuple(item for item in self._ci_tokens if item[0] not in self.seen)
+        if self.detail is None and 'AuthNak' in text:
+            match = AUTH_NAK_DETAIL_RE.search(text)
+            if match:
+                self.detail = match.group(1)
+
+    def feed_lines(self, lines):
+        for line in lines:
+            self.feed(line)
+
+    def matched_rule(self):
+        """第一条命中的规则，未命中返回 None"""
+        if not self.seen:
+            return None
+        for rule in self._compiled.rules:
+            if rule.matches(self.seen):
+                return rule
+        return None
+
+    def terminal(self):
+        """第一条命中的终止性规则（拨号已不可能成功），未命中返回 None"""
+        if not self.seen:
+            return None
+        for rule in self._compiled.terminal_rules:
+            if rule.matches(self.seen):
+                return rule
+        return None
+
+    def result(self):
+        """
+        当前分类结果
+
+        Returns:
+            (错误码, 错误信息)
+        """
+        rule = self.matched_rule()
+        if rule is None:
+            return DEFAULT_ERROR
+        if rule.detail and self.detail:
+            return rule.code, _detail_message(self.detail)
+        return rule.code, rule.message
+
+
+def _detail_message(detail: str) -> str:
+    lowered = detail.lower()
+    for keywords, template in DETAIL_RULES:
+        if any(k in lowered for k in keywords):
+            return template.format(detail=detail)
+    return DETAIL_FALLBACK.format(detail=detail)
+
+
+def load_rules_file(path: str) -> list:
+    """
+    读取 JSON 规则文件（规则列表，或 {"rules": [...]}）
+
+    Raises:
+        OSError / ValueError: 文件无法读取或格式无效
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('rules')
+    if not isinstance(data, list):
+        raise ValueError(f"规则文件格式无效（应为规则列表）: {path}")
+    return data
+
+
+def merge_rules(base: list, extra: list) -> list:
+    """同名规则原位覆盖内置规则，新规则排在内置规则之前（优先匹配）"""
+    by_name = {spec['name']: spec for spec in extra if isinstance(spec, dict) and spec.get('name')}
+    merged = [by_name.pop(spec['name'], spec) for spec in base]
+    return [spec for spec in extra if spec.get('name') in by_name] + merged
+
+
+class PppErrorClassifier:
+    """
+    PPPoE 错误分类器（线程安全）
+
+    Args:
+        rules: 内置规则（默认 DEFAULT_RULES）
+        rules_file: 可选 JSON 规则文件；修改后在 check_interval 秒内自动重新加载，
+            文件无效时记录警告并继续使用上一版规则
+        check_interval: 检查规则文件修改时间的最短间隔（秒）
+    """
+
+    def __init__(self, rules: list = None, rules_file: str = None,
+                 check_interval: float = RULES_CHECK_INTERVAL):
+        self._base_rules = list(rules if rules is not None else DEFAULT_RULES)
+        self.rules_file = rules_file
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._compiled = _CompiledRules(self._base_rules)
+        self._file_mtime = None
+        self._checked_at = 0.0
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False):
+        """规则文件有变化时重新编译规则"""
+        if not self.rules_file:
+            return
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.rules_file).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime == self._file_mtime:
+                return
+            self._file_mtime = mtime
+            if mtime is None:
+                logger.info(f"错误规则文件不存在，使用内置规则: {self.rules_file}")
+                self._compiled = _CompiledRules(self._base_rules)
+                return
+            try:
+                specs = merge_rules(self._base_rules, load_rules_file(self.rules_file))
+                self._compiled = _CompiledRules(specs)
+                logger.info(f"已加载错误规则文件: {self.rules_file}（共 {len(specs)} 条规则）")
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"错误规则文件无效，继续使用当前规则: {self.rules_file}: {e}")
+
+    def stream(self) -> ClassifierStream:
+        """创建一个流式分类状态"""
+        self.refresh()
+        return ClassifierStream(self._compiled)
+
+    def classify_lines(self, lines):
+        """
+        对日志行（或整段日志文本）分类
+
+        Returns:
+            (错误码, 错误信息)
+        """
+        stream = self.stream()
+        stream.feed_lines(lines)
+        return stream.result()
+
+    def classify_file(self, log_file: str):
+        """
+        分段读取 pppd 日志文件并分类
+
+        Returns:
+            (错误码, 错误信息)，文件无法读取时返回 DEFAULT_ERROR
+        """
+        try:
+            stream = self.stream()
+            partial = ''
+            with open(log_file, 'r', encoding='utf-8') as f:
+                while True:
+                    chunk = f.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    # 按行切分，保证特征串不会被截断在两段之间
+                    chunk, sep, tail = (partial + chunk).rpartition('\n')
+                    stream.feed(chunk + sep)
+                    partial = tail
+            stream.feed(partial)
+            return stream.result()
+        except Exception as e:
+            logger.error(f"检测PPPOE错误失败: {e}")
+            return DEFAULT_ERROR
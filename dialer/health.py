@@ -0,0 +1,204 @@
+"""
+接口健康度与自适应选择
+DialScheduler 原先按配置顺序扫描接口，锁又只在准备链路期间持有（拨号在锁外进行），
+排在前面的 VLAN 几乎总是空闲，吸收了绝大部分拨号；上游 BRAS 变慢或故障的接口也会被一直尝试。
+
+这里为每个接口记录：
+- 最近 N 次拨号的链路结果（成功，或认证类失败说明链路可用；678 / 630 / 815 等算链路失败）
+- PADO 延迟（指数滑动平均）
+- carrier 状态（修改 MAC 后链路是否恢复）
+
+选择顺序：最久未使用优先，空闲时长按健康度加权；
+连续出现 678 / 630 的接口隔离一段时间，全部接口都被隔离时仍按健康度尝试
+"""
+
+import collections
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 计入成功率的最近拨号次数
+DEFAULT_WINDOW = 20
+
+# 链路失败的错误码（其余失败如 691 / 646 说明链路已通，问题在账号）
+DEFAULT_LINK_FAILURE_CODES = ('678', '630', '815', 'MAC_FAIL')
+
+# 触发隔离的错误码、连续次数、隔离时长（秒）
+DEFAULT_QUARANTINE_CODES = ('678', '630')
+DEFAULT_QUARANTINE_AFTER = 3
+DEFAULT_QUARANTINE_SECONDS = 60
+
+# PADO 延迟不超过该值（秒）时不扣分，超过后按比例降低健康度
+DEFAULT_PADO_REFERENCE = 0.2
+
+# carrier 未恢复时的健康度系数
+CARRIER_DOWN_FACTOR = 0.2
+
+# PADO 延迟滑动平均的权重
+PADO_EWMA_WEIGHT = 0.3
+
+
+class _IfaceState:
+    """单个接口的统计"""
+
+    __slots__ = ('outcomes', 'pado', 'carrier', 'last_used', 'streak', 'quarantined_until')
+
+    def __init__(self, window: int):
+        self.outcomes = collections.deque(maxlen=window)  # True 为链路可用
+        self.pado = None
+        self.carrier = True
+        self.last_used = None
+        self.streak = 0
+        self.quarantined_until = 0.0
+
+
+class InterfaceHealth:
+    """
+    接口健康度跟踪（线程安全）
+
+    Args:
+        window: 计入成功率的最近拨号次数
+        link_failure_codes: 视为链路失败的错误码
+        quarantine_codes: 触发隔离的错误码
+        quarantine_after: 连续出现隔离错误码多少次后隔离，0 表示不隔离
+        quarantine_seconds: 隔离时长（秒），到期后放行一次拨号试探，仍失败则重新隔离
+        pado_reference: 不扣分的 PADO 延迟上限（秒）
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, link_failure_codes=DEFAULT_LINK_FAILURE_CODES,
+                 quarantine_codes=DEFAULT_QUARANTINE_CODES, quarantine_after: int = DEFAULT_QUARANTINE_AFTER,
+                 quarantine_seconds: float = DEFAULT_QUARANTINE_SECONDS,
+                 pado_reference: float = DEFAULT_PADO_REFERENCE):
+        self.window = window
+        self.link_failure_codes = frozenset(str(code) for code in link_failure_codes)
+        self.quarantine_codes = frozenset(str(code) for code in quarantine_codes)
+        self.quarantine_after = quarantine_after
+        self.quarantine_seconds = quarantine_seconds
+        self.pado_reference = pado_reference
+        self._lock = threading.Lock()
+        self._ifaces = {}
+
+    def _state(self, iface: str) -> _IfaceState:
+        state = self._ifaces.get(iface)
+        if state is None:
+            state = self._ifaces[iface] = _IfaceState(self.window)
+        return state
+
+    def mark_used(self, iface: str):
+        """记录接口被分配（由 DialScheduler 在加锁成功后调用）"""
+        with self._lock:
+            self._state(iface).last_used = time.monotonic()
+
+    def set_carrier(self, iface: str, up: bool):
+        """记录修改 MAC 后链路是否恢复"""
+        with self._lock:
+            state = self._state(iface)
+            if state.carrier and not up:
+                logger.warning(f"接口 {iface} carrier 未恢复，降低其选择优先级")
+            state.carrier = up
+
+    def record(self, iface: str, error_code=None, pado_seconds: float = None):
+        """
+        记录一次拨号结果
+
+        Args:
+            iface: 拨号使用的接口
+            error_code: 错误码，成功时为 None
+            pado_seconds: 开始拨号到收到 PADO 的耗时，未收到时为 None
+        """
+        code = str(error_code) if error_code is not None else None
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(iface)
+            state.outcomes.append(code not in self.link_failure_codes)
+            if pado_seconds is not None:
+                if state.pado is None:
+                    state.pado = pado_seconds
+                else:
+                    state.pado += PADO_EWMA_WEIGHT * (pado_seconds - state.pado)
+
+            if code in self.quarantine_codes:
+                state.streak += 1
+                if self.quarantine_after and state.streak >= self.quarantine_after:
+                    state.quarantined_until = now + self.quarantine_seconds
+                    logger.warning(f"接口 {iface} 连续 {state.streak} 次 {code}，"
+                                   f"隔离 {self.quarantine_seconds:.0f} 秒")
+            else:
+                if state.quarantined_until:
+                    logger.info(f"接口 {iface} 拨号恢复，解除隔离")
+                state.streak = 0
+                state.quarantined_until = 0.0
+
+    def _score(self, state: _IfaceState) -> float:
+        # 成功率加一平滑：没有记录时为 1，新接口不会被冷落；单次失败不会让健康度归零
+        ok = sum(state.outcomes)
+        score = (ok + 1) / (len(state.outcomes) + 1)
+        if state.pado is not None and state.pado > self.pado_reference:
+            score *= self.pado_reference / state.pado
+        if not state.carrier:
+            score *= CARRIER_DOWN_FACTOR
+        return score
+
+    def order(self, iface_list: list) -> list:
+        """
+        按选择优先级排序接口
+
+        空闲时长（从未使用视为无限长）乘以健康度，从大到小排列；
+        隔离中的接口排除在外，除非列表中的接口全部处于隔离
+
+        Args:
+            iface_list: 候选接口
+
+        Returns:
+            list: 排序后的接口
+        """
+        now = time.monotonic()
+        ranked = []
+        quarantined = []
+        with self._lock:
+            for index, iface in enumerate(iface_list):
+                state = self._ifaces.get(iface)
+                if state is None:
+                    ranked.append((math.inf, index, iface))
+                    continue
+                idle = math.inf if state.last_used is None else now - state.last_used
+                entry = (idle * self._score(state), index, iface)
+                if state.quarantined_until > now:
+                    quarantined.append(entry)
+                else:
+                    ranked.append(entry)
+        candidates = ranked or quarantined
+        candidates.sort(key=lambda entry: (-entry[0], entry[1]))
+        return [iface for _, _, iface in candidates]
+
+    def quarantined(self) -> list:
+        """隔离中的接口"""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(iface for iface, state in self._ifaces.items() if state.quarantined_until > now)
+
+    def snapshot(self) -> dict:
+        """
+        各接口的健康状态
+
+        Returns:
+            dict: {接口: {score, success_rate, samples, pado_ms, carrier, idle_seconds, quarantined_for}}
+        """
+        now = time.monotonic()
+        with self._lock:
+            result = {}
+            for iface, state in sorted(self._ifaces.items()):
+                samples = len(state.outcomes)
+                result[iface] = {
+                    "score": round(self._score(state), 3),
+                    "success_rate": round(sum(state.outcomes) / samples, 3) if samples else None,
+                    "samples": samples,
+                    "pado_ms": round(state.pado * 1000, 1) if state.pado is not None else None,
+                    "carrier": state.carrier,
+                    "idle_seconds": round(now - state.last_used, 1) if state.last_used is not None else None,
+                    "quarantined_for": round(max(0.0, state.quarantined_until - now), 1)
+                }
+            return result
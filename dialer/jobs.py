@@ -0,0 +1,123 @@
+"""
+异步激活任务
+POST /activate?mode=async 只负责入队并立即返回任务 ID，
+拨号在后台线程池中执行，前端通过轮询或 SSE 获取阶段变化，不再长时间占用请求线程
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ActivationJob:
+    """
+    单个激活任务
+
+    阶段依次为：queued → iface_acquired → mac_set → pado → auth → ip，
+    任务结束后 done 为 True，result 为与同步接口一致的响应内容
+    """
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.phase = 'queued'
+        self.phases = [{"phase": 'queued', "time": time.time()}]
+        self.result = None
+        self.done = False
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "phase": self.phase,
+            "phases": list(self.phases),
+            "done": self.done,
+            "result": self.result
+        }
+
+
+class JobManager:
+    """
+    激活任务管理器
+
+    Args:
+        worker: 执行函数 worker(payload, report) -> dict
+        max_workers: 后台并发拨号线程数
+        ttl: 已完成任务的保留时间（秒），超时后查询返回不存在
+    """
+
+    def __init__(self, worker, max_workers: int = 16, ttl: int = 600):
+        self._worker = worker
+        self._ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='activation')
+        self._jobs = {}
+        self._cond = threading.Condition()
+
+    def submit(self, payload: dict) -> ActivationJob:
+        """创建任务并提交到线程池"""
+        job = ActivationJob(uuid.uuid4().hex)
+        with self._cond:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, payload)
+        return job
+
+    def get(self, job_id: str):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def wait_for_update(self, job_id: str, seen: int, timeout: float):
+        """
+        等待任务出现新阶段或结束
+
+        Args:
+            job_id: 任务 ID
+            seen: 调用方已经收到的阶段数
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            dict | None: 任务快照（超时也会返回当前快照），任务不存在返回 None
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            self._cond.wait_for(lambda: job.done or len(job.phases) > seen, timeout=timeout)
+            return job.to_dict()
+
+    def _run(self, job: ActivationJob, payload: dict):
+        def report(phase, **info):
+            with self._cond:
+                job.phase = phase
+                job.phases.append({"phase": phase, "time": time.time(), **info})
+                self._cond.notify_all()
+
+        try:
+            result = self._worker(payload, report)
+        except Exception as e:
+            logger.error(f"激活任务 {job.id} 执行异常: {e}")
+            result = {
+                "success": False,
+                "error_code": "999",
+                "error_message": f"激活任务执行异常: {str(e)}",
+                "username": payload.get('username') if isinstance(payload, dict) else None
+            }
+
+        with self._cond:
+            job.result = result
+            job.done = True
+            job.phase = 'done'
+            job.finished_at = time.time()
+            self._cond.notify_all()
+
+    def _prune(self):
+        """清理过期的已完成任务（调用方需持有锁）"""
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.done and now - job.finished_at > self._ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,133 @@
+"""
+拨号耗时统计
+按拨号阶段记录耗时直方图（分别按接口、按运营商聚合），
+以 Prometheus 文本格式输出，用于评估 VLAN 池规模和定位慢速 BRAS
+
+阶段：
+- lock_wait: 排队等待接口
+- clear_ppp: 清理接口上的旧 pppd
+- set_mac: 修改 MAC
+- link_up: 等待链路恢复
+- pado: pppd 启动到收到 PADO
+- auth: 收到 PADO 到认证通过
+- ipcp: 认证通过到获取 IP
+- teardown: 挂断 pppd
+- total: 整个激活请求
+"""
+
+import threading
+
+# 直方图桶上界（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+
+
+class Histogram:
+    """累积直方图（非线程安全，由 DialMetrics 加锁）"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def render(self, name: str, labels: dict) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(labels, le=_format_float(bound))} {cumulative}')
+        lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {self.count}')
+        lines.append(f'{name}_sum{_labels(labels)} {self.sum:.6f}')
+        lines.append(f'{name}_count{_labels(labels)} {self.count}')
+        return lines
+
+
+class DialMetrics:
+    """拨号指标汇总（线程安全）"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._by_iface = {}   # (phase, iface) -> Histogram
+        self._by_isp = {}     # (phase, isp) -> Histogram
+        self._results = {}    # (iface, isp, result) -> 次数
+
+    def observe_dial(self, iface: str, isp: str, timings: dict, result: str):
+        """
+        记录一次激活的各阶段耗时和结果
+
+        Args:
+            iface: 使用的网卡（未分配到时为 none）
+            isp: 运营商
+            timings: {阶段: 耗时秒数}
+            result: success 或错误码
+        """
+        iface = iface or 'none'
+        isp = isp or 'unknown'
+        with self._lock:
+            for phase, seconds in timings.items():
+                if seconds is None:
+                    continue
+                self._histogram(self._by_iface, (phase, iface)).observe(seconds)
+                self._histogram(self._by_isp, (phase, isp)).observe(seconds)
+            key = (iface, isp, result)
+            self._results[key] = self._results.get(key, 0) + 1
+
+    def render(self, gauges: dict = None, counters: dict = None) -> str:
+        """
+        输出 Prometheus 文本格式
+
+        Args:
+            gauges: 额外输出的瞬时值 {指标名: (说明, 值)}
+            counters: 额外输出的累计值（进程启动后只增不减）{指标名: (说明, 值)}，指标名应以 _total 结尾
+        """
+        lines = []
+        with self._lock:
+            lines.append('# HELP pppoe_dial_phase_seconds Dial phase latency by interface.')
+            lines.append('# TYPE pppoe_dial_phase_seconds histogram')
+            for (phase, iface), hist in sorted(self._by_iface.items()):
+                lines.extend(hist.render('pppoe_dial_phase_seconds', {"phase": phase, "iface": iface}))
+
+            lines.append('# HELP pppoe_dial_isp_phase_seconds Dial phase latency by ISP.')
+            lines.append('# TYPE pppoe_dial_isp_phase_seconds histogram')
+            for (phase, isp), hist in sorted(self._by_isp.items()):
+                lines.extend(hist.render('pppoe_dial_isp_phase_seconds', {"phase": phase, "isp": isp}))
+
+            lines.append('# HELP pppoe_dial_total Finished activations by interface, ISP and result.')
+            lines.append('# TYPE pppoe_dial_total counter')
+            for (iface, isp, result), count in sorted(self._results.items()):
+                lines.append(f'pppoe_dial_total{_labels({"iface": iface, "isp": isp, "result": result})} {count}')
+
+        for metric_type, values in (('gauge', gauges), ('counter', counters)):
+            for name, (help_text, value) in (values or {}).items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _histogram(self, store: dict, key: tuple) -> Histogram:
+        hist = store.get(key)
+        if hist is None:
+            hist = store[key] = Histogram(self._buckets)
+        return hist
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: dict, **extra) -> str:
+    merged = dict(labels, **extra)
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in merged.items()) + '}'
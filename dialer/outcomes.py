@@ -0,0 +1,136 @@
+"""
+拨号结果缓存
+高峰期同一账号常在几秒内重复激活（691 / 账号已登录后反复重试）。
+开启后按 (运营商, 完整账号, 密码摘要) 缓存最近的拨号结果，
+TTL 内的相同请求直接返回缓存结果，不占用接口、不启动 pppd：
+
+- 只缓存成功结果和账号类的确定性失败（默认 691 / 646）
+- 网络类失败（678、630、815、998 等）换个接口或稍后可能成功，不缓存
+- 密码只保存加盐摘要；换了密码的重试不会命中缓存
+- 按最近使用淘汰（LRU），条目数不超过上限
+"""
+
+import collections
+import hashlib
+import os
+import threading
+import time
+
+# 默认缓存的失败错误码（账号或密码错误、账号停用 / 过期 / 已登录等）
+DEFAULT_CACHEABLE_CODES = ('691', '646')
+
+
+def normalize_username(username: str) -> str:
+    """
+    账号规范化，用于缓存和去重的键
+
+    BRAS 账号区分大小写，只去除首尾空白并把 @运营商 后缀统一为小写
+    """
+    name, at, suffix = (username or '').strip().rpartition('@')
+    if not at:
+        return suffix
+    return f"{name}@{suffix.lower()}"
+
+
+class OutcomeCache:
+    """
+    拨号结果缓存（线程安全）
+
+    Args:
+        ttl: 成功结果的缓存时间（秒），0 表示关闭缓存
+        failure_ttl: 失败结果的缓存时间（秒），默认与 ttl 相同
+        max_entries: 最多缓存的账号数
+        cacheable_codes: 可缓存的失败错误码
+    """
+
+    def __init__(self, ttl: float = 0, failure_ttl: float = None, max_entries: int = 4096,
+                 cacheable_codes=DEFAULT_CACHEABLE_CODES):
+        self.ttl = ttl
+        self.failure_ttl = ttl if failure_ttl is None else failure_ttl
+        self.max_entries = max_entries
+        self.cacheable_codes = frozenset(str(code) for code in cacheable_codes)
+        self._salt = os.urandom(16)
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # key -> (过期时间, 写入时间, 结果)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 or self.failure_ttl > 0
+
+    def key(self, isp: str, username: str, password: str) -> tuple:
+        """生成缓存键（密码只参与加盐摘要），缓存关闭时返回 None"""
+        if not self.enabled:
+            return None
+        digest = hashlib.sha256(self._salt + (password or '').encode('utf-8')).hexdigest()
+        return (isp or '', normalize_username(username), digest)
+
+    def get(self, key: tuple):
+        """
+        查询缓存
+
+        Returns:
+            dict | None: 缓存的结果（副本，带 cached / cached_age 字段），未命中或已过期返回 None
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            _, stored_at, result = entry
+        cached = dict(result)
+        cached["cached"] = True
+        cached["cached_age"] = round(now - stored_at, 1)
+        return cached
+
+    def put(self, key: tuple, result: dict) -> bool:
+        """
+        记录一次拨号结果（不可缓存的结果会清除该账号的旧缓存）
+
+        Returns:
+            bool: 是否写入缓存
+        """
+        if not self.enabled:
+            return False
+        if result.get("success"):
+            ttl = self.ttl
+        elif str(result.get("error_code")) in self.cacheable_codes:
+            ttl = self.failure_ttl
+        else:
+            ttl = 0
+
+        now = time.monotonic()
+        with self._lock:
+            if ttl <= 0:
+                self._entries.pop(key, None)
+                return False
+            self._entries[key] = (now + ttl, now, dict(result))
+            self._entries.move_to_end(key)
+            # 顺带清理最久未使用的过期条目，再按上限淘汰
+            while self._entries:
+                oldest_key, (expires_at, _, _) = next(iter(self._entries.items()))
+                if expires_at > now and len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[oldest_key]
+        return True
+
+    def evict(self, key: tuple) -> bool:
+        """删除单个账号的缓存"""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
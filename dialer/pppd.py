@@ -0,0 +1,126 @@
+"""
+pppd 拨号后端
+通过 pppd + rp-pppoe 插件真实拨号：按 PID 清理旧会话、netlink 修改 MAC、
+增量跟踪 pppd 日志等待 IP，失败时根据日志判断错误类型
+"""
+
+import logging
+import os
+import subprocess
+import time
+
+from network import iface_exists, set_mac_address, delete_iface, wait_for_link_up, wait_for_link_gone
+
+from .backend import DialAttempt, DialerBackend
+from .readiness import PppLogWatcher
+
+logger = logging.getLogger(__name__)
+
+
+class PppdBackend(DialerBackend):
+    """
+    pppd 拨号后端
+
+    Args:
+        scheduler: DialScheduler
+        session_registry: SessionRegistry（按 PID 登记和终止 pppd）
+        log_dir: pppd 日志目录
+        classifier: 错误分类器（PppErrorClassifier），等待 IP 时流式分类日志
+        pppd_command: pppd 命令（列表），压测时可替换为模拟程序
+        pppd_exit_timeout: 清理旧 pppd 时每个阶段的最长等待（秒）
+        link_up_timeout: 修改 MAC 后等待链路恢复的最长时间（秒）
+        ppp_cleanup_timeout: 拨号失败后删除残留 ppp 接口，等待其从内核消失的最长时间（秒）
+    """
+
+    name = 'pppd'
+
+    def __init__(self, scheduler, session_registry, log_dir: str, classifier,
+                 pppd_command=None, pppd_exit_timeout: float = 0.5, link_up_timeout: float = 1.0,
+                 ppp_cleanup_timeout: float = 0.5):
+        super().__init__(scheduler)
+        self.session_registry = session_registry
+        self.log_dir = log_dir
+        self.classifier = classifier
+        self.pppd_command = list(pppd_command or ['pppd'])
+        self.pppd_exit_timeout = pppd_exit_timeout
+        self.link_up_timeout = link_up_timeout
+        self.ppp_cleanup_timeout = ppp_cleanup_timeout
+
+    def check_interface(self, iface: str):
+        if not iface_exists(iface):
+            raise RuntimeError(
+                f"网络接口不存在: {iface}，请重新初始化配置（http://192.168.0.112:9999）"
+            )
+        logger.info(f"网络接口存在性校验通过: {iface}")
+
+    def prepare_link(self, iface: str, mac: str, timings: dict) -> bool:
+        # 清理该网卡上登记的旧 pppd（按 PID 定向终止，不用 pkill 扫描进程表）
+        started = time.monotonic()
+        if not self.session_registry.hangup_iface(iface, self.pppd_exit_timeout, self.pppd_exit_timeout):
+            logger.warning(f"接口 {iface} 的 pppd 进程未能退出")
+        timings["clear_ppp"] = time.monotonic() - started
+
+        started = time.monotonic()
+        mac_ok = set_mac_address(iface, mac)
+        timings["set_mac"] = time.monotonic() - started
+        if not mac_ok:
+            return False
+
+        # 等待 MAC 生效后链路重新 UP（某些网卡需要 100-300ms），超时也继续拨号
+        started = time.monotonic()
+        link_up = wait_for_link_up(iface, self.link_up_timeout)
+        if not link_up:
+            logger.warning(f"接口 {iface} 在 {self.link_up_timeout} 秒内未恢复 carrier，继续拨号")
+        timings["link_up"] = time.monotonic() - started
+        self.report_carrier(iface, link_up)
+        return True
+
+    def dial(self, iface: str, username: str, password: str) -> DialAttempt:
+        log_file = os.path.join(self.log_dir, f"pppoe_{int(time.time())}_{iface}.log")
+        open(log_file, 'w').close()
+
+        ppp_cmd = self.pppd_command + [
+            'plugin', 'rp-pppoe.so', iface,
+            'user', username,
+            'password', password,
+            'mtu', '1492', 'mru', '1492',
+            'noauth',
+            'usepeerdns',
+            'nodetach',
+            'logfile', log_file,
+            'debug'
+        ]
+        proc = subprocess.Popen(ppp_cmd)
+        attempt = DialAttempt(iface, username, log_file)
+        attempt.session = self.session_registry.register(iface, proc, log_file)
+        return attempt
+
+    def await_ip(self, attempt: DialAttempt, timeout: float, on_phase=None):
+        # 增量跟踪日志，IPCP 完成即返回；出现终止性错误或 pppd 退出时提前返回
+        with PppLogWatcher(attempt.log_file, on_phase=on_phase, classifier=self.classifier) as watcher:
+            attempt.watcher = watcher
+            ip = watcher.wait_for_ip(timeout, proc=attempt.session.proc)
+            attempt.ppp_interface = watcher.ppp_interface
+            attempt.session.ppp_interface = watcher.ppp_interface
+            attempt.abort_reason = watcher.abort_reason
+        if attempt.abort_reason:
+            logger.info(f"接口 {attempt.iface} 拨号提前结束（{attempt.abort_reason}），"
+                        f"耗时 {time.monotonic() - attempt.started:.2f} 秒")
+        return ip
+
+    def hangup(self, attempt: DialAttempt, failed: bool = False):
+        # 按 PID 终止 pppd 进程（SIGTERM，超时后 SIGKILL）
+        self.session_registry.hangup(attempt.session)
+
+        # 异常情况下尝试删除 ppp 接口（避免内核残留）
+        if failed and attempt.ppp_interface:
+            logger.info(f"异常情况下尝试删除 ppp 接口: {attempt.ppp_interface}")
+            delete_iface(attempt.ppp_interface)
+            if not wait_for_link_gone(attempt.ppp_interface, self.ppp_cleanup_timeout):
+                logger.warning(f"ppp 接口 {attempt.ppp_interface} 在 {self.ppp_cleanup_timeout} 秒内未消失")
+
+    def diagnose(self, attempt: DialAttempt):
+        # 只需分类挂断后新增的日志（如 "Connection terminated"），不重读整个文件
+        if attempt.watcher is not None:
+            return attempt.watcher.finish()
+        return self.classifier.classify_file(attempt.log_file)
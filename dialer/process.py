@@ -0,0 +1,79 @@
+"""
+pppd 进程查找与等待
+直接扫描 /proc 判断与接口关联的 pppd 是否存在、是否已退出，
+用于替代"pkill 之后固定 sleep"的做法
+"""
+
+import os
+import re
+import time
+
+# 等待进程退出时的检查间隔（秒）
+CHECK_INTERVAL = 0.01
+
+
+def _pppd_pattern(iface: str = None):
+    # 与原 pkill -f 'pppd.*rp-pppoe.so <iface>' 等价，但要求接口名完整匹配，
+    # 避免 enp7s0.200 误匹配 enp7s0.2001；iface 为 None 时匹配任意接口
+    if iface is None:
+        return re.compile(r'pppd.*rp-pppoe\.so \S+')
+    return re.compile(rf'pppd.*rp-pppoe\.so {re.escape(iface)}(\s|$)')
+
+
+def read_cmdline(pid: int):
+    """读取进程命令行（参数以空格连接），进程不存在时返回 None"""
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            raw = f.read()
+    except OSError:
+        return None
+    return raw.replace(b'\0', b' ').decode('utf-8', errors='replace').strip()
+
+
+def find_pppd_pids(iface: str = None) -> list:
+    """
+    查找与指定接口关联的 pppd 进程（iface 为 None 时查找所有 rp-pppoe 拨号进程）
+
+    Returns:
+        list: PID 列表
+    """
+    pattern = _pppd_pattern(iface)
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        cmdline = read_cmdline(int(entry))
+        if cmdline and pattern.search(cmdline):
+            pids.append(int(entry))
+    return pids
+
+
+def pid_alive(pid: int) -> bool:
+    """进程是否仍存在（僵尸进程视为已退出）"""
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+    except OSError:
+        return False
+    # 第三个字段为进程状态，comm 可能含空格，从最后一个 ')' 之后解析
+    state = stat[stat.rfind(b')') + 2:stat.rfind(b')') + 3]
+    return state not in (b'Z', b'X')
+
+
+def wait_for_exit(pids, timeout: float) -> list:
+    """
+    等待进程全部退出
+
+    Args:
+        pids: PID 列表
+        timeout: 最长等待时间（秒）
+
+    Returns:
+        list: 超时后仍存活的 PID
+    """
+    deadline = time.monotonic() + timeout
+    alive = [pid for pid in pids if pid_alive(pid)]
+    while alive and time.monotonic() < deadline:
+        time.sleep(CHECK_INTERVAL)
+        alive = [pid for pid in alive if pid_alive(pid)]
+    return alive
@@ -0,0 +1,275 @@
+"""
+pppd 就绪检测
+增量跟踪 pppd 日志文件，在 IPCP 完成的瞬间获知分配到的 IP 地址
+
+原实现每秒全量重读一次日志并正则匹配 "Using interface pppX"，
+再调用 ip addr show 查询地址，成功拨号平均多等待约 0.5 秒。
+这里改为：
+- 只读取日志新增的字节（记录偏移量），避免 O(n²) 的重复读取
+- 通过 inotify 在日志写入时立即唤醒（不可用时退化为 50ms 短轮询）
+- 直接从 pppd 日志 "local  IP address x.x.x.x" 行获取 IP，无需再 fork ip 命令
+- 可同时把新增日志交给错误分类器（dialer.classifier），拨号失败时无需重读日志
+- 日志出现终止性错误（认证失败、PADO 超时等）或 pppd 退出时立即结束等待，
+  不再空等到超时
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import re
+import select
+import time
+
+logger = logging.getLogger(__name__)
+
+# 日志特征
+USING_IFACE_RE = re.compile(r'Using interface (ppp\d+)')
+LOCAL_IP_RE = re.compile(r'local\s+IP address (\d+\.\d+\.\d+\.\d+)')
+PADO_RE = re.compile(r'Recv PPPOE Discovery .*PADO')
+AUTH_OK_RE = re.compile(r'(PAP|CHAP) authentication succeeded')
+
+# inotify 常量（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# inotify 不可用时的轮询间隔（秒）
+POLL_INTERVAL = 0.05
+
+# 无法通过 pidfd 监听 pppd 退出时，检查进程状态的最长间隔（秒）
+PROC_CHECK_INTERVAL = 0.2
+
+
+class _Inotify:
+    """基于 ctypes 的最小 inotify 封装（仅用于监听单个文件的写入事件）"""
+
+    _libc = None
+
+    def __init__(self, path: str):
+        if _Inotify._libc is None:
+            _Inotify._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc = _Inotify._libc
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(path), IN_MODIFY | IN_CLOSE_WRITE)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch 失败: {path}")
+
+    def wait(self, timeout: float, extra_fds=()) -> bool:
+        """
+        等待文件写入事件
+
+        Args:
+            timeout: 最长等待时间（秒）
+            extra_fds: 同时等待的其他文件描述符（如 pidfd）
+
+        Returns:
+            bool: 超时前是否收到事件
+        """
+        readable, _, _ = select.select([self.fd, *extra_fds], [], [], max(timeout, 0))
+        if not readable:
+            return False
+        if self.fd not in readable:
+            return True
+        # 读空事件队列，事件内容本身不需要
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+def _open_pidfd(proc):
+    """为子进程打开 pidfd（进程退出时可读），不支持时返回 None"""
+    if proc is None or not hasattr(os, 'pidfd_open'):
+        return None
+    try:
+        return os.pidfd_open(proc.pid)
+    except OSError:
+        # 内核不支持或进程已被回收，退化为定时检查
+        return None
+
+
+class PppLogWatcher:
+    """
+    pppd 日志增量跟踪器
+
+    Attributes:
+        log_file: pppd 日志文件路径
+        ppp_interface: 日志中出现的 ppp 接口名（如 ppp0），未出现时为 None
+        local_ip: IPCP 协商得到的本端 IP，未获取时为 None
+        phases: 已经历的拨号阶段（pado / auth / ip）
+        errors: 错误分类状态（ClassifierStream），未提供分类器时为 None
+        abort_reason: 提前结束等待的原因（'error:<规则名>' 或 'exited'），
+            获取到 IP 或超时时为 None
+    """
+
+    def __init__(self, log_file: str, on_phase=None, classifier=None):
+        """
+        Args:
+            log_file: pppd 日志文件路径
+            on_phase: 阶段回调 on_phase(phase, **info)，每个阶段只触发一次
+            classifier: 错误分类器（PppErrorClassifier），新增日志同时交给它分类
+        """
+        self.log_file = log_file
+        self.ppp_interface = None
+        self.local_ip = None
+        self.phases = []
+        self.errors = classifier.stream() if classifier else None
+        self.abort_reason = None
+        self._on_phase = on_phase
+        self._offset = 0
+        self._partial = ''
+        self._notifier = None
+
+        try:
+            self._notifier = _Inotify(log_file)
+        except (OSError, AttributeError) as e:
+            # 非 Linux 或文件尚不存在，退化为短间隔轮询
+            logger.warning(f"inotify 不可用，使用轮询方式跟踪日志: {e}")
+
+    def poll(self) -> list:
+        """
+        读取日志自上次读取以来新增的完整行，并更新解析状态
+
+        Returns:
+            list: 新增的日志行
+        """
+        try:
+            with open(self.log_file, 'r', encoding='utf-8', errors='replace') as f:
+                f.seek(self._offset)
+                chunk = f.read()
+                self._offset = f.tell()
+        except OSError:
+            return []
+
+        if not chunk:
+            return []
+
+        data = self._partial + chunk
+        lines = data.split('\n')
+        # 最后一段可能是尚未写完的半行，留到下次拼接
+        self._partial = lines.pop()
+
+        for line in lines:
+            self._handle_line(line)
+        if self.errors is not None and lines:
+            self.errors.feed('\n'.join(lines))
+        return lines
+
+    def finish(self):
+        """
+        读取剩余日志（包括没有换行符的最后一行）并返回错误分类结果
+
+        Returns:
+            (错误码, 错误信息)，未提供分类器时返回 None
+        """
+        self.poll()
+        if self._partial:
+            self._handle_line(self._partial)
+            if self.errors is not None:
+                self.errors.feed(self._partial)
+            self._partial = ''
+        return self.errors.result() if self.errors is not None else None
+
+    def _handle_line(self, line: str):
+        if 'pado' not in self.phases and PADO_RE.search(line):
+            self._enter_phase('pado')
+            return
+        if self.ppp_interface is None:
+            match = USING_IFACE_RE.search(line)
+            if match:
+                self.ppp_interface = match.group(1)
+                return
+        if 'auth' not in self.phases:
+            match = AUTH_OK_RE.search(line)
+            if match:
+                self._enter_phase('auth', method=match.group(1))
+                return
+        if self.local_ip is None:
+            match = LOCAL_IP_RE.search(line)
+            if match:
+                self.local_ip = match.group(1)
+                self._enter_phase('ip', ip=self.local_ip, ppp_interface=self.ppp_interface)
+
+    def _enter_phase(self, phase: str, **info):
+        self.phases.append(phase)
+        if self._on_phase:
+            try:
+                self._on_phase(phase, **info)
+            except Exception as e:
+                logger.warning(f"阶段回调执行失败 ({phase}): {e}")
+
+    def wait_for_ip(self, timeout: float, proc=None):
+        """
+        等待 pppd 完成 IPCP 协商
+
+        出现终止性错误（需提供分类器）或 pppd 进程退出时提前返回，
+        原因记录在 abort_reason 中
+
+        Args:
+            timeout: 最长等待时间（秒）
+            proc: pppd 进程（subprocess.Popen），用于感知进程退出
+
+        Returns:
+            str | None: 获取到的 IP，失败或超时返回 None
+        """
+        deadline = time.monotonic() + timeout
+        pidfd = _open_pidfd(proc)
+        try:
+            while True:
+                self.poll()
+                if self.local_ip:
+                    return self.local_ip
+
+                rule = self.errors.terminal() if self.errors is not None else None
+                if rule is not None:
+                    self.abort_reason = f"error:{rule.name}"
+                    return None
+
+                if proc is not None and proc.poll() is not None:
+                    # 进程已退出：读完剩余日志后结束
+                    self.poll()
+                    if self.local_ip:
+                        return self.local_ip
+                    self.abort_reason = 'exited'
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+
+                if self._notifier:
+                    if proc is not None and pidfd is None:
+                        remaining = min(remaining, PROC_CHECK_INTERVAL)
+                    self._notifier.wait(remaining, () if pidfd is None else (pidfd,))
+                else:
+                    time.sleep(min(POLL_INTERVAL, remaining))
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+
+    def close(self):
+        if self._notifier:
+            self._notifier.close()
+            self._notifier = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,172 @@
+"""
+拨号通道调度器
+激活请求按先来先服务排队，依次分配下一个空闲接口，
+取代"所有接口都忙就直接返回 998"的做法，避免用户盲目重试造成的惊群
+
+接口仍以 flock 文件锁作为占用凭证（"锁即资源"），
+因此与其他进程之间的互斥语义保持不变；
+启用健康度跟踪（InterfaceHealth）时按最久未使用 × 健康度的顺序尝试加锁，否则按配置顺序
+"""
+
+import collections
+import fcntl
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 队首等待期间重新尝试加锁的间隔（秒），用于感知其他进程释放的文件锁
+RETRY_INTERVAL = 0.2
+
+# 尚无统计数据时，假定每次占用接口的时长（秒）
+DEFAULT_HOLD_SECONDS = 2.0
+
+
+class QueueFull(Exception):
+    """排队人数已达上限"""
+    pass
+
+
+class QueueTimeout(Exception):
+    """排队等待超时"""
+    pass
+
+
+class DialScheduler:
+    """
+    公平 FIFO 接口调度器
+
+    Args:
+        lock_dir: 接口锁文件目录
+        max_queue: 最大排队人数（超过时立即拒绝）
+        queue_timeout: 单个请求最长排队时间（秒）
+        health: 接口健康度跟踪（InterfaceHealth），None 时按配置顺序选择接口
+    """
+
+    def __init__(self, lock_dir: str, max_queue: int = 100, queue_timeout: float = 60, health=None):
+        self.lock_dir = lock_dir
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.health = health
+        self._cond = threading.Condition()
+        self._waiters = collections.deque()
+        self._busy = {}  # iface -> 获取时间
+        self._pool_size = 0
+        self._avg_hold = DEFAULT_HOLD_SECONDS
+
+    def acquire(self, iface_list: list, timeout: float = None):
+        """
+        排队获取一个空闲接口
+
+        只有队首请求可以尝试加锁，保证先到先得；
+        获取成功后调用方必须调用 release() 归还
+
+        Args:
+            iface_list: 可用接口列表
+            timeout: 最长排队时间（秒），默认使用 queue_timeout
+
+        Returns:
+            (iface, lock_fd): 接口名和锁文件对象
+
+        Raises:
+            QueueFull: 排队人数已满
+            QueueTimeout: 排队超时
+        """
+        if timeout is None:
+            timeout = self.queue_timeout
+        deadline = time.monotonic() + timeout
+        ticket = object()
+
+        with self._cond:
+            self._pool_size = len(iface_list)
+            if len(self._waiters) >= self.max_queue:
+                raise QueueFull(f"排队人数已达上限 {self.max_queue}")
+            self._waiters.append(ticket)
+
+            try:
+                while True:
+                    if self._waiters[0] is ticket:
+                        iface, lock_fd = self._try_lock(iface_list)
+                        if iface:
+                            self._waiters.popleft()
+                            self._busy[iface] = time.monotonic()
+                            if self.health is not None:
+                                self.health.mark_used(iface)
+                            return iface, lock_fd
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise QueueTimeout(f"排队超过 {timeout} 秒仍无可用拨号通道")
+                    self._cond.wait(min(remaining, RETRY_INTERVAL))
+            finally:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                # 队首变化，唤醒其他等待者
+                self._cond.notify_all()
+
+    def release(self, iface: str, lock_fd):
+        """归还接口并唤醒排队中的请求"""
+        try:
+            fcntl.flock(lock_fd.fileno(), fcntl.LOCK_UN)
+        finally:
+            lock_fd.close()
+            with self._cond:
+                acquired_at = self._busy.pop(iface, None)
+                if acquired_at is not None:
+                    # 指数滑动平均，用于估算排队等待时间
+                    held = time.monotonic() - acquired_at
+                    self._avg_hold = 0.8 * self._avg_hold + 0.2 * held
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """
+        获取调度器状态
+
+        Returns:
+            dict: queue_depth 排队人数、busy 占用中的接口、quarantined 隔离中的接口、
+                estimated_wait 新请求预计等待秒数
+        """
+        quarantined = self.health.quarantined() if self.health is not None else []
+        with self._cond:
+            depth = len(self._waiters)
+            return {
+                "queue_depth": depth,
+                "max_queue": self.max_queue,
+                "busy": sorted(self._busy),
+                "quarantined": quarantined,
+                "pool_size": self._pool_size,
+                "avg_hold_seconds": round(self._avg_hold, 3),
+                "estimated_wait": self._estimate_wait(depth)
+            }
+
+    def _estimate_wait(self, position: int) -> float:
+        if self._pool_size <= 0:
+            return 0.0
+        if position == 0 and len(self._busy) < self._pool_size:
+            return 0.0
+        return round((position + 1) * self._avg_hold / self._pool_size, 1)
+
+    def _try_lock(self, iface_list: list):
+        """按选择顺序尝试对空闲接口加非阻塞锁（调用方需持有 _cond）"""
+        if self.health is not None:
+            iface_list = self.health.order(iface_list)
+        for iface in iface_list:
+            if iface in self._busy:
+                continue
+            lock_path = os.path.join(self.lock_dir, f'{iface}.lock')
+            fd = None
+            try:
+                fd = open(lock_path, 'w')
+                fcntl.flock(fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                logger.info(f"成功抢占接口 {iface}")
+                return iface, fd
+            except BlockingIOError:
+                # 被其他进程占用
+                fd.close()
+            except Exception as e:
+                logger.warning(f"获取接口 {iface} 锁失败: {e}")
+                if fd:
+                    fd.close()
+        return None, None
@@ -0,0 +1,155 @@
+"""
+pppd 会话登记表
+在 subprocess.Popen 启动 pppd 时登记 PID、接口、启动时间、ppp 接口名和日志路径，
+清理时按 PID 定向发送信号，不再每次用 pkill -f 扫描整个进程表
+
+进程重启后内存中的登记表会丢失，启动时通过 reap_orphans() 扫描 /proc
+清理上次崩溃遗留的 pppd 进程
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+
+from .process import find_pppd_pids, pid_alive, wait_for_exit
+
+logger = logging.getLogger(__name__)
+
+
+class PppSession:
+    """
+    单个 pppd 会话
+
+    Attributes:
+        iface: 拨号使用的网卡（如 enp3s0.100）
+        pid: pppd 进程 PID
+        started_at: 启动时间（time.time()）
+        log_file: pppd 日志路径
+        ppp_interface: 协商出的 ppp 接口名（如 ppp0），未知时为 None
+    """
+
+    def __init__(self, iface: str, proc, log_file: str = None):
+        self.iface = iface
+        self.pid = proc.pid
+        self.proc = proc
+        self.started_at = time.time()
+        self.log_file = log_file
+        self.ppp_interface = None
+
+    def to_dict(self) -> dict:
+        return {
+            "iface": self.iface,
+            "pid": self.pid,
+            "started_at": self.started_at,
+            "log_file": self.log_file,
+            "ppp_interface": self.ppp_interface
+        }
+
+
+class SessionRegistry:
+    """pppd 会话登记表（线程安全）"""
+
+    def __init__(self):
+        self._sessions = {}  # pid -> PppSession
+        self._lock = threading.Lock()
+
+    def register(self, iface: str, proc, log_file: str = None) -> PppSession:
+        """登记新启动的 pppd 进程"""
+        session = PppSession(iface, proc, log_file)
+        with self._lock:
+            self._sessions[session.pid] = session
+        return session
+
+    def for_iface(self, iface: str) -> list:
+        """获取指定网卡上登记的会话"""
+        with self._lock:
+            return [s for s in self._sessions.values() if s.iface == iface]
+
+    def sessions(self) -> list:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def hangup(self, session: PppSession, graceful_timeout: float = 3, kill_timeout: float = 2) -> bool:
+        """
+        按 PID 终止会话：先 SIGTERM，超时后 SIGKILL
+
+        Returns:
+            bool: 进程是否已退出
+        """
+        exited = True
+        if self._is_running(session):
+            _send_signal(session.pid, signal.SIGTERM)
+            if not self._wait(session, graceful_timeout):
+                logger.warning(f"pppd 进程 (PID: {session.pid}) 未响应 SIGTERM，强制终止")
+                _send_signal(session.pid, signal.SIGKILL)
+                exited = self._wait(session, kill_timeout)
+                if not exited:
+                    logger.error(f"无法终止 pppd 进程 (PID: {session.pid})")
+
+        with self._lock:
+            if exited:
+                self._sessions.pop(session.pid, None)
+        return exited
+
+    def hangup_iface(self, iface: str, graceful_timeout: float, kill_timeout: float) -> bool:
+        """
+        终止指定网卡上登记的全部会话
+
+        Returns:
+            bool: 是否全部退出
+        """
+        results = [self.hangup(session, graceful_timeout, kill_timeout)
+                   for session in self.for_iface(iface)]
+        return all(results)
+
+    def reap_orphans(self, timeout: float = 2) -> list:
+        """
+        对照 /proc 清理未登记的 pppd 拨号进程（服务崩溃或重启后遗留的会话）
+
+        Returns:
+            list: 被清理的 PID
+        """
+        with self._lock:
+            known = set(self._sessions)
+        orphans = [pid for pid in find_pppd_pids() if pid not in known]
+        if not orphans:
+            return []
+
+        logger.warning(f"发现遗留的 pppd 进程，正在清理: {orphans}")
+        for pid in orphans:
+            _send_signal(pid, signal.SIGTERM)
+        alive = wait_for_exit(orphans, timeout)
+        for pid in alive:
+            _send_signal(pid, signal.SIGKILL)
+        alive = wait_for_exit(alive, timeout)
+        if alive:
+            logger.error(f"无法清理遗留的 pppd 进程: {alive}")
+        return orphans
+
+    def _is_running(self, session: PppSession) -> bool:
+        if session.proc is not None:
+            return session.proc.poll() is None
+        return pid_alive(session.pid)
+
+    def _wait(self, session: PppSession, timeout: float) -> bool:
+        if session.proc is not None:
+            try:
+                session.proc.wait(timeout=timeout)
+                return True
+            except subprocess.TimeoutExpired:
+                return False
+        return not wait_for_exit([session.pid], timeout)
+
+
+def _send_signal(pid: int, sig):
+    """向进程发送信号，权限不足时（pppd 以 root 运行）通过 sudo kill 发送"""
+    try:
+        os.kill(pid, sig)
+    except ProcessLookupError:
+        pass
+    except PermissionError:
+        subprocess.run(['sudo', 'kill', f'-{int(sig)}', str(pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
@@ -0,0 +1,210 @@
+"""
+模拟拨号后端
+不启动 pppd、不修改网卡，各阶段按配置的耗时分布 sleep，按比例返回失败，
+用于在没有 BRAS 的环境下测量 Web / 排队 / 数据库层的吞吐上限。
+
+耗时分布写法（单位毫秒）：
+    const:50             固定 50ms
+    uniform:20,80        20~80ms 均匀分布
+    normal:50,15         均值 50ms、标准差 15ms 的正态分布（负值截断为 0）
+    lognormal:50,0.5     中位数 50ms、对数标准差 0.5 的对数正态分布（长尾）
+
+失败比例写法与 bench/fake_pppd.py 相同：'691:0.05,678:0.02'
+"""
+
+import logging
+import math
+import random
+import time
+
+from .backend import DialAttempt, DialerBackend
+from .classifier import PppErrorClassifier
+
+logger = logging.getLogger(__name__)
+
+# 各错误码对应的失败阶段和 pppd 日志（与 bench/fake_pppd.py 一致，由错误分类器得出提示信息）
+SIMULATED_FAILURES = {
+    '678': ('pado', ['Timeout waiting for PADO packets', 'Unable to complete PPPoE Discovery phase 1']),
+    '734': ('auth', ['LCP terminated by peer', 'Connection terminated.']),
+    '691': ('auth', ['rcvd [PAP AuthNak id=0x1 "Authentication failure: password incorrect"]',
+                     'PAP authentication failed', 'Modem hangup', 'Connection terminated.']),
+    '646': ('auth', ['rcvd [CHAP AuthNak id=0x1 "Authentication failure: password incorrect"]',
+                     'CHAP authentication failed', 'Modem hangup', 'Connection terminated.']),
+    '815': ('ipcp', ['sent [IPCP ConfReq id=0x1 <addr 0.0.0.0>]'])
+}
+
+# 各阶段默认耗时分布
+DEFAULT_TIMINGS = {
+    'prepare': 'const:5',
+    'pado': 'normal:50,15',
+    'auth': 'normal:80,20',
+    'ipcp': 'normal:120,30',
+    'hangup': 'const:5'
+}
+
+
+def parse_distribution(spec: str, rng=random):
+    """
+    解析耗时分布
+
+    Args:
+        spec: 分布描述，如 'normal:50,15'（毫秒）；只写数字时视为固定值
+        rng: 随机数生成器
+
+    Returns:
+        callable: 每次调用返回一个耗时样本（秒）
+
+    Raises:
+        ValueError: 分布描述无效
+    """
+    kind, _, params = str(spec).strip().partition(':')
+    if not params:
+        kind, params = 'const', kind
+    try:
+        values = [float(v) for v in params.split(',')]
+    except ValueError:
+        raise ValueError(f"耗时分布参数无效: {spec}")
+
+    if kind == 'const' and len(values) == 1:
+        value = max(0.0, values[0]) / 1000
+        return lambda: value
+    if kind == 'uniform' and len(values) == 2:
+        low, high = values
+        return lambda: max(0.0, rng.uniform(low, high)) / 1000
+    if kind == 'normal' and len(values) == 2:
+        mu, sigma = values
+        return lambda: max(0.0, rng.gauss(mu, sigma)) / 1000
+    if kind == 'lognormal' and len(values) == 2:
+        median, sigma = values
+        if median <= 0:
+            raise ValueError(f"对数正态分布的中位数必须大于 0: {spec}")
+        mu = math.log(median)
+        return lambda: rng.lognormvariate(mu, sigma) / 1000
+    raise ValueError(f"不支持的耗时分布: {spec}（支持 const / uniform / normal / lognormal）")
+
+
+def parse_failures(spec: str) -> list:
+    """
+    解析失败比例
+
+    Args:
+        spec: 如 '691:0.05,678:0.02'
+
+    Returns:
+        list: [(错误码, 比例), ...]
+
+    Raises:
+        ValueError: 错误码不支持或比例之和超过 1
+    """
+    failures = []
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        code, _, ratio = part.partition(':')
+        if code not in SIMULATED_FAILURES:
+            raise ValueError(f"不支持的错误码: {code}（支持 {', '.join(SIMULATED_FAILURES)}）")
+        failures.append((code, float(ratio or 0)))
+    if sum(ratio for _, ratio in failures) > 1:
+        raise ValueError(f"失败比例之和超过 1: {spec}")
+    return failures
+
+
+class SimulatedBackend(DialerBackend):
+    """
+    进程内模拟拨号后端
+
+    接口仍通过 DialScheduler 排队和加锁，其余步骤只按分布 sleep，
+    因此测得的是除 BRAS 协商以外整条链路（Flask、排队、锁、日志写库）的开销
+
+    Args:
+        scheduler: DialScheduler
+        timings: 各阶段耗时分布 {'prepare' | 'pado' | 'auth' | 'ipcp' | 'hangup': spec}，
+            未给出的阶段使用 DEFAULT_TIMINGS
+        failures: 失败比例描述（见 parse_failures）
+        seed: 随机种子（便于复现）
+        classifier: 错误分类器（默认使用内置规则）
+    """
+
+    name = 'simulated'
+
+    def __init__(self, scheduler, timings: dict = None, failures: str = '', seed=None, classifier=None):
+        super().__init__(scheduler)
+        self.classifier = classifier or PppErrorClassifier()
+        self.rng = random.Random(seed)
+        specs = dict(DEFAULT_TIMINGS)
+        specs.update({k: v for k, v in (timings or {}).items() if v})
+        unknown = set(specs) - set(DEFAULT_TIMINGS)
+        if unknown:
+            raise ValueError(f"未知的拨号阶段: {', '.join(sorted(unknown))}")
+        self._samplers = {phase: parse_distribution(spec, self.rng) for phase, spec in specs.items()}
+        self.failures = parse_failures(failures)
+        logger.info(f"模拟拨号后端: 耗时分布 {specs}，失败比例 {self.failures or '无'}")
+
+    def _sleep(self, phase: str):
+        time.sleep(self._samplers[phase]())
+
+    def _choose_outcome(self) -> str:
+        roll = self.rng.random()
+        for code, ratio in self.failures:
+            if roll < ratio:
+                return code
+            roll -= ratio
+        return 'ok'
+
+    def check_interface(self, iface: str):
+        pass
+
+    def prepare_link(self, iface: str, mac: str, timings: dict) -> bool:
+        started = time.monotonic()
+        self._sleep('prepare')
+        timings["clear_ppp"] = 0.0
+        timings["set_mac"] = time.monotonic() - started
+        timings["link_up"] = 0.0
+        return True
+
+    def dial(self, iface: str, username: str, password: str) -> DialAttempt:
+        attempt = DialAttempt(iface, username)
+        attempt.outcome = self._choose_outcome()
+        return attempt
+
+    def await_ip(self, attempt: DialAttempt, timeout: float, on_phase=None):
+        deadline = attempt.started + timeout
+        failed_phase = SIMULATED_FAILURES.get(attempt.outcome, (None,))[0]
+
+        def phase(name: str, **info) -> bool:
+            # 模拟协商阶段；超过总超时返回 False，失败阶段与 pppd 后端一样立即结束
+            self._sleep(name)
+            if time.monotonic() > deadline:
+                return False
+            if failed_phase == name:
+                attempt.abort_reason = 'simulated'
+                return False
+            if on_phase and name != 'ipcp':
+                on_phase(name, **info)
+            return True
+
+        if not phase('pado'):
+            return None
+        attempt.ppp_interface = 'ppp0'
+        if not phase('auth', method='PAP'):
+            return None
+        if failed_phase == 'ipcp':
+            # IPCP 无响应：与真实 pppd 一样等到超时
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            return None
+        if not phase('ipcp'):
+            return None
+
+        ip = f"10.{self.rng.randint(16, 31)}.{self.rng.randint(0, 255)}.{self.rng.randint(1, 254)}"
+        if on_phase:
+            on_phase('ip', ip=ip, ppp_interface=attempt.ppp_interface)
+        return ip
+
+    def hangup(self, attempt: DialAttempt, failed: bool = False):
+        self._sleep('hangup')
+
+    def diagnose(self, attempt: DialAttempt):
+        # 抽中成功但超时未拿到 IP 时按 IPCP 无响应处理
+        lines = SIMULATED_FAILURES.get(attempt.outcome, SIMULATED_FAILURES['815'])[1]
+        return self.classifier.classify_lines(lines)
@@ -0,0 +1,134 @@
+"""
+同账号并发请求合并（single-flight）
+同一账号同时发起多次激活时（如 test_concurrent_vlan.py 对同一学号并发 50 次），
+每个请求各占一个接口拨号，BRAS 只会让第一个通过，其余全部返回 "concurrency" AuthNak。
+
+这里按规范化后的完整账号合并：
+- 第一个请求负责拨号，密码相同的并发请求挂在它上面，拿到同一个结果
+- 拨号进度（阶段回调）同步转发给所有挂靠的请求，已经过的阶段在挂靠时补发
+- 密码不同的请求不共享结果（避免错误密码拿到成功结果），而是等当前拨号结束后再自行拨号
+"""
+
+import hashlib
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """一次进行中的拨号"""
+
+    def __init__(self, digest: str, report):
+        self.digest = digest
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.phases = []
+        self.followers = 0
+        # 订阅者为 [回调, 已投递的阶段数]
+        self._subscribers = [[report, 0]] if report else []
+        # _lock 保护 phases / _subscribers；_notify_lock 串行投递，保证每个回调按顺序、恰好一次收到每个阶段
+        self._lock = threading.Lock()
+        self._notify_lock = threading.Lock()
+
+    def publish(self, phase: str, info: dict):
+        """记录一个拨号阶段并转发给所有订阅者"""
+        with self._lock:
+            self.phases.append((phase, info))
+        self._deliver()
+
+    def subscribe(self, report):
+        """挂靠的请求订阅阶段回调，已经过的阶段立即补发"""
+        with self._lock:
+            self._subscribers.append([report, 0])
+        self._deliver()
+
+    def _deliver(self):
+        # 回调在锁外执行：回调较慢或再次访问 SingleFlight 时不阻塞其他账号
+        with self._notify_lock:
+            with self._lock:
+                phases = list(self.phases)
+                subscribers = list(self._subscribers)
+            for subscriber in subscribers:
+                report, delivered = subscriber
+                for phase, info in phases[delivered:]:
+                    _notify(report, phase, info)
+                subscriber[1] = len(phases)
+
+
+class SingleFlight:
+    """按账号合并并发拨号（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._salt = os.urandom(16)
+        self.shared = 0
+
+    def run(self, key, secret: str, fn, report=None):
+        """
+        执行或挂靠一次拨号
+
+        Args:
+            key: 合并键（规范化后的完整账号）
+            secret: 密码（只参与加盐摘要，密码相同的请求才共享结果）
+            fn: 拨号函数 fn(report) -> dict，report 为转发给所有挂靠请求的阶段回调
+            report: 本请求的阶段回调 report(phase, **info)
+
+        Returns:
+            (结果, 是否由本请求拨号)
+
+        Raises:
+            Exception: 拨号函数抛出的异常（挂靠的请求同样收到）
+        """
+        digest = hashlib.sha256(self._salt + (secret or '').encode('utf-8')).hexdigest()
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight(digest, report)
+                    break
+                follow = flight.digest == digest
+                if follow:
+                    flight.followers += 1
+
+            # 挂靠：等待结果；密码不同：等待本次拨号结束后重新排队
+            if follow and report:
+                flight.subscribe(report)
+            flight.done.wait()
+            if follow:
+                if flight.error is not None:
+                    raise flight.error
+                with self._lock:
+                    self.shared += 1
+                return flight.result, False
+
+        def broadcast(phase, **info):
+            flight.publish(phase, info)
+
+        try:
+            flight.result = fn(broadcast)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.followers:
+                    logger.info(f"账号 {key} 的拨号结果同时返回给 {flight.followers} 个重复请求")
+            flight.done.set()
+        return flight.result, True
+
+    def inflight(self) -> int:
+        """正在拨号的账号数"""
+        with self._lock:
+            return len(self._flights)
+
+
+def _notify(report, phase: str, info: dict):
+    try:
+        report(phase, **info)
+    except Exception as e:
+        logger.warning(f"阶段回调执行失败 ({phase}): {e}")
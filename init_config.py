@@ -13,9 +13,9 @@ import subprocess
 import hashlib
 import secrets
 from flask import Flask, render_template, request, jsonify, redirect, url_for, session
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from models import NetworkConfig, AdminUser, Config
+from db_engine import create_sqlite_engine
 
 app = Flask(__name__)
 app.secret_key = 'your-super-secret-key-change-it-please'  # 请修改！
@@ -71,7 +71,7 @@ def require_super_admin(f):
 
 # 独立的数据库会话工厂（不依赖 app.py）
 DB_PATH = '/opt/pppoe-activation/instance/database.db'
-engine = create_engine(f'sqlite:///{DB_PATH}')
+engine = create_sqlite_engine(DB_PATH)
 SessionLocal = sessionmaker(bind=engine)
 
 # 配置文件路径
@@ -453,6 +453,7 @@ VLAN_ID={data.get('vlan_id', '')}
         net_config.net_mode = data.get('net_mode', 'physical')
         net_config.base_interface = data.get('base_interface', 'eth0')
         net_config.vlan_id = data.get('vlan_id') or None
+        net_config.touch()
         session.add(net_config)
         session.commit()
         print(f"网络配置已保存到数据库: net_mode={net_config.net_mode}, base_interface={net_config.base_interface}, vlan_id={net_config.vlan_id}")
@@ -0,0 +1,161 @@
+# isp_registry.py - 运营商（ISP）规则表
+"""
+运营商规则表
+校验账号格式、拨号时补全账号后缀、统计页面的名称和颜色原先分散在
+validators/activate.py、app.py 和 dashboard.py / 模板中各写一份，
+这里集中成一张表，导入时编译好正则、生成各种查找表，运行期只做字典查找：
+
+- 校验：validate_username(isp, username)，正则预编译，错误码与原来一致
+- 拨号：apply_suffix(isp, username)，补全 @后缀（含移动 scxy 前缀账号）
+- 统计：DISPLAY_NAMES / COLORS / CHART_COLORS 供 dashboard.py 和模板使用
+
+新增运营商时只需在 ISPS 中加一项，并同步 schemas/activate.schema.json 的 isp 枚举
+"""
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+class UsernameFormatError(Exception):
+    """用户名格式错误异常"""
+    pass
+
+
+class Isp:
+    """
+    单个运营商的规则
+
+    Args:
+        key: 前端提交的 isp 值（同时是日志和统计表中的 isp 字段）
+        name: 显示名称
+        color: 管理后台日志页的标签颜色
+        chart_color: 统计图表颜色
+        suffix: 拨号时补全的账号后缀（不含 @），None 表示不补全
+        label: 补全后缀时日志中的用户类型
+        pattern: 账号格式正则（整串匹配），None 表示不校验
+        error_code: 账号格式不符时的错误码
+        prefixes: 不是纯数字但同样需要补全后缀的账号前缀
+    """
+
+    __slots__ = ('key', 'name', 'color', 'chart_color', 'suffix', 'label',
+                 'pattern', 'error_code', 'prefixes', '_match')
+
+    def __init__(self, key: str, name: str, color: str, chart_color: str, suffix: str = None,
+                 label: str = None, pattern: str = None, error_code: str = None, prefixes=()):
+        self.key = key
+        self.name = name
+        self.color = color
+        self.chart_color = chart_color
+        self.suffix = suffix
+        self.label = label or name
+        self.pattern = pattern
+        self.error_code = error_code
+        self.prefixes = tuple(prefixes)
+        self._match = re.compile(pattern).fullmatch if pattern else None
+
+    def is_valid(self, username: str) -> bool:
+        """账号格式是否符合要求（没有格式要求时总是 True）"""
+        return self._match is None or self._match(username) is not None
+
+
+# 运营商规则（顺序即统计页面的显示顺序）
+ISPS = (
+    Isp('cdu', '校园网', '#FF8C00', 'rgba(255, 165, 0, 0.8)',
+        suffix='cdu', label='校园网用户',
+        pattern=r'\d{6,12}', error_code='INVALID_STUDENT_ID'),
+    # 修改过密码的移动用户输入 scxy + 手机号，同样补全 @cmccgx
+    Isp('cmccgx', '中国移动', '#32CD32', 'rgba(34, 197, 94, 0.8)',
+        suffix='cmccgx', label='移动用户',
+        pattern=r'1\d{10}', error_code='INVALID_CMCC_MOBILE', prefixes=('scxy',)),
+    Isp('96301', '中国电信', '#1E90FF', 'rgba(59, 130, 246, 0.8)',
+        suffix='96301', label='电信用户',
+        pattern=r'1\d{10}', error_code='INVALID_TELECOM_MOBILE'),
+    Isp('10010', '中国联通', '#FF0000', 'rgba(239, 68, 68, 0.8)',
+        suffix='10010', label='联通用户',
+        pattern=r'1\d{10}', error_code='INVALID_UNICOM_MOBILE'),
+    # 直拨：用户自由输入完整账号，不校验、不补全
+    Isp('direct', '直拨', '#00CED1', 'rgba(128, 128, 128, 0.8)')
+)
+
+# 纯数字账号在 isp 未知时按校园网补全（与原 apply_isp_suffix 一致）
+DEFAULT_ISP = 'cdu'
+
+# ---------- 导入时生成的查找表 ----------
+BY_KEY = {isp.key: isp for isp in ISPS}
+
+# {isp: 显示名称}
+DISPLAY_NAMES = {isp.key: isp.name for isp in ISPS}
+
+# {显示名称: 颜色}
+COLORS = {isp.name: isp.color for isp in ISPS}
+CHART_COLORS = {isp.name: isp.chart_color for isp in ISPS}
+
+# 前缀账号规则 [(前缀, 运营商)]，与 isp 选择无关（scxy 开头的账号总是移动账号）
+_PREFIX_RULES = tuple((prefix, isp) for isp in ISPS for prefix in isp.prefixes)
+_PREFIXES = tuple(prefix for prefix, _ in _PREFIX_RULES)
+
+
+def get(key: str):
+    """按 isp 值查找运营商，未知时返回 None"""
+    return BY_KEY.get(key)
+
+
+def display_name(key: str, default: str = None) -> str:
+    """isp 值对应的显示名称，未知时返回 default（默认为 isp 值本身）"""
+    isp = BY_KEY.get(key)
+    if isp is not None:
+        return isp.name
+    return key if default is None else default
+
+
+def validate_username(isp: str, username: str):
+    """
+    根据ISP类型校验用户名格式
+
+    Args:
+        isp: ISP类型 (cdu, cmccgx, 96301, 10010, direct)
+        username: 用户名
+
+    Raises:
+        UsernameFormatError: 当用户名格式不符合ISP要求时
+    """
+    entry = BY_KEY.get(isp)
+    if entry is not None and entry._match is not None and entry._match(username) is None:
+        raise UsernameFormatError(entry.error_code)
+
+
+def apply_suffix(isp: str, username: str) -> str:
+    """
+    根据ISP类型添加后缀（系统只负责添加尾缀，密码由用户手动输入）
+
+    - 纯数字账号：按 isp 补全对应后缀（未知 isp 按校园网处理）
+    - 前缀账号（如移动 scxy + 手机号）：补全该前缀所属运营商的后缀
+    - 已带 @ 的账号和直拨账号：保持原样
+
+    Args:
+        isp: ISP类型
+        username: 用户输入的账号
+
+    Returns:
+        str: 拨号使用的完整账号
+    """
+    if isp == 'direct':
+        logger.info(f"直拨模式，使用原始账号: {username}")
+        return username
+    if '@' in username:
+        return username
+
+    if username.isdigit():
+        entry = BY_KEY.get(isp)
+        if entry is None or entry.suffix is None:
+            entry = BY_KEY[DEFAULT_ISP]
+        username = f"{username}@{entry.suffix}"
+        logger.info(f"{entry.label}，添加@{entry.suffix}后缀: {username}")
+    elif username.startswith(_PREFIXES):
+        for prefix, entry in _PREFIX_RULES:
+            if username.startswith(prefix):
+                username = f"{username}@{entry.suffix}"
+                logger.info(f"修改过密码的{entry.label}，添加@{entry.suffix}后缀: {username}")
+                break
+    return username
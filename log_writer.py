@@ -0,0 +1,203 @@
+# log_writer.py - 激活日志批量写入
+"""
+激活日志后台批量写入
+请求线程只把日志放入有界队列，由专用写线程按条数/时间阈值分批提交，
+每批一次事务（日志与日汇总表一起更新），拨号请求不再等待 fsync 和 SQLite 写锁
+
+数据库写入失败、队列已满或关闭时仍未写入的记录追加到 activation_log.jsonl，
+由 sync.py 之后导入数据库（按 record_hash 唯一索引去重）
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+import stats_rollup
+from models import ActivationLog, record_hash
+
+logger = logging.getLogger(__name__)
+
+# 日志字段（与 sync.py 导入 JSONL 时支持的字段一致）
+LOG_FIELDS = ('name', 'role', 'isp', 'username', 'success',
+              'ip', 'mac', 'error_code', 'error_message', 'timestamp')
+
+# 队列中的停止标记
+_STOP = object()
+
+
+def build_log_entry(data: dict) -> ActivationLog:
+    """根据日志字典构造 ActivationLog"""
+    return ActivationLog(
+        name=data.get('name'),
+        role=data.get('role'),
+        isp=data.get('isp'),
+        username=data.get('username'),
+        success=data.get('success', False),
+        ip=data.get('ip'),
+        mac=data.get('mac'),
+        error_code=data.get('error_code'),
+        error_message=data.get('error_message'),
+        timestamp=data.get('timestamp'),
+        record_hash=record_hash(data)
+    )
+
+
+class ActivationLogWriter:
+    """
+    激活日志写线程
+
+    Args:
+        session_factory: 数据库会话工厂（SessionLocal）
+        spill_file: 写库失败时追加的 JSONL 文件
+        max_queue: 队列容量，超过后直接写入 spill_file
+        batch_size: 每批最多提交的条数
+        flush_interval: 批次中第一条记录最多等待的时间（秒）
+    """
+
+    def __init__(self, session_factory, spill_file: str, max_queue: int = 1000,
+                 batch_size: int = 50, flush_interval: float = 0.5):
+        self._session_factory = session_factory
+        self.spill_file = spill_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._closed = False
+        self.written = 0
+        self.spilled = 0
+        self._thread = threading.Thread(target=self._run, name='activation-log-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, data: dict):
+        """
+        提交一条日志（不阻塞）
+
+        Args:
+            data: 日志字典，缺少 timestamp 时使用当前时间
+        """
+        record = {field: data.get(field) for field in LOG_FIELDS}
+        record['success'] = bool(record['success'])
+        if not record['timestamp']:
+            record['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
+        # 每条日志唯一的 ID（随 JSONL 落盘），参与 record_hash，避免同一秒的相同记录被去重
+        record['record_id'] = data.get('record_id') or uuid.uuid4().hex
+
+        if self._closed:
+            self._spill([record], "写线程已关闭")
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._spill([record], "写入队列已满")
+
+    def pending(self) -> int:
+        """队列中等待写入的条数"""
+        return self._queue.qsize()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        等待队列中已提交的日志全部处理完
+
+        Returns:
+            bool: 是否在超时前处理完
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5):
+        """
+        停止写线程：写入队列中剩余的日志，超时未写完的部分追加到 spill_file
+        （注册为 atexit 钩子，可重复调用）
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+        # 写线程未能及时退出时，剩余记录直接落盘
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+            self._queue.task_done()
+        if leftover:
+            self._spill(leftover, "关闭时未写入数据库")
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: list):
+        session = self._session_factory()
+        try:
+            for record in batch:
+                log_entry = build_log_entry(record)
+                session.add(log_entry)
+                # 日汇总表与日志在同一事务中更新
+                stats_rollup.record_activation(session, log_entry)
+            session.commit()
+            self.written += len(batch)
+            logger.info(f"日志已写入数据库: {len(batch)} 条")
+        except Exception as e:
+            logger.error(f"写入数据库失败: {e}")
+            session.rollback()
+            self._spill(batch, "写入数据库失败")
+        finally:
+            session.close()
+
+    def _spill(self, records: list, reason: str):
+        """追加到 JSONL 文件并 fsync，等待 sync.py 导入"""
+        try:
+            with self._spill_lock:
+                with open(self.spill_file, 'a', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.spilled += len(records)
+            logger.warning(f"{reason}，{len(records)} 条日志已保存到 {self.spill_file}")
+        except OSError as e:
+            logger.error(f"{reason}，且无法保存到 {self.spill_file}: {e}，丢失 {len(records)} 条日志: {records}")
@@ -1,21 +1,83 @@
 # models.py
-from sqlalchemy import create_engine, Column, Integer, String, Boolean
+import contextlib
+from sqlalchemy import Column, Integer, String, Boolean, UniqueConstraint, Index, inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, validates
+from datetime import datetime
+import hashlib
+import json
+import logging
 import sys
 import os
 
 # 确保能导入上级目录的 config.py
 sys.path.append('/opt/pppoe-activation')
 from config import DATABASE_PATH
+from db_engine import create_sqlite_engine
 
 # 使用你原有的数据库路径
-engine = create_engine(f'sqlite:///{DATABASE_PATH}', echo=False)
+engine = create_sqlite_engine(DATABASE_PATH, echo=False)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
+# activation_logs.timestamp 的字符串格式
+LOG_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 参与日志去重摘要的字段
+RECORD_HASH_FIELDS = ('name', 'role', 'isp', 'username', 'success',
+                      'ip', 'mac', 'error_code', 'error_message', 'timestamp')
+
+# 升级表结构时等待其他进程释放写锁的最长时间（秒），其他进程可能正在执行同一迁移
+MIGRATION_BUSY_TIMEOUT = 300
+
+
+def timestamp_to_epoch(timestamp):
+    """
+    把日志时间字符串（本地时间）转换为 epoch 秒数
+
+    Returns:
+        int: epoch 秒数，为空或格式不符时返回 None
+    """
+    if not timestamp or not isinstance(timestamp, str):
+        return None
+    try:
+        return int(datetime.strptime(timestamp.strip(), LOG_TIME_FORMAT).timestamp())
+    except ValueError:
+        return None
+
+
+def record_hash(data):
+    """
+    日志记录的去重摘要（activation_logs.record_hash）
+
+    写线程为每条日志生成随机 record_id 并参与摘要，同一秒内内容相同的两次激活
+    （如合并拨号的重复请求）也不会被当作重复；没有 record_id 的旧记录只按字段内容计算
+
+    Args:
+        data: 日志字典（或带同名属性的对象转换成的字典）
+
+    Returns:
+        str: sha256 十六进制摘要
+    """
+    values = [data.get('record_id')]
+    for field in RECORD_HASH_FIELDS:
+        value = data.get(field)
+        values.append(bool(value) if field == 'success' else value)
+    raw = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
 class ActivationLog(Base):
     __tablename__ = 'activation_logs'
+    __table_args__ = (
+        Index('ix_activation_logs_isp_success_ts', 'isp', 'success', 'ts_epoch'),
+        Index('ix_activation_logs_username_ts', 'username', 'ts_epoch'),
+        Index('ux_activation_logs_record_hash', 'record_hash', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50))
@@ -28,6 +90,31 @@ class ActivationLog(Base):
     error_code = Column(String(10))
     error_message = Column(String(200))
     timestamp = Column(String(30))
+    # timestamp 对应的 epoch 秒数，用于排序和时间范围查询（timestamp 格式不符时为空）
+    ts_epoch = Column(Integer, index=True)
+    # 去重摘要（见 record_hash()），sync.py 导入 JSONL 时按它跳过已存在的记录
+    record_hash = Column(String(64))
+
+    @validates('timestamp')
+    def _sync_ts_epoch(self, key, value):
+        self.ts_epoch = timestamp_to_epoch(value)
+        return value
+
+
+class ActivationDailyStat(Base):
+    """激活统计日汇总表（日期 × ISP × 角色 × 成功 × 错误码 → 次数），由 stats_rollup 维护"""
+    __tablename__ = 'activation_daily_stats'
+    __table_args__ = (
+        UniqueConstraint('day', 'isp', 'role', 'success', 'error_code', name='uq_activation_daily_stats'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(String(30), nullable=False, default='')  # 2026-01-20，无时间戳时为空串
+    isp = Column(String(20), nullable=False, default='')
+    role = Column(String(20), nullable=False, default='')
+    success = Column(Boolean, nullable=False, default=False)
+    error_code = Column(String(10), nullable=False, default='')
+    count = Column(Integer, nullable=False, default=0)
 
 
 class NetworkConfig(Base):
@@ -39,7 +126,14 @@ class NetworkConfig(Base):
     base_interface = Column(String(20))  # enp3s0
     vlan_id = Column(String(100), nullable=True)  # 100 或 100,101,102（可为空）
     created_at = Column(String(30))  # 创建时间
-    updated_at = Column(String(30))  # 更新时间
+    updated_at = Column(String(30))  # 更新时间（同时作为配置版本号，拨号进程据此刷新接口池缓存）
+    
+    def touch(self):
+        """保存配置前调用：更新 updated_at（精确到微秒），使拨号进程的接口池缓存失效"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+        if not self.created_at:
+            self.created_at = now
+        self.updated_at = now
     
     def effective_interface(self) -> str:
         """
@@ -99,5 +193,113 @@ class AdminUser(Base):
 
 
 def init_db():
-    """创建表（如果不存在）"""
+    """创建表（如果不存在）并升级旧表结构"""
     Base.metadata.create_all(bind=engine)
+    migrate_db(engine)
+
+
+@contextlib.contextmanager
+def immediate_transaction(bind, busy_timeout=None):
+    """
+    以 BEGIN IMMEDIATE 开启写事务（SQLite），正常退出时提交，异常时回滚
+
+    开始时即取得写锁，其他进程 / 线程的写入要等本事务结束，
+    适合"先读后写"且不能被并发写入打断的维护操作（如重建汇总表、升级表结构）
+
+    Args:
+        bind: Engine
+        busy_timeout: 等待其他连接释放写锁的最长时间（秒），None 时使用连接的默认值
+
+    Yields:
+        Connection: 在事务内执行语句的连接
+    """
+    with bind.connect() as conn:
+        # 由我们自己发出 BEGIN / COMMIT，不使用驱动隐式开启的事务
+        conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+        previous_timeout = None
+        if busy_timeout is not None:
+            previous_timeout = conn.exec_driver_sql('PRAGMA busy_timeout').scalar()
+            conn.exec_driver_sql(f'PRAGMA busy_timeout = {int(busy_timeout * 1000)}')
+        try:
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.exec_driver_sql('ROLLBACK')
+                raise
+            conn.exec_driver_sql('COMMIT')
+        finally:
+            if previous_timeout is not None:
+                conn.exec_driver_sql(f'PRAGMA busy_timeout = {int(previous_timeout)}')
+
+
+def migrate_db(bind, batch_size=1000):
+    """
+    升级旧版数据库：为 activation_logs 增加 ts_epoch / record_hash 列、回填数据并创建索引（可重复执行）
+
+    app.py、dashboard.py 等进程可能同时启动并执行迁移：整个迁移在一个 BEGIN IMMEDIATE
+    事务中进行，取得写锁后重新检查表结构，增加列、回填和建索引一并提交，
+    后执行的进程看到的是已完成的表结构，不会重复增加列
+
+    Args:
+        bind: 数据库 engine
+        batch_size: 每批回填的行数
+    """
+    with immediate_transaction(bind, busy_timeout=MIGRATION_BUSY_TIMEOUT) as conn:
+        if _add_log_column(conn, 'ts_epoch', 'INTEGER'):
+            # 按 id 分批回填，避免一次性载入整张表
+            last_id = 0
+            filled = 0
+            while True:
+                rows = conn.execute(
+                    text('SELECT id, timestamp FROM activation_logs WHERE id > :last_id ORDER BY id LIMIT :limit'),
+                    {"last_id": last_id, "limit": batch_size}
+                ).fetchall()
+                if not rows:
+                    break
+                updates = [{"id": row_id, "ts_epoch": timestamp_to_epoch(ts)} for row_id, ts in rows]
+                conn.execute(text('UPDATE activation_logs SET ts_epoch = :ts_epoch WHERE id = :id'), updates)
+                last_id = rows[-1][0]
+                filled += len(rows)
+            logger.info(f"ts_epoch 回填完成，共 {filled} 行")
+
+        if _add_log_column(conn, 'record_hash', 'VARCHAR(64)'):
+            last_id = 0
+            filled = 0
+            while True:
+                rows = conn.execute(
+                    text('SELECT id, ' + ', '.join(RECORD_HASH_FIELDS) + ' FROM activation_logs '
+                         'WHERE id > :last_id ORDER BY id LIMIT :limit'),
+                    {"last_id": last_id, "limit": batch_size}
+                ).mappings().fetchall()
+                if not rows:
+                    break
+                updates = [{"id": row['id'], "record_hash": record_hash(row)} for row in rows]
+                conn.execute(text('UPDATE activation_logs SET record_hash = :record_hash WHERE id = :id'), updates)
+                last_id = rows[-1]['id']
+                filled += len(rows)
+
+            # 旧库中内容完全相同的行各自保留（摘要后加 id），以便创建唯一索引
+            conn.execute(text(
+                "UPDATE activation_logs SET record_hash = record_hash || ':' || id "
+                "WHERE id NOT IN (SELECT MIN(id) FROM activation_logs GROUP BY record_hash)"
+            ))
+            logger.info(f"record_hash 回填完成，共 {filled} 行")
+
+        for index in ActivationLog.__table__.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _add_log_column(conn, name, column_type):
+    """在当前写事务内为 activation_logs 增加列，列已存在时返回 False"""
+    if name in {col['name'] for col in inspect(conn).get_columns('activation_logs')}:
+        return False
+    logger.info(f"activation_logs 增加 {name} 列")
+    try:
+        conn.execute(text(f'ALTER TABLE activation_logs ADD COLUMN {name} {column_type}'))
+    except OperationalError as e:
+        # 已在写锁内检查过，仍兼容其他方式（如手工执行）先增加了该列的情况
+        if 'duplicate column name' not in str(e):
+            raise
+        return False
+    return True
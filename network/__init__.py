@@ -7,12 +7,22 @@ from .interface import (
     iface_exists,
     create_vlan_iface,
     prepare_interface,
-    delete_vlan_iface
+    delete_vlan_iface,
+    set_mac_address,
+    get_ipv4_address,
+    delete_iface,
+    wait_for_link_up,
+    wait_for_link_gone
 )
 
 __all__ = [
     'iface_exists',
     'create_vlan_iface',
     'prepare_interface',
-    'delete_vlan_iface'
+    'delete_vlan_iface',
+    'set_mac_address',
+    'get_ipv4_address',
+    'delete_iface',
+    'wait_for_link_up',
+    'wait_for_link_gone'
 ]
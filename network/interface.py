@@ -3,11 +3,31 @@
 提供物理网卡和 VLAN 子接口的统一抽象
 """
 
+import errno
+import os
+import re
 import subprocess
 import logging
+import time
+
+from . import netlink
 
 logger = logging.getLogger(__name__)
 
+# 接口操作后端：netlink（默认，进程内完成）| subprocess（调用 ip 命令）
+# netlink 调用失败（如缺少 CAP_NET_ADMIN）时自动退回 subprocess
+NETWORK_BACKEND = os.environ.get("NETWORK_BACKEND", "netlink")
+
+# subprocess 方式修改 MAC 使用的脚本
+MAC_SET_SCRIPT = '/opt/pppoe-activation/mac_set.sh'
+
+# 等待接口就绪时的检查间隔（秒）
+LINK_CHECK_INTERVAL = 0.01
+
+
+def _use_netlink() -> bool:
+    return NETWORK_BACKEND == "netlink"
+
 
 def iface_exists(ifname: str) -> bool:
     """
@@ -19,6 +39,9 @@ def iface_exists(ifname: str) -> bool:
     Returns:
         bool: 接口是否存在
     """
+    if _use_netlink():
+        return netlink.link_exists(ifname)
+
     try:
         result = subprocess.run(
             ["ip", "link", "show", ifname],
@@ -49,6 +72,14 @@ def create_vlan_iface(base: str, vlan_id: int) -> str:
         logger.info(f"VLAN 接口 {vlan_if} 已存在，跳过创建")
         return vlan_if
     
+    if _use_netlink():
+        try:
+            netlink.create_vlan(base, vlan_id, vlan_if)
+            logger.info(f"成功创建并启用 VLAN 接口: {vlan_if}")
+            return vlan_if
+        except netlink.NetlinkError as e:
+            logger.warning(f"netlink 创建 VLAN 接口 {vlan_if} 失败，改用 ip 命令: {e}")
+
     try:
         # 创建 VLAN 接口
         subprocess.check_call(
@@ -78,6 +109,14 @@ def delete_vlan_iface(vlan_if: str) -> bool:
     Returns:
         bool: 是否成功删除
     """
+    if _use_netlink() and iface_exists(vlan_if):
+        try:
+            netlink.delete_link(vlan_if)
+            logger.info(f"成功删除 VLAN 接口: {vlan_if}")
+            return True
+        except netlink.NetlinkError as e:
+            logger.warning(f"netlink 删除 VLAN 接口 {vlan_if} 失败，改用 ip 命令: {e}")
+
     try:
         if iface_exists(vlan_if):
             subprocess.check_call(
@@ -93,6 +132,132 @@ def delete_vlan_iface(vlan_if: str) -> bool:
         return False
 
 
+def set_mac_address(ifname: str, mac: str) -> bool:
+    """
+    修改接口 MAC 地址（down → 设置地址 → up）
+    
+    Args:
+        ifname: 接口名称
+        mac: 新 MAC 地址
+    
+    Returns:
+        bool: 是否成功
+    """
+    if _use_netlink():
+        try:
+            netlink.set_link_mac(ifname, mac)
+            return True
+        except netlink.NetlinkError as e:
+            logger.warning(f"netlink 设置 {ifname} MAC 失败，改用 {MAC_SET_SCRIPT}: {e}")
+
+    try:
+        subprocess.run(['sudo', MAC_SET_SCRIPT, ifname, mac], check=True)
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"设置 MAC 失败: {e}")
+        return False
+
+
+def get_ipv4_address(ifname: str):
+    """
+    获取接口的第一个 IPv4 地址
+    
+    Args:
+        ifname: 接口名称（如 ppp0）
+    
+    Returns:
+        str | None: IP 地址，没有地址时返回 None
+    """
+    if _use_netlink():
+        try:
+            addresses = netlink.get_ipv4_addresses(ifname)
+            return addresses[0] if addresses else None
+        except netlink.NetlinkError as e:
+            logger.warning(f"netlink 查询 {ifname} 地址失败，改用 ip 命令: {e}")
+
+    try:
+        res = subprocess.run(["ip", "addr", "show", ifname], capture_output=True, text=True)
+        ip_match = re.search(r'inet (\d+\.\d+\.\d+\.\d+)', res.stdout)
+        return ip_match.group(1) if ip_match else None
+    except Exception as e:
+        logger.error(f"获取 {ifname} IP 失败: {e}")
+        return None
+
+
+def delete_iface(ifname: str) -> bool:
+    """
+    删除接口（用于清理异常残留的 ppp 接口）
+    
+    Returns:
+        bool: 是否成功删除
+    """
+    if _use_netlink():
+        try:
+            netlink.delete_link(ifname)
+            return True
+        except netlink.NetlinkError as e:
+            if e.errno == errno.ENODEV:
+                return False
+            logger.warning(f"netlink 删除接口 {ifname} 失败，改用 ip 命令: {e}")
+
+    result = subprocess.run(['sudo', 'ip', 'link', 'delete', ifname], check=False)
+    return result.returncode == 0
+
+
+def wait_for_link_up(ifname: str, timeout: float = 1.0) -> bool:
+    """
+    等待接口进入可收发状态（operstate 为 up，或 carrier 为 1）
+    
+    Args:
+        ifname: 接口名称
+        timeout: 最长等待时间（秒）
+    
+    Returns:
+        bool: 超时前接口是否已就绪
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if _link_ready(ifname):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(LINK_CHECK_INTERVAL)
+
+
+def wait_for_link_gone(ifname: str, timeout: float = 0.5) -> bool:
+    """
+    等待接口从内核中消失（如删除 ppp 接口后等待内核完成清理）
+    
+    Args:
+        ifname: 接口名称
+        timeout: 最长等待时间（秒）
+    
+    Returns:
+        bool: 超时前接口是否已消失
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if not os.path.exists(f"/sys/class/net/{ifname}"):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(LINK_CHECK_INTERVAL)
+
+
+def _link_ready(ifname: str) -> bool:
+    sys_dir = f"/sys/class/net/{ifname}"
+    try:
+        with open(f"{sys_dir}/operstate") as f:
+            if f.read().strip() == 'up':
+                return True
+        # 部分驱动 operstate 长期为 unknown，以 carrier 为准
+        with open(f"{sys_dir}/carrier") as f:
+            return f.read().strip() == '1'
+    except OSError:
+        # 接口处于 down 状态时读取 carrier 会返回 EINVAL
+        return False
+
+
 def prepare_interface(net_mode: str, base_interface: str, vlan_id: int = None) -> str:
     """
     准备网络接口（物理或VLAN）
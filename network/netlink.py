@@ -0,0 +1,258 @@
+"""
+rtnetlink 接口操作
+直接通过 NETLINK_ROUTE 套接字完成接口查询、MAC 修改、地址查询和 VLAN 增删，
+避免每次拨号 fork+exec 多个 ip / sudo 进程
+
+需要 CAP_NET_ADMIN 权限（容器内以 root 运行时满足），
+调用失败时抛出 NetlinkError，由上层退回到 subprocess 方式
+"""
+
+import errno
+import itertools
+import os
+import socket
+import struct
+import threading
+
+# 消息类型
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTM_GETADDR = 22
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+# 消息标志
+NLM_F_REQUEST = 0x1
+NLM_F_MULTI = 0x2
+NLM_F_ACK = 0x4
+NLM_F_DUMP = 0x300
+NLM_F_EXCL = 0x200
+NLM_F_CREATE = 0x400
+
+# 接口属性
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_LINK = 5
+IFLA_OPERSTATE = 16
+IFLA_LINKINFO = 18
+IFLA_INFO_KIND = 1
+IFLA_INFO_DATA = 2
+IFLA_VLAN_ID = 1
+
+# 地址属性
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+
+IFF_UP = 0x1
+
+_NLMSGHDR = struct.Struct('=IHHII')     # len, type, flags, seq, pid
+_IFINFOMSG = struct.Struct('=BxHiII')   # family, type, index, flags, change
+_IFADDRMSG = struct.Struct('=BBBBI')    # family, prefixlen, flags, scope, index
+_RTATTR = struct.Struct('=HH')          # len, type
+_NLMSGERR = struct.Struct('=i')
+
+_seq = itertools.count(1)
+_seq_lock = threading.Lock()
+
+
+class NetlinkError(OSError):
+    """netlink 请求失败"""
+    pass
+
+
+def _align(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def _attr(attr_type: int, payload: bytes) -> bytes:
+    length = _RTATTR.size + len(payload)
+    return _RTATTR.pack(length, attr_type) + payload + b'\0' * (_align(length) - length)
+
+
+def _parse_attrs(data: bytes) -> dict:
+    attrs = {}
+    offset = 0
+    while offset + _RTATTR.size <= len(data):
+        length, attr_type = _RTATTR.unpack_from(data, offset)
+        if length < _RTATTR.size:
+            break
+        attrs[attr_type] = data[offset + _RTATTR.size:offset + length]
+        offset += _align(length)
+    return attrs
+
+
+def _next_seq() -> int:
+    with _seq_lock:
+        return next(_seq)
+
+
+def _request(msg_type: int, flags: int, body: bytes) -> list:
+    """
+    发送一条 netlink 请求并收集响应
+
+    Returns:
+        list: [(消息类型, 消息体), ...]
+
+    Raises:
+        NetlinkError: 内核返回错误或套接字不可用
+    """
+    seq = _next_seq()
+    header = _NLMSGHDR.pack(_NLMSGHDR.size + len(body), msg_type, flags | NLM_F_REQUEST, seq, 0)
+
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+    except (OSError, AttributeError) as e:
+        raise NetlinkError(getattr(e, 'errno', errno.EAFNOSUPPORT), f"无法创建 netlink 套接字: {e}")
+
+    messages = []
+    try:
+        sock.bind((0, 0))
+        sock.sendall(header + body)
+        while True:
+            data = sock.recv(65536)
+            offset = 0
+            while offset + _NLMSGHDR.size <= len(data):
+                length, rtype, rflags, rseq, _ = _NLMSGHDR.unpack_from(data, offset)
+                payload = data[offset + _NLMSGHDR.size:offset + length]
+                offset += _align(length)
+                if rseq != seq:
+                    continue
+                if rtype == NLMSG_DONE:
+                    return messages
+                if rtype == NLMSG_ERROR:
+                    (code,) = _NLMSGERR.unpack_from(payload)
+                    if code:
+                        raise NetlinkError(-code, os.strerror(-code))
+                    return messages
+                messages.append((rtype, payload))
+                if not rflags & NLM_F_MULTI and not flags & NLM_F_ACK:
+                    return messages
+    except NetlinkError:
+        raise
+    except OSError as e:
+        raise NetlinkError(e.errno, f"netlink 通信失败: {e}")
+    finally:
+        sock.close()
+
+
+def link_index(ifname: str) -> int:
+    """
+    获取接口索引
+
+    Raises:
+        NetlinkError: 接口不存在
+    """
+    try:
+        return socket.if_nametoindex(ifname)
+    except OSError:
+        raise NetlinkError(errno.ENODEV, f"接口不存在: {ifname}")
+
+
+def link_exists(ifname: str) -> bool:
+    """检查接口是否存在（不 fork 任何进程）"""
+    try:
+        link_index(ifname)
+        return True
+    except NetlinkError:
+        return False
+
+
+def get_link(ifname: str) -> dict:
+    """
+    查询接口信息
+
+    Returns:
+        dict: index, flags, up, mac, operstate
+    """
+    index = link_index(ifname)
+    body = _IFINFOMSG.pack(socket.AF_UNSPEC, 0, index, 0, 0)
+    for rtype, payload in _request(RTM_GETLINK, 0, body):
+        if rtype != RTM_NEWLINK:
+            continue
+        _, _, ifindex, flags, _ = _IFINFOMSG.unpack_from(payload)
+        attrs = _parse_attrs(payload[_IFINFOMSG.size:])
+        mac = attrs.get(IFLA_ADDRESS)
+        operstate = attrs.get(IFLA_OPERSTATE)
+        return {
+            "index": ifindex,
+            "flags": flags,
+            "up": bool(flags & IFF_UP),
+            "mac": ':'.join(f'{b:02x}' for b in mac) if mac else None,
+            "operstate": operstate[0] if operstate else None
+        }
+    raise NetlinkError(errno.ENODEV, f"接口不存在: {ifname}")
+
+
+def set_link_state(ifname: str, up: bool):
+    """启用或停用接口"""
+    body = _IFINFOMSG.pack(socket.AF_UNSPEC, 0, link_index(ifname), IFF_UP if up else 0, IFF_UP)
+    _request(RTM_NEWLINK, NLM_F_ACK, body)
+
+
+def set_link_mac(ifname: str, mac: str):
+    """
+    修改接口 MAC 地址（down → 设置地址 → up，与 mac_set.sh 行为一致）
+
+    Args:
+        ifname: 接口名
+        mac: MAC 地址（如 02:11:22:33:44:55）
+    """
+    index = link_index(ifname)
+    address = bytes(int(part, 16) for part in mac.split(':'))
+
+    set_link_state(ifname, False)
+    body = _IFINFOMSG.pack(socket.AF_UNSPEC, 0, index, 0, 0) + _attr(IFLA_ADDRESS, address)
+    _request(RTM_NEWLINK, NLM_F_ACK, body)
+    set_link_state(ifname, True)
+
+
+def get_ipv4_addresses(ifname: str) -> list:
+    """
+    查询接口的 IPv4 地址
+
+    Returns:
+        list: 地址列表（如 ['10.16.50.120']）
+    """
+    index = link_index(ifname)
+    body = _IFADDRMSG.pack(socket.AF_INET, 0, 0, 0, 0)
+    addresses = []
+    for rtype, payload in _request(RTM_GETADDR, NLM_F_DUMP, body):
+        family, _, _, _, ifindex = _IFADDRMSG.unpack_from(payload)
+        if family != socket.AF_INET or ifindex != index:
+            continue
+        attrs = _parse_attrs(payload[_IFADDRMSG.size:])
+        # 点对点接口（ppp）的本端地址在 IFA_LOCAL 中
+        raw = attrs.get(IFA_LOCAL) or attrs.get(IFA_ADDRESS)
+        if raw:
+            addresses.append(socket.inet_ntoa(raw))
+    return addresses
+
+
+def create_vlan(base: str, vlan_id: int, vlan_if: str = None) -> str:
+    """
+    创建 VLAN 子接口并启用
+
+    Returns:
+        str: VLAN 接口名
+
+    Raises:
+        NetlinkError: 创建失败（接口已存在时 errno 为 EEXIST）
+    """
+    vlan_if = vlan_if or f"{base}.{vlan_id}"
+    info_data = _attr(IFLA_VLAN_ID, struct.pack('=H', int(vlan_id)))
+    link_info = _attr(IFLA_INFO_KIND, b'vlan') + _attr(IFLA_INFO_DATA, info_data)
+    body = (_IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+            + _attr(IFLA_IFNAME, vlan_if.encode() + b'\0')
+            + _attr(IFLA_LINK, struct.pack('=I', link_index(base)))
+            + _attr(IFLA_LINKINFO, link_info))
+    _request(RTM_NEWLINK, NLM_F_ACK | NLM_F_CREATE | NLM_F_EXCL, body)
+    set_link_state(vlan_if, True)
+    return vlan_if
+
+
+def delete_link(ifname: str):
+    """删除接口（VLAN 子接口或残留的 ppp 接口）"""
+    body = _IFINFOMSG.pack(socket.AF_UNSPEC, 0, link_index(ifname), 0, 0)
+    _request(RTM_DELLINK, NLM_F_ACK, body)
@@ -0,0 +1,77 @@
+# runtime_config.py - 运行期网络配置缓存
+"""
+拨号接口池缓存
+网络配置只在 init_config.py / dashboard.py 的 save_config() 中修改，
+保存时通过 NetworkConfig.touch() 更新 updated_at 作为版本号。
+
+拨号进程缓存解析好的接口列表，每隔 check_interval 秒最多查询一次版本号，
+版本变化时才重新读取完整配置
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# 两次检查配置版本号的最短间隔（秒）
+DEFAULT_CHECK_INTERVAL = 1.0
+
+# 版本号查询（只读一行一列）
+_VERSION_SQL = text('SELECT id, updated_at FROM network_config ORDER BY id LIMIT 1')
+
+
+class RuntimeInterfaceCache:
+    """
+    接口池缓存（线程安全）
+
+    Args:
+        session_factory: 数据库会话工厂
+        loader: 从会话读取接口列表的函数（如 app.get_runtime_interfaces），
+            配置缺失或不完整时抛出 RuntimeError
+        check_interval: 检查版本号的最短间隔（秒）
+    """
+
+    def __init__(self, session_factory, loader, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self._session_factory = session_factory
+        self._loader = loader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._interfaces = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self) -> list:
+        """
+        获取接口列表
+
+        Returns:
+            list: 接口列表（副本）
+
+        Raises:
+            RuntimeError: 系统尚未初始化或配置不完整（不缓存，下次重新读取）
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._interfaces is not None and now - self._checked_at < self.check_interval:
+                return list(self._interfaces)
+
+            session = self._session_factory()
+            try:
+                version = tuple(session.execute(_VERSION_SQL).first() or ())
+                if self._interfaces is None or version != self._version:
+                    interfaces = self._loader(session)
+                    if self._interfaces is not None:
+                        logger.info(f"网络配置已更新，接口池: {self._interfaces} -> {interfaces}")
+                    self._interfaces = list(interfaces)
+                    self._version = version
+                self._checked_at = now
+                return list(self._interfaces)
+            finally:
+                session.close()
+
+    def version(self):
+        """当前缓存对应的配置版本号（id, updated_at），未缓存时为 None"""
+        with self._lock:
+            return self._version
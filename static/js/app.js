@@ -128,12 +128,14 @@ function initApp() {
     }
     
     try {
-      const res = await fetch('/activate', {
+      // 异步模式：立即拿到任务ID，再通过 SSE / 轮询获取进度和结果
+      const res = await fetch('/activate?mode=async', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(data)
       });
-      const resp = await res.json();
+      const job = await res.json();
+      const resp = job.job_id ? await waitForJob(job.job_id) : job;
       
       if (resp.success) {
         resultContent.innerHTML = `
@@ -191,6 +193,51 @@ function initApp() {
   });
 }
 
+// 显示激活任务当前阶段
+function showPhase(phase) {
+  resultContent.innerHTML = "<p class='info-text'>" + t('phase_' + phase) + "</p>";
+}
+
+// 等待异步激活任务完成，优先使用 SSE，不支持或连接失败时退化为轮询
+function waitForJob(jobId) {
+  return new Promise((resolve, reject) => {
+    const poll = async () => {
+      try {
+        const res = await fetch(`/activate/${jobId}`);
+        const job = await res.json();
+        if (!res.ok) {
+          reject(new Error(job.error));
+          return;
+        }
+        if (job.done) {
+          resolve(job.result);
+          return;
+        }
+        showPhase(job.phase);
+        setTimeout(poll, 1000);
+      } catch (err) {
+        reject(err);
+      }
+    };
+
+    if (typeof EventSource === 'undefined') {
+      poll();
+      return;
+    }
+
+    const source = new EventSource(`/activate/${jobId}/events`);
+    source.addEventListener('phase', (e) => showPhase(JSON.parse(e.data).phase));
+    source.addEventListener('result', (e) => {
+      source.close();
+      resolve(JSON.parse(e.data));
+    });
+    source.onerror = () => {
+      source.close();
+      poll();
+    };
+  });
+}
+
 function updatePreview() {
   let baseUser = usernameInput.value.trim();
   const isp = ispSelect.value;
@@ -0,0 +1,197 @@
+# stats_rollup.py - 激活统计日汇总表维护
+"""
+激活统计日汇总
+activation_daily_stats 按 日期 × ISP × 角色 × 成功 × 错误码 记录次数，
+写入激活日志时在同一事务中累加，统计页面只需读取少量汇总行
+
+用法：
+    python3 stats_rollup.py     # 根据 activation_logs 全量重建汇总表
+"""
+import time
+
+from sqlalchemy import func, case, or_, select, delete
+from sqlalchemy.dialects.sqlite import insert
+from models import engine, ActivationLog, ActivationDailyStat, Config, init_db, immediate_transaction
+
+# Config 表中的标记：汇总表已根据 activation_logs 全量建立，此后随日志写入累加
+BUILT_MARKER = 'activation_daily_stats_built'
+
+
+def day_of(timestamp):
+    """timestamp 的日期部分（空格前的内容，没有空格时为整个字符串）"""
+    if not timestamp:
+        return ''
+    return timestamp.split(' ', 1)[0]
+
+
+def record_activation(session, log_entry):
+    """
+    累加一条激活记录到汇总表（不提交，由调用方与日志写入在同一事务中提交）
+
+    Args:
+        session: SQLAlchemy 会话
+        log_entry: ActivationLog 对象
+    """
+    stmt = insert(ActivationDailyStat).values(
+        day=day_of(log_entry.timestamp),
+        isp=log_entry.isp or '',
+        role=log_entry.role or '',
+        success=bool(log_entry.success),
+        error_code=log_entry.error_code or '',
+        count=1
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['day', 'isp', 'role', 'success', 'error_code'],
+        set_={'count': ActivationDailyStat.count + 1}
+    )
+    session.execute(stmt)
+
+
+def rebuild(bind):
+    """
+    根据 activation_logs 全量重建汇总表，并记录"已建立"标记
+
+    在 BEGIN IMMEDIATE 事务中完成统计、清空和写入，期间其他进程的
+    激活日志写入会等待本事务结束，不会丢失累加
+
+    Args:
+        bind: Engine
+
+    Returns:
+        int: 汇总后的行数
+    """
+    with immediate_transaction(bind) as conn:
+        return _rebuild(conn)
+
+
+def ensure_built(bind):
+    """
+    汇总表尚未建立时（如升级后首次启动）自动全量重建
+
+    以 Config 表中的 activation_daily_stats_built 标记判断，而不是汇总表是否为空：
+    app.py 可能已先写入新记录，此时汇总表非空但缺少历史数据
+
+    Args:
+        bind: Engine
+
+    Returns:
+        bool: 是否执行了重建
+    """
+    with bind.connect() as conn:
+        if _is_built(conn):
+            return False
+    with immediate_transaction(bind) as conn:
+        # 取得写锁后再检查一次，多个进程同时启动时只重建一次
+        if _is_built(conn):
+            return False
+        _rebuild(conn)
+    return True
+
+
+def _is_built(conn):
+    return conn.execute(select(Config.id).where(Config.name == BUILT_MARKER)).first() is not None
+
+
+def _rebuild(conn):
+    ts = ActivationLog.timestamp
+    space = func.instr(ts, ' ')
+    day = case(
+        (or_(ts.is_(None), ts == ''), ''),
+        (space > 0, func.substr(ts, 1, space - 1)),
+        else_=ts
+    )
+    isp = func.coalesce(ActivationLog.isp, '')
+    role = func.coalesce(ActivationLog.role, '')
+    success = case((ActivationLog.success == True, True), else_=False)
+    error_code = func.coalesce(ActivationLog.error_code, '')
+
+    rows = conn.execute(
+        select(day, isp, role, success, error_code, func.count())
+        .group_by(day, isp, role, success, error_code)
+    ).all()
+
+    conn.execute(delete(ActivationDailyStat))
+    if rows:
+        conn.execute(insert(ActivationDailyStat), [
+            {
+                "day": row[0] or '',
+                "isp": row[1],
+                "role": row[2],
+                "success": bool(row[3]),
+                "error_code": row[4],
+                "count": row[5]
+            }
+            for row in rows
+        ])
+
+    built_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
+    conn.execute(
+        insert(Config)
+        .values(name=BUILT_MARKER, value=built_at)
+        .on_conflict_do_update(index_elements=['name'], set_={'value': built_at})
+    )
+    return len(rows)
+
+
+# =============================
+# 统计查询
+# =============================
+
+def _isp_key():
+    """ISP 分组键（空值归为 Unknown）"""
+    return case((ActivationDailyStat.isp == '', 'Unknown'), else_=ActivationDailyStat.isp)
+
+
+def _success_sum():
+    return func.sum(case((ActivationDailyStat.success == True, ActivationDailyStat.count), else_=0))
+
+
+def count_by_day(session):
+    """按日期统计激活次数 {日期: 次数}"""
+    rows = (
+        session.query(ActivationDailyStat.day, func.sum(ActivationDailyStat.count))
+        .filter(ActivationDailyStat.day != '')
+        .group_by(ActivationDailyStat.day)
+        .order_by(ActivationDailyStat.day)
+        .all()
+    )
+    return {day: int(count) for day, count in rows}
+
+
+def count_by_isp(session):
+    """按 ISP 统计激活次数 {isp: 次数}"""
+    isp = _isp_key().label('isp')
+    rows = session.query(isp, func.sum(ActivationDailyStat.count)).group_by(isp).all()
+    return {key: int(count) for key, count in rows}
+
+
+def success_totals(session):
+    """
+    总次数与成功次数
+
+    Returns:
+        (total, success)
+    """
+    total, success = session.query(func.sum(ActivationDailyStat.count), _success_sum()).one()
+    return int(total or 0), int(success or 0)
+
+
+def isp_stats(session):
+    """
+    按 ISP 统计总次数与成功次数
+
+    Returns:
+        list: [(isp, total, success), ...]
+    """
+    isp = _isp_key().label('isp')
+    rows = session.query(isp, func.sum(ActivationDailyStat.count), _success_sum()).group_by(isp).all()
+    return [(key, int(total or 0), int(success or 0)) for key, total, success in rows]
+
+
+if __name__ == '__main__':
+    init_db()
+    try:
+        count = rebuild(engine)
+        print(f"✅ 汇总表重建完成，共 {count} 行")
+    except Exception as e:
+        print(f"❌ 汇总表重建失败: {e}")
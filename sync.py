@@ -1,77 +1,209 @@
 # /opt/pppoe-activation/sync.py
 import json
 import os
+import sys
+import threading
+import time
 from datetime import datetime
-from models import SessionLocal, ActivationLog, init_db
+from sqlalchemy.dialects.sqlite import insert
+from models import SessionLocal, ActivationLog, Config, init_db, timestamp_to_epoch, record_hash
 from config import BASE_DIR
+import stats_rollup
 
 SOURCE_LOG_FILE = f'{BASE_DIR}/activation_log.jsonl'
+# logrotate 轮转后的文件名（copytruncate 以外的方式）
+ROTATED_LOG_FILE = f'{SOURCE_LOG_FILE}.1'
+
+# Config 表中保存同步进度的配置项：{"inode": ..., "offset": ..., "head": ...}
+CHECKPOINT_NAME = 'SYNC_JSONL_CHECKPOINT'
+# 记录文件开头的字节数，用于识别截断后又写入了新内容（大小可能不小于原偏移）
+HEAD_BYTES = 64
+
+# 后台同步间隔（秒）
+SYNC_INTERVAL = 5
+
+SUPPORTED_FIELDS = {
+    'name', 'role', 'isp', 'username', 'success',
+    'ip', 'mac', 'error_code', 'error_message', 'timestamp'
+}
+
+# 同一进程内同步互斥（后台线程与手动调用）
+_sync_lock = threading.Lock()
+
+
+def _load_checkpoint(session):
+    row = session.query(Config).filter(Config.name == CHECKPOINT_NAME).first()
+    if row is None or not row.value:
+        return None, 0, ''
+    try:
+        data = json.loads(row.value)
+        return data.get('inode'), int(data.get('offset', 0)), data.get('head', '')
+    except (ValueError, TypeError):
+        return None, 0, ''
+
+
+def _read_head(path):
+    with open(path, 'rb') as f:
+        return f.read(HEAD_BYTES).hex()
+
+
+def _save_checkpoint(session, inode, offset, head):
+    """与导入的日志在同一事务中保存进度"""
+    value = json.dumps({"inode": inode, "offset": offset, "head": head})
+    row = session.query(Config).filter(Config.name == CHECKPOINT_NAME).first()
+    if row is None:
+        session.add(Config(name=CHECKPOINT_NAME, value=value))
+    else:
+        row.value = value
+
+
+def _clean_record(data):
+    """补全日志字段"""
+    clean_data = {k: data.get(k) for k in SUPPORTED_FIELDS}
+
+    if clean_data['timestamp'] is None:
+        clean_data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if clean_data['name'] is None:
+        clean_data['name'] = '未知用户'
+    if clean_data['role'] is None:
+        clean_data['role'] = '未知'
+    if clean_data['isp'] is None:
+        clean_data['isp'] = 'unknown'
+    if clean_data['success'] is None:
+        clean_data['success'] = False
+    # 成功记录（如写线程落盘的日志）没有错误码，不补默认值
+    if not clean_data['success']:
+        if clean_data['error_code'] is None:
+            clean_data['error_code'] = '999'
+        if clean_data['error_message'] is None:
+            clean_data['error_message'] = '日志格式不完整'
+    return clean_data
+
+
+def _insert_log(session, data, clean_data):
+    """
+    插入一条日志，record_hash 已存在时跳过（INSERT ... ON CONFLICT DO NOTHING）
+
+    Returns:
+        bool: 是否新增
+    """
+    values = dict(clean_data,
+                  ts_epoch=timestamp_to_epoch(clean_data['timestamp']),
+                  record_hash=record_hash(dict(clean_data, record_id=data.get('record_id'))))
+    stmt = insert(ActivationLog).values(**values).on_conflict_do_nothing(index_elements=['record_hash'])
+    if session.execute(stmt).rowcount != 1:
+        return False
+    stats_rollup.record_activation(session, ActivationLog(**clean_data))
+    return True
+
+
+def _import_file(session, path, offset):
+    """
+    从 offset 开始导入文件中的完整行（末尾未写完的半行留到下次）
+
+    Returns:
+        (新的 offset, 新增条数)
+    """
+    added = 0
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                break
+            line_start = offset
+            offset += len(raw)
+            line = raw.decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+                if _insert_log(session, data, _clean_record(data)):
+                    added += 1
+            except Exception as e:
+                print(f"⚠️ {path} 偏移 {line_start} 处的行解析失败: {e}")
+                continue
+    return offset, added
+
 
 def sync_logs(latest_only=False):
     """
     同步日志到数据库。
-    注意：为兼容 dashboard.py 调用，保留 latest_only 参数，但实际忽略它。
-    始终全量读取日志文件，并通过 (username, timestamp) 去重。
-    """
-    print(f"🔄 开始同步日志: {SOURCE_LOG_FILE} (latest_only={latest_only}, 实际忽略)")
 
+    Args:
+        latest_only: True 时只导入上次同步之后追加的行（按 inode + 字节偏移记录进度，
+            处理轮转与截断）；False 时从头重新读取整个文件
+
+    导入时按 record_hash 唯一索引去重（INSERT ... ON CONFLICT DO NOTHING），
+    同步进度与导入的日志在同一事务中提交。
+
+    Returns:
+        int: 新增记录数
+    """
     if not os.path.exists(SOURCE_LOG_FILE):
-        print("📭 日志文件不存在")
-        return
+        return 0
 
-    init_db()
-    session = SessionLocal()
-    try:
-        existing = set(session.query(ActivationLog.username, ActivationLog.timestamp).all())
-        added = 0
-
-        with open(SOURCE_LOG_FILE, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                    supported_fields = {
-                        'name', 'role', 'isp', 'username', 'success',
-                        'ip', 'mac', 'error_code', 'error_message', 'timestamp'
-                    }
-                    clean_data = {k: data.get(k) for k in supported_fields}
-
-                    if clean_data['timestamp'] is None:
-                        clean_data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    if clean_data['name'] is None:
-                        clean_data['name'] = '未知用户'
-                    if clean_data['role'] is None:
-                        clean_data['role'] = '未知'
-                    if clean_data['isp'] is None:
-                        clean_data['isp'] = 'unknown'
-                    if clean_data['success'] is None:
-                        clean_data['success'] = False
-                    if clean_data['error_code'] is None:
-                        clean_data['error_code'] = '999'
-                    if clean_data['error_message'] is None:
-                        clean_data['error_message'] = '日志格式不完整'
-
-                    key = (clean_data['username'], clean_data['timestamp'])
-                    if key not in existing:
-                        log = ActivationLog(**clean_data)
-                        session.add(log)
-                        existing.add(key)
-                        added += 1
-
-                except Exception as e:
-                    print(f"⚠️ 第 {line_num} 行解析失败: {e}")
-                    continue
-
-        session.commit()
-        print(f"✅ 同步完成，新增 {added} 条记录")
+    with _sync_lock:
+        session = SessionLocal()
+        try:
+            stat = os.stat(SOURCE_LOG_FILE)
+            head = _read_head(SOURCE_LOG_FILE)
+            inode, offset, saved_head = _load_checkpoint(session) if latest_only else (None, 0, '')
+            added = 0
+
+            if inode is not None and inode != stat.st_ino:
+                # 文件已轮转：先读完旧文件剩余部分，再从头读新文件
+                if os.path.exists(ROTATED_LOG_FILE) and os.stat(ROTATED_LOG_FILE).st_ino == inode:
+                    _, count = _import_file(session, ROTATED_LOG_FILE, offset)
+                    added += count
+                offset = 0
+            elif stat.st_size < offset or not head.startswith(saved_head):
+                # 文件被截断（copytruncate 或手动清空后又写入）
+                offset = 0
+
+            if stat.st_size == offset and inode == stat.st_ino:
+                return 0
+
+            offset, count = _import_file(session, SOURCE_LOG_FILE, offset)
+            added += count
+            _save_checkpoint(session, stat.st_ino, offset, head)
+            session.commit()
+            return added
+
+        except Exception as e:
+            print(f"❌ 同步失败: {e}")
+            session.rollback()
+            return 0
+        finally:
+            session.close()
+
+
+def start_sync_thread(interval=SYNC_INTERVAL):
+    """
+    启动后台同步线程（不在请求处理中同步）
+
+    调用前需已执行 init_db()
+
+    Returns:
+        threading.Thread
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            sync_logs(latest_only=True)
+
+    thread = threading.Thread(target=run, name='jsonl-sync', daemon=True)
+    thread.start()
+    return thread
 
-    except Exception as e:
-        print(f"❌ 同步失败: {e}")
-        session.rollback()
-    finally:
-        session.close()
 
 if __name__ == '__main__':
-    sync_logs()
+    # python3 sync.py         只导入新追加的行
+    # python3 sync.py --full  从头重新读取整个文件（已存在的记录会被跳过）
+    full = '--full' in sys.argv[1:]
+    print(f"🔄 开始同步日志: {SOURCE_LOG_FILE} ({'全量' if full else '增量'})")
+    if not os.path.exists(SOURCE_LOG_FILE):
+        print("📭 日志文件不存在")
+    else:
+        init_db()
+        added = sync_logs(latest_only=not full)
+        print(f"✅ 同步完成，新增 {added} 条记录")
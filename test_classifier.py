@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+dialer/classifier.py 错误分类测试
+使用 logs/ 下采集的真实 pppd 日志和 dialer/simulated.py 的模拟失败日志
+"""
+
+import os
+import tempfile
+import unittest
+
+from dialer.classifier import DEFAULT_ERROR, PppErrorClassifier
+from dialer.simulated import SIMULATED_FAILURES
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+
+# 发出 PADI 后未收到 PADO、超时退出的日志
+PADO_TIMEOUT_LOG = os.path.join(LOG_DIR, 'pppoe_1769768791_enp7s0.2001.log')
+# PAP 认证失败的日志
+PAP_FAILED_LOG = os.path.join(LOG_DIR, 'pppoe_1769471220_enp3s0.log')
+
+
+class ClassifierCapturedLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.classifier = PppErrorClassifier()
+
+    def test_discovery_without_pado(self):
+        """只发出 PADI、尚未超时（rp-pppoe 日志写作 "PPPOE Discovery"）时命中 no_pado"""
+        with open(PADO_TIMEOUT_LOG, encoding='utf-8') as f:
+            # 前 3 行为 PADI 报文，此后才是等待 PADO 超时的信息
+            head = f.readlines()[:3]
+        stream = self.classifier.stream()
+        stream.feed_lines(head)
+        self.assertEqual(stream.matched_rule().name, 'no_pado')
+        self.assertEqual(stream.result()[0], '630')
+        self.assertIsNone(stream.terminal())
+
+    def test_pado_timeout_log(self):
+        """超时信息优先于 no_pado"""
+        self.assertEqual(self.classifier.classify_file(PADO_TIMEOUT_LOG)[0], '678')
+
+    def test_pap_failed_log(self):
+        """收到过 PADO 的日志不命中 no_pado"""
+        stream = self.classifier.stream()
+        with open(PAP_FAILED_LOG, encoding='utf-8') as f:
+            stream.feed(f.read())
+        self.assertEqual(stream.result()[0], '691')
+        self.assertIn('i:Recv PPPoE Discovery', stream.seen)
+
+    def test_missing_file(self):
+        self.assertEqual(self.classifier.classify_file(os.path.join(LOG_DIR, 'missing.log')), DEFAULT_ERROR)
+
+
+class ClassifierRuleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.classifier = PppErrorClassifier()
+
+    def _classify(self, code):
+        stream = self.classifier.stream()
+        stream.feed_lines(SIMULATED_FAILURES[code][1])
+        return stream
+
+    def test_codes_and_terminal(self):
+        for code, rule in (('691', 'pap_auth_failed'), ('646', 'chap_auth_failed'),
+                           ('678', 'pado_timeout'), ('734', 'lcp_terminated')):
+            with self.subTest(code=code):
+                stream = self._classify(code)
+                self.assertEqual(stream.result()[0], code)
+                self.assertEqual(stream.terminal().name, rule)
+
+    def test_auth_nak_detail(self):
+        code, message = self._classify('691').result()
+        self.assertEqual(code, '691')
+        self.assertIn('password incorrect', message)
+
+    def test_no_match(self):
+        self.assertEqual(self.classifier.classify_lines(SIMULATED_FAILURES['815'][1]), DEFAULT_ERROR)
+
+    def test_rules_file_overrides_builtin(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rules.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('[{"name": "pado_timeout", "code": "999", "message": "x", '
+                        '"any": ["Timeout waiting for PADO packets"]}]')
+            classifier = PppErrorClassifier(rules_file=path)
+            self.assertEqual(classifier.classify_lines(SIMULATED_FAILURES['678'][1]), ('999', 'x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
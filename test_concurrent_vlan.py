@@ -27,7 +27,7 @@ def activate_account(index):
         
         payload = {
             "name": f"测试用户{index}",
-            "role": "student",
+            "role": "学生",
             "isp": ISP,
             "username": USERNAME,
             "password": PASSWORD
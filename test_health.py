@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+dialer/health.py 接口健康度与 dialer/scheduler.py 接口选择测试
+使用临时锁目录，不访问 /var/run 下的接口锁
+"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+from dialer import health as health_module
+from dialer.health import InterfaceHealth
+from dialer.scheduler import DialScheduler
+
+IFACES = ['enp1s0', 'enp2s0', 'enp3s0']
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class InterfaceHealthTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patch = mock.patch.object(health_module.time, 'monotonic', self.clock)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.health = InterfaceHealth(quarantine_after=3, quarantine_seconds=60)
+
+    def _use(self, iface, error_code=None, **kwargs):
+        self.health.mark_used(iface)
+        self.health.record(iface, error_code, **kwargs)
+        self.clock.now += 1
+
+    def test_least_recently_used_first(self):
+        self.assertEqual(self.health.order(IFACES), IFACES)
+        self._use('enp1s0')
+        self._use('enp3s0')
+        self.assertEqual(self.health.order(IFACES), ['enp2s0', 'enp1s0', 'enp3s0'])
+
+    def test_quarantine_after_consecutive_link_failures(self):
+        self._use('enp1s0', '678')
+        self._use('enp1s0', '678')
+        self.assertEqual(self.health.quarantined(), [])
+        self._use('enp1s0', '678')
+        self.assertEqual(self.health.quarantined(), ['enp1s0'])
+        self.assertNotIn('enp1s0', self.health.order(IFACES))
+        self.assertEqual(self.health.snapshot()['enp1s0']['quarantined_for'], 59)
+
+    def test_account_failures_do_not_quarantine(self):
+        """691 等账号类失败说明链路可用，不计入隔离"""
+        for code in ('678', '678', '691', '678'):
+            self._use('enp1s0', code)
+        self.assertEqual(self.health.quarantined(), [])
+
+    def test_quarantine_expiry(self):
+        for _ in range(3):
+            self._use('enp1s0', '630')
+        # _use 每次拨号后时钟前进 1 秒，隔离已过去 1 秒
+        self.clock.now += 58
+        self.assertEqual(self.health.quarantined(), ['enp1s0'])
+        self.clock.now += 1
+        self.assertEqual(self.health.quarantined(), [])
+        self.assertIn('enp1s0', self.health.order(IFACES))
+        # 到期后的试探拨号仍失败，立即重新隔离
+        self._use('enp1s0', '630')
+        self.assertEqual(self.health.quarantined(), ['enp1s0'])
+
+    def test_success_clears_quarantine(self):
+        for _ in range(3):
+            self._use('enp1s0', '678')
+        self.health.record('enp1s0', None)
+        self.assertEqual(self.health.quarantined(), [])
+
+    def test_all_quarantined_still_ordered(self):
+        """全部接口都被隔离时仍按健康度尝试"""
+        for iface in IFACES[:2]:
+            for _ in range(3):
+                self._use(iface, '678')
+        self.assertEqual(self.health.order(IFACES[:2]), ['enp1s0', 'enp2s0'])
+
+    def test_slow_pado_and_carrier_lower_priority(self):
+        for iface in IFACES:
+            self.health.mark_used(iface)
+        self.clock.now += 10
+        self.health.record('enp1s0', None, pado_seconds=0.5)
+        self.health.record('enp2s0', None, pado_seconds=0.05)
+        self.health.set_carrier('enp3s0', False)
+        self.assertEqual(self.health.order(IFACES), ['enp2s0', 'enp1s0', 'enp3s0'])
+        self.assertFalse(self.health.snapshot()['enp3s0']['carrier'])
+
+
+class SchedulerHealthTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_acquisitions_rotate_across_interfaces(self):
+        """串行拨号依次使用各接口，而不是总落在第一个接口上"""
+        scheduler = DialScheduler(self.tmp.name, queue_timeout=1, health=InterfaceHealth())
+        used = []
+        for _ in range(2 * len(IFACES)):
+            iface, lock_fd = scheduler.acquire(IFACES)
+            used.append(iface)
+            scheduler.release(iface, lock_fd)
+        self.assertEqual(used, IFACES * 2)
+
+    def test_quarantined_interface_skipped(self):
+        health = InterfaceHealth(quarantine_after=1, quarantine_seconds=60)
+        health.record('enp1s0', '678')
+        scheduler = DialScheduler(self.tmp.name, queue_timeout=1, health=health)
+        iface, lock_fd = scheduler.acquire(IFACES)
+        self.assertEqual(iface, 'enp2s0')
+        self.assertEqual(scheduler.stats()['quarantined'], ['enp1s0'])
+        scheduler.release(iface, lock_fd)
+
+    def test_without_health_uses_config_order(self):
+        scheduler = DialScheduler(self.tmp.name, queue_timeout=1)
+        for _ in range(2):
+            iface, lock_fd = scheduler.acquire(IFACES)
+            self.assertEqual(iface, 'enp1s0')
+            scheduler.release(iface, lock_fd)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+isp_registry.py 运营商规则表测试
+"""
+
+import unittest
+
+import isp_registry
+from isp_registry import UsernameFormatError
+
+
+class ValidateUsernameTest(unittest.TestCase):
+
+    def _error(self, isp, username):
+        try:
+            isp_registry.validate_username(isp, username)
+            return None
+        except UsernameFormatError as e:
+            return str(e)
+
+    def test_error_codes(self):
+        cases = [
+            ('cdu', '2023012345', None),
+            ('cdu', '12345', 'INVALID_STUDENT_ID'),
+            ('cdu', '2023012345a', 'INVALID_STUDENT_ID'),
+            ('cmccgx', '13800138000', None),
+            ('cmccgx', 'scxy13800138000', 'INVALID_CMCC_MOBILE'),
+            ('96301', '1891234567', 'INVALID_TELECOM_MOBILE'),
+            ('10010', '23012345678', 'INVALID_UNICOM_MOBILE'),
+            ('10010', '13012345678\n', 'INVALID_UNICOM_MOBILE'),
+            ('direct', 'anything goes', None),
+            ('unknown', 'abc', None),
+        ]
+        for isp, username, expected in cases:
+            with self.subTest(isp=isp, username=username):
+                self.assertEqual(self._error(isp, username), expected)
+
+
+class ApplySuffixTest(unittest.TestCase):
+
+    def test_suffix(self):
+        cases = [
+            ('cdu', '2023012345', '2023012345@cdu'),
+            ('cmccgx', '13800138000', '13800138000@cmccgx'),
+            ('cmccgx', 'scxy13800138000', 'scxy13800138000@cmccgx'),
+            # scxy 前缀账号总是移动账号，与选择的 isp 无关
+            ('cdu', 'scxy13800138000', 'scxy13800138000@cmccgx'),
+            ('96301', '18912345678', '18912345678@96301'),
+            ('10010', '13012345678', '13012345678@10010'),
+            ('unknown', '2023012345', '2023012345@cdu'),
+            ('cdu', '2023012345@cdu', '2023012345@cdu'),
+            ('direct', '2023012345', '2023012345'),
+            ('cdu', 'abc', 'abc'),
+        ]
+        for isp, username, expected in cases:
+            with self.subTest(isp=isp, username=username):
+                self.assertEqual(isp_registry.apply_suffix(isp, username), expected)
+
+
+class DisplayTest(unittest.TestCase):
+
+    def test_lookup_tables(self):
+        self.assertEqual(isp_registry.display_name('96301'), '中国电信')
+        self.assertEqual(isp_registry.display_name('other'), 'other')
+        self.assertEqual(isp_registry.display_name('other', '未知'), '未知')
+        self.assertEqual(set(isp_registry.COLORS), set(isp_registry.DISPLAY_NAMES.values()))
+        self.assertEqual(list(isp_registry.DISPLAY_NAMES), [isp.key for isp in isp_registry.ISPS])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+dialer.metrics 测试
+"""
+
+import unittest
+
+from dialer.metrics import DialMetrics
+
+
+class RenderTest(unittest.TestCase):
+
+    def test_gauges_and_counters_have_their_own_type(self):
+        body = DialMetrics().render(
+            {"pppoe_dial_queue_depth": ("Queue depth.", 3)},
+            counters={"pppoe_activation_log_spilled_total": ("Spilled records.", 7)}
+        )
+        lines = body.splitlines()
+        self.assertIn('# TYPE pppoe_dial_queue_depth gauge', lines)
+        self.assertIn('pppoe_dial_queue_depth 3', lines)
+        self.assertIn('# TYPE pppoe_activation_log_spilled_total counter', lines)
+        self.assertIn('pppoe_activation_log_spilled_total 7', lines)
+
+    def test_observed_dials_are_counted_by_result(self):
+        metrics = DialMetrics()
+        metrics.observe_dial('eth0.1', 'cdu', {"pado": 0.05, "total": 0.3}, 'success')
+        metrics.observe_dial('eth0.1', 'cdu', {"pado": None, "total": 0.2}, '678')
+        body = metrics.render()
+        self.assertIn('pppoe_dial_total{iface="eth0.1",isp="cdu",result="success"} 1', body)
+        self.assertIn('pppoe_dial_total{iface="eth0.1",isp="cdu",result="678"} 1', body)
+        self.assertIn('pppoe_dial_phase_seconds_count{phase="pado",iface="eth0.1"} 1', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
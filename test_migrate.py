@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+models.migrate_db 表结构升级测试
+使用临时数据库模拟升级前的旧表，不访问 /opt/pppoe-activation 下的数据
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy import create_engine, inspect, text
+
+from models import migrate_db, timestamp_to_epoch
+
+PROCESSES = 4
+
+LEGACY_SCHEMA = (
+    'CREATE TABLE activation_logs (id INTEGER PRIMARY KEY, name VARCHAR(50), role VARCHAR(20), '
+    'isp VARCHAR(20), username VARCHAR(100), success BOOLEAN, ip VARCHAR(20), mac VARCHAR(20), '
+    'error_code VARCHAR(10), error_message VARCHAR(200), timestamp VARCHAR(30))'
+)
+
+
+class MigrateDbTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.url = f"sqlite:///{os.path.join(self.tmp.name, 'legacy.db')}"
+        engine = create_engine(self.url)
+        with engine.begin() as conn:
+            conn.execute(text(LEGACY_SCHEMA))
+            conn.execute(
+                text("INSERT INTO activation_logs (isp, success, timestamp) VALUES ('cdu', 1, :ts)"),
+                [{"ts": f"2026-10-17 12:00:{i % 60:02d}"} for i in range(250)]
+            )
+        engine.dispose()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _check_migrated(self, engine):
+        columns = {col['name'] for col in inspect(engine).get_columns('activation_logs')}
+        self.assertIn('ts_epoch', columns)
+        self.assertIn('record_hash', columns)
+        indexes = {index['name'] for index in inspect(engine).get_indexes('activation_logs')}
+        self.assertIn('ix_activation_logs_ts_epoch', indexes)
+        self.assertIn('ix_activation_logs_username_ts', indexes)
+        self.assertIn('ux_activation_logs_record_hash', indexes)
+        with engine.connect() as conn:
+            rows = conn.execute(text('SELECT timestamp, ts_epoch FROM activation_logs')).fetchall()
+        self.assertEqual(len(rows), 250)
+        self.assertTrue(all(epoch == timestamp_to_epoch(ts) for ts, epoch in rows))
+
+    def test_idempotent(self):
+        engine = create_engine(self.url)
+        migrate_db(engine, batch_size=100)
+        migrate_db(engine, batch_size=100)
+        self._check_migrated(engine)
+        engine.dispose()
+
+    def test_concurrent_startups(self):
+        """多个进程同时启动时只有一个执行迁移，其他进程不因重复增加列而退出"""
+        engines = [create_engine(self.url) for _ in range(PROCESSES)]
+        barrier = threading.Barrier(PROCESSES)
+        errors = []
+
+        def run(engine):
+            barrier.wait()
+            try:
+                migrate_db(engine, batch_size=10)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(engine,)) for engine in engines]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(errors, [])
+        self._check_migrated(engines[0])
+        for engine in engines:
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
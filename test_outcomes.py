@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+dialer/outcomes.py 拨号结果缓存测试
+"""
+
+import unittest
+from unittest import mock
+
+from dialer import outcomes
+from dialer.outcomes import OutcomeCache
+
+SUCCESS = {"success": True, "ip": "10.0.0.1"}
+AUTH_FAILED = {"success": False, "error_code": "691", "message": "账号或密码错误"}
+NO_PADO = {"success": False, "error_code": "678", "message": "远程计算机无响应"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class OutcomeCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patch = mock.patch.object(outcomes.time, 'monotonic', self.clock)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_disabled_by_default(self):
+        cache = OutcomeCache()
+        self.assertIsNone(cache.key('cdu', '2026000001@cdu', 'pw'))
+        self.assertFalse(cache.put(None, SUCCESS))
+
+    def test_hit_returns_copy(self):
+        cache = OutcomeCache(ttl=30)
+        key = cache.key('cdu', ' 2026000001@CDU ', 'pw')
+        self.assertTrue(cache.put(key, SUCCESS))
+        self.clock.now += 12
+        cached = cache.get(cache.key('cdu', '2026000001@cdu', 'pw'))
+        self.assertEqual(cached["ip"], "10.0.0.1")
+        self.assertTrue(cached["cached"])
+        self.assertEqual(cached["cached_age"], 12)
+        cached["ip"] = "changed"
+        self.assertEqual(cache.get(key)["ip"], "10.0.0.1")
+        self.assertEqual(cache.stats(), {"size": 1, "hits": 2, "misses": 0})
+
+    def test_ttl_expiry(self):
+        cache = OutcomeCache(ttl=30, failure_ttl=5)
+        success_key = cache.key('cdu', '2026000001@cdu', 'pw')
+        failure_key = cache.key('cdu', '2026000002@cdu', 'pw')
+        cache.put(success_key, SUCCESS)
+        cache.put(failure_key, AUTH_FAILED)
+        self.clock.now += 5
+        self.assertIsNone(cache.get(failure_key))
+        self.assertIsNotNone(cache.get(success_key))
+        self.clock.now += 25
+        self.assertIsNone(cache.get(success_key))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_lru_eviction(self):
+        cache = OutcomeCache(ttl=30, max_entries=2)
+        keys = [cache.key('cdu', f'202600000{i}@cdu', 'pw') for i in range(3)]
+        cache.put(keys[0], SUCCESS)
+        cache.put(keys[1], SUCCESS)
+        # 访问过的条目移到队尾，淘汰最久未使用的 keys[1]
+        self.assertIsNotNone(cache.get(keys[0]))
+        cache.put(keys[2], SUCCESS)
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_non_cacheable_result_clears_entry(self):
+        cache = OutcomeCache(ttl=30)
+        key = cache.key('cdu', '2026000001@cdu', 'pw')
+        cache.put(key, AUTH_FAILED)
+        self.assertFalse(cache.put(key, NO_PADO))
+        self.assertIsNone(cache.get(key))
+
+    def test_password_change_misses(self):
+        cache = OutcomeCache(ttl=30)
+        cache.put(cache.key('cdu', '2026000001@cdu', 'old'), AUTH_FAILED)
+        self.assertIsNone(cache.get(cache.key('cdu', '2026000001@cdu', 'new')))
+        self.assertNotIn('old', repr(cache.key('cdu', '2026000001@cdu', 'old')))
+
+    def test_evict(self):
+        cache = OutcomeCache(ttl=30)
+        key = cache.key('cdu', '2026000001@cdu', 'pw')
+        cache.put(key, SUCCESS)
+        self.assertTrue(cache.evict(key))
+        self.assertFalse(cache.evict(key))
+
+
+
+class NormalizeUsernameTest(unittest.TestCase):
+
+    def test_only_suffix_is_case_insensitive(self):
+        self.assertEqual(outcomes.normalize_username(' AbC123@CDU '), 'AbC123@cdu')
+        self.assertNotEqual(outcomes.normalize_username('AbC123@cdu'), outcomes.normalize_username('abc123@cdu'))
+
+    def test_without_suffix(self):
+        self.assertEqual(outcomes.normalize_username(' AbC123 '), 'AbC123')
+        self.assertEqual(outcomes.normalize_username(None), '')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+dialer/readiness.py 日志跟踪测试
+使用 logs/ 下采集的真实 pppd 日志和 dialer/simulated.py 的模拟失败日志
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from dialer.classifier import PppErrorClassifier
+from dialer.readiness import PppLogWatcher
+from dialer.simulated import SIMULATED_FAILURES
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+
+# 拨号成功的日志
+SUCCESS_LOG = os.path.join(LOG_DIR, 'pppoe_1769398051_enp7s0.log')
+
+
+class WatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log_file = os.path.join(self.tmp.name, 'pppd.log')
+
+    def _write(self, lines):
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def test_success_log_phases(self):
+        with open(SUCCESS_LOG, encoding='utf-8') as f:
+            self._write(f.read().splitlines())
+        phases = []
+        with PppLogWatcher(self.log_file, on_phase=lambda phase, **info: phases.append(phase),
+                           classifier=PppErrorClassifier()) as watcher:
+            self.assertEqual(watcher.wait_for_ip(1), '10.16.50.120')
+            self.assertEqual(watcher.ppp_interface, 'ppp0')
+            self.assertIsNone(watcher.abort_reason)
+        self.assertEqual(phases, ['pado', 'auth', 'ip'])
+
+    def test_terminal_rule_aborts_wait(self):
+        """终止性错误出现后立即放弃等待 IP"""
+        for code, rule in (('691', 'pap_auth_failed'), ('646', 'chap_auth_failed'),
+                           ('678', 'pado_timeout'), ('734', 'lcp_terminated')):
+            with self.subTest(code=code):
+                open(self.log_file, 'w').close()
+                self._write(SIMULATED_FAILURES[code][1])
+                with PppLogWatcher(self.log_file, classifier=PppErrorClassifier()) as watcher:
+                    started = time.monotonic()
+                    self.assertIsNone(watcher.wait_for_ip(10))
+                    self.assertLess(time.monotonic() - started, 1)
+                    self.assertEqual(watcher.abort_reason, f'error:{rule}')
+                    self.assertEqual(watcher.finish()[0], code)
+
+    def test_non_terminal_rule_keeps_waiting(self):
+        """非终止性错误（如 815）等到超时"""
+        self._write(SIMULATED_FAILURES['815'][1])
+        with PppLogWatcher(self.log_file, classifier=PppErrorClassifier()) as watcher:
+            self.assertIsNone(watcher.wait_for_ip(0.2))
+            self.assertIsNone(watcher.abort_reason)
+
+    def test_process_exit_aborts_wait(self):
+        open(self.log_file, 'w').close()
+        proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+        self.addCleanup(proc.wait)
+        with PppLogWatcher(self.log_file, classifier=PppErrorClassifier()) as watcher:
+            started = time.monotonic()
+            self.assertIsNone(watcher.wait_for_ip(10, proc=proc))
+            self.assertLess(time.monotonic() - started, 5)
+            self.assertEqual(watcher.abort_reason, 'exited')
+
+
+if __name__ == '__main__':
+    unittest.main()
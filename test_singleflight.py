@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+dialer/singleflight.py 同账号并发请求合并测试
+"""
+
+import threading
+import time
+import unittest
+
+from dialer.singleflight import SingleFlight
+
+WAITERS = 8
+WAIT_TIMEOUT = 5
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _dial(self, report):
+        self.calls += 1
+        report('pado', seconds=0.05)
+        self.started.set()
+        self.assertTrue(self.release.wait(WAIT_TIMEOUT))
+        report('ip', ip='10.0.0.1')
+        return {"success": True, "ip": "10.0.0.1"}
+
+    def _run_leader(self, results, secret='pw', report=None):
+        def run():
+            results.append(self.flight.run('2026000001@cdu', secret, self._dial, report))
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.assertTrue(self.started.wait(WAIT_TIMEOUT))
+        return thread
+
+    def _wait_followers(self, count):
+        # 挂靠计数在 SingleFlight 的锁内更新
+        for _ in range(500):
+            with self.flight._lock:
+                flight = self.flight._flights.get('2026000001@cdu')
+                if flight is not None and flight.followers >= count:
+                    return
+            time.sleep(0.01)
+        self.fail(f"挂靠请求数未达到 {count}")
+
+    def test_fan_out_one_dial_to_waiters(self):
+        """一次拨号的结果返回给 N 个并发请求"""
+        results = []
+        threads = [self._run_leader(results)]
+        for _ in range(WAITERS - 1):
+            thread = threading.Thread(
+                target=lambda: results.append(self.flight.run('2026000001@cdu', 'pw', self._dial)))
+            thread.start()
+            threads.append(thread)
+        self._wait_followers(WAITERS - 1)
+        self.assertEqual(self.flight.inflight(), 1)
+        self.release.set()
+        for thread in threads:
+            thread.join(WAIT_TIMEOUT)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(results), WAITERS)
+        self.assertEqual(sum(dialed for _, dialed in results), 1)
+        self.assertTrue(all(result["ip"] == "10.0.0.1" for result, _ in results))
+        self.assertEqual(self.flight.shared, WAITERS - 1)
+        self.assertEqual(self.flight.inflight(), 0)
+
+    def test_follower_receives_past_and_future_phases(self):
+        results = []
+        leader_phases, follower_phases = [], []
+        leader = self._run_leader(results, report=lambda phase, **info: leader_phases.append(phase))
+        follower = threading.Thread(target=lambda: results.append(self.flight.run(
+            '2026000001@cdu', 'pw', self._dial, lambda phase, **info: follower_phases.append(phase))))
+        follower.start()
+        self._wait_followers(1)
+        self.release.set()
+        leader.join(WAIT_TIMEOUT)
+        follower.join(WAIT_TIMEOUT)
+        self.assertEqual(leader_phases, ['pado', 'ip'])
+        self.assertEqual(follower_phases, ['pado', 'ip'])
+
+    def test_report_runs_outside_global_lock(self):
+        """阶段回调里访问 SingleFlight 不会死锁"""
+        results, seen = [], []
+        leader = self._run_leader(results, report=lambda phase, **info: seen.append((phase, self.flight.inflight())))
+        self.release.set()
+        leader.join(WAIT_TIMEOUT)
+        self.assertFalse(leader.is_alive())
+        self.assertEqual(seen, [('pado', 1), ('ip', 1)])
+
+    def test_different_password_dials_again(self):
+        """密码不同的请求等当前拨号结束后自行拨号，不共享结果"""
+        results = []
+        leader = self._run_leader(results)
+        other = threading.Thread(target=lambda: results.append(
+            self.flight.run('2026000001@cdu', 'other', lambda report: {"success": False, "error_code": "691"})))
+        other.start()
+        other.join(0.2)
+        self.assertTrue(other.is_alive())
+        self.release.set()
+        leader.join(WAIT_TIMEOUT)
+        other.join(WAIT_TIMEOUT)
+        self.assertEqual(sorted(result.get("error_code") or '' for result, _ in results), ['', '691'])
+        self.assertTrue(all(dialed for _, dialed in results))
+        self.assertEqual(self.flight.shared, 0)
+
+    def test_error_propagates_to_followers(self):
+        errors = []
+
+        def dial(report):
+            self.started.set()
+            self.assertTrue(self.release.wait(WAIT_TIMEOUT))
+            raise RuntimeError("pppd 启动失败")
+
+        def run():
+            try:
+                self.flight.run('2026000001@cdu', 'pw', dial)
+            except RuntimeError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(3)]
+        threads[0].start()
+        self.assertTrue(self.started.wait(WAIT_TIMEOUT))
+        for thread in threads[1:]:
+            thread.start()
+        self._wait_followers(2)
+        self.release.set()
+        for thread in threads:
+            thread.join(WAIT_TIMEOUT)
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(self.flight.inflight(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
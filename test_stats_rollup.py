@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+stats_rollup.py 汇总表重建测试
+使用临时数据库，不访问 /opt/pppoe-activation 下的数据
+"""
+
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import stats_rollup
+from models import ActivationLog, Base, Config
+
+
+def _log(session, success=True, isp='cdu', timestamp='2026-10-17 12:00:00'):
+    entry = ActivationLog(name='张三', role='学生', isp=isp, username='2026000001@cdu',
+                          success=success, error_code=None if success else '691', timestamp=timestamp)
+    session.add(entry)
+    session.flush()
+    stats_rollup.record_activation(session, entry)
+
+
+class EnsureBuiltTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'test.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def _insert_history(self, count):
+        # 升级前的历史日志：只有 activation_logs，没有汇总
+        for _ in range(count):
+            self.session.add(ActivationLog(isp='cdu', role='学生', success=True, timestamp='2026-10-16 08:00:00'))
+        self.session.commit()
+
+    def test_rebuilds_history_even_if_new_records_were_rolled_up_first(self):
+        self._insert_history(3)
+        # app.py 先于 dashboard.py 启动并写入了一条新记录，汇总表已不为空
+        _log(self.session, success=False)
+        self.session.commit()
+
+        self.assertTrue(stats_rollup.ensure_built(self.engine))
+        self.assertEqual(stats_rollup.success_totals(self.session), (4, 3))
+        self.assertEqual(stats_rollup.count_by_day(self.session), {'2026-10-16': 3, '2026-10-17': 1})
+        self.assertIsNotNone(self.session.query(Config).filter_by(name=stats_rollup.BUILT_MARKER).first())
+
+        # 已建立后不再重建，后续记录照常累加
+        self.assertFalse(stats_rollup.ensure_built(self.engine))
+        _log(self.session)
+        self.session.commit()
+        self.assertEqual(stats_rollup.success_totals(self.session), (5, 4))
+
+    def test_rebuild_replaces_existing_rows(self):
+        _log(self.session)
+        _log(self.session)
+        self.session.commit()
+        self.session.query(ActivationLog).filter(ActivationLog.id == 1).delete()
+        self.session.commit()
+        self.assertEqual(stats_rollup.rebuild(self.engine), 1)
+        self.assertEqual(stats_rollup.success_totals(self.session), (1, 1))
+
+    def test_empty_database(self):
+        self.assertTrue(stats_rollup.ensure_built(self.engine))
+        self.assertEqual(stats_rollup.success_totals(self.session), (0, 0))
+        self.assertFalse(stats_rollup.ensure_built(self.engine))
+
+
+if __name__ == '__main__':
+    unittest.main()
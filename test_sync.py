@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+sync.py 导入去重测试
+使用临时数据库和临时 JSONL 文件，不访问 /opt/pppoe-activation 下的数据
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import sessionmaker
+
+import stats_rollup
+import sync
+from db_engine import create_sqlite_engine
+from models import ActivationLog, Base, migrate_db
+
+
+def _line(**fields):
+    record = {
+        "name": "张三", "role": "学生", "isp": "cdu", "username": "2026000001@cdu",
+        "success": True, "ip": "10.0.0.1", "mac": "02:00:00:00:00:01",
+        "error_code": None, "error_message": None, "timestamp": "2026-10-17 12:00:00"
+    }
+    record.update(fields)
+    return json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class SyncDedupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_sqlite_engine(os.path.join(self.tmp.name, 'test.db'))
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.log_file = os.path.join(self.tmp.name, 'activation_log.jsonl')
+        for patch in (mock.patch.object(sync, 'SessionLocal', self.session_factory),
+                      mock.patch.object(sync, 'SOURCE_LOG_FILE', self.log_file),
+                      mock.patch.object(sync, 'ROTATED_LOG_FILE', self.log_file + '.1')):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def _write(self, *lines):
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+
+    def _count(self):
+        session = self.session_factory()
+        try:
+            return session.query(ActivationLog).count(), stats_rollup.success_totals(session)[0]
+        finally:
+            session.close()
+
+    def test_same_second_records_with_distinct_ids_are_kept(self):
+        """同一账号同一秒的两条记录（如合并拨号的重复请求）都导入"""
+        self._write(_line(record_id='a' * 32), _line(record_id='b' * 32))
+        self.assertEqual(sync.sync_logs(), 2)
+        self.assertEqual(self._count(), (2, 2))
+
+    def test_full_resync_skips_existing_records(self):
+        """重新全量读取时已导入的记录由唯一索引跳过，汇总表不重复累加"""
+        self._write(_line(record_id='a' * 32), _line(username='2026000002@cdu', record_id='c' * 32))
+        self.assertEqual(sync.sync_logs(), 2)
+        self.assertEqual(sync.sync_logs(), 0)
+        self.assertEqual(self._count(), (2, 2))
+
+    def test_incremental_sync_imports_only_new_lines(self):
+        self._write(_line(record_id='a' * 32))
+        self.assertEqual(sync.sync_logs(latest_only=True), 1)
+        self._write(_line(record_id='b' * 32))
+        self.assertEqual(sync.sync_logs(latest_only=True), 1)
+        self.assertEqual(self._count(), (2, 2))
+
+    def test_legacy_lines_without_record_id_dedup_by_content(self):
+        """旧版 JSONL（没有 record_id）内容完全相同的行只导入一次"""
+        self._write(_line(), _line(), _line(success=False, error_code='691'))
+        self.assertEqual(sync.sync_logs(), 2)
+
+
+class MigrateRecordHashTest(unittest.TestCase):
+
+    def test_backfill_keeps_identical_legacy_rows(self):
+        """旧库增加 record_hash 列：内容相同的行都保留，并建立唯一索引"""
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_sqlite_engine(os.path.join(tmp, 'legacy.db'))
+            with engine.begin() as conn:
+                conn.execute(text(
+                    'CREATE TABLE activation_logs (id INTEGER PRIMARY KEY, name VARCHAR(50), role VARCHAR(20), '
+                    'isp VARCHAR(20), username VARCHAR(100), success BOOLEAN, ip VARCHAR(20), mac VARCHAR(20), '
+                    'error_code VARCHAR(10), error_message VARCHAR(200), timestamp VARCHAR(30))'
+                ))
+                for _ in range(2):
+                    conn.execute(text(
+                        "INSERT INTO activation_logs (name, role, isp, username, success, timestamp) "
+                        "VALUES ('张三', '学生', 'cdu', '2026000001@cdu', 1, '2026-10-17 12:00:00')"
+                    ))
+
+            migrate_db(engine)
+            migrate_db(engine)  # 可重复执行
+
+            with engine.connect() as conn:
+                hashes = [row[0] for row in conn.execute(text('SELECT record_hash FROM activation_logs'))]
+            self.assertEqual(len(set(hashes)), 2)
+            self.assertNotIn(None, hashes)
+            indexes = {index['name']: index for index in inspect(engine).get_indexes('activation_logs')}
+            self.assertTrue(indexes['ux_activation_logs_record_hash']['unique'])
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
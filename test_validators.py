@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+validators/fast.py 快速校验测试
+与 jsonschema.Draft7Validator 逐条核对错误列表（路径和措辞）
+"""
+
+import copy
+import random
+import unittest
+
+from validators import SchemaInvalid, validate_activate_payload
+from validators.activate import ACTIVATE_SCHEMA
+from validators.fast import UnsupportedSchema, compile_schema
+
+try:
+    from jsonschema import Draft7Validator
+except ImportError:
+    Draft7Validator = None
+
+# 旧版 schema 的写法：lang 必填，移动账号必须带 cmcc_type（allOf / if / then）
+CONDITIONAL_SCHEMA = copy.deepcopy(ACTIVATE_SCHEMA)
+CONDITIONAL_SCHEMA["required"] = CONDITIONAL_SCHEMA["required"] + ["lang"]
+CONDITIONAL_SCHEMA["allOf"] = [{
+    "if": {"properties": {"isp": {"const": "cmccgx"}}, "required": ["isp"]},
+    "then": {"required": ["cmcc_type"]}
+}]
+
+VALID_PAYLOADS = [
+    {"name": "张三", "role": "学生", "isp": "cdu", "username": "2023012345", "password": "pw", "lang": "zh"},
+    {"name": "李四", "role": "教职工", "isp": "cmccgx", "cmcc_type": "scxy", "username": "scxy13800138000",
+     "password": "pw", "lang": "zh", "client": {"ua": "Mozilla/5.0", "timezone": "Asia/Shanghai"}},
+    {"name": "王五", "role": "外包", "isp": "direct", "username": "user@example", "password": "pw", "lang": "en"},
+]
+
+INVALID_PAYLOADS = [
+    None,
+    [],
+    "payload",
+    {},
+    {"name": "", "role": "student", "isp": "cdu", "username": "abc", "password": "pw", "lang": "ZH"},
+    {"name": "x" * 33, "role": "学生", "isp": "unknown", "username": 13800138000, "password": "p" * 129,
+     "lang": "zh", "debug": True, "extra": 1},
+    {"name": "张三", "role": "学生", "isp": "cmccgx", "username": "13800138000", "password": "pw",
+     "lang": "zh", "client": {"ua": "a" * 300, "os": "linux"}},
+    {"name": "张三", "role": "学生", "isp": "cdu", "username": "2023012345", "password": "pw",
+     "lang": "zh", "client": "ua"},
+]
+
+# 随机请求的字段取值（覆盖各关键字的边界和错误类型）
+FUZZ_VALUES = ['', 'a', 'abcd', 'x' * 33, 'x' * 65, 'p' * 129, '学生', '教职工', '外包', 'student',
+               'cdu', 'cmccgx', '96301', '10010', 'direct', 'zh', 'EN', 'en1', 'normal', 'scxy',
+               1, None, True, [], {}, {'ua': 'a'}, {'ua': 'a' * 300}, {'x': 1}, {'ua': 3}]
+FUZZ_KEYS = ['name', 'role', 'isp', 'cmcc_type', 'username', 'password', 'lang', 'client', 'foo']
+FUZZ_ROUNDS = 5000
+
+
+def draft7_errors(validator, payload) -> list:
+    """Draft7Validator 的错误列表（与 validate_activate_payload 的格式相同）"""
+    return [
+        {"path": ".".join(map(str, e.path)) if e.path else "root", "message": e.message}
+        for e in sorted(validator.iter_errors(payload), key=lambda e: e.path)
+    ]
+
+
+def fuzz_payloads(seed: int):
+    rng = random.Random(seed)
+    for _ in range(FUZZ_ROUNDS):
+        if rng.random() < 0.02:
+            yield rng.choice(FUZZ_VALUES)
+        else:
+            yield {key: rng.choice(FUZZ_VALUES) for key in FUZZ_KEYS if rng.random() < 0.7}
+
+
+@unittest.skipUnless(Draft7Validator is not None, "未安装 jsonschema")
+class FastValidatorParityTest(unittest.TestCase):
+
+    def _check(self, schema, payloads):
+        fast = compile_schema(schema)
+        draft7 = Draft7Validator(schema)
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                self.assertEqual(fast(payload), draft7_errors(draft7, payload))
+
+    def test_valid_payloads(self):
+        for schema in (ACTIVATE_SCHEMA, CONDITIONAL_SCHEMA):
+            fast = compile_schema(schema)
+            for payload in VALID_PAYLOADS:
+                self.assertEqual(fast(payload), [])
+        self._check(ACTIVATE_SCHEMA, VALID_PAYLOADS)
+        self._check(CONDITIONAL_SCHEMA, VALID_PAYLOADS)
+
+    def test_invalid_payloads(self):
+        self._check(ACTIVATE_SCHEMA, INVALID_PAYLOADS)
+        self._check(CONDITIONAL_SCHEMA, INVALID_PAYLOADS)
+
+    def test_random_payloads(self):
+        for schema in (ACTIVATE_SCHEMA, CONDITIONAL_SCHEMA):
+            fast = compile_schema(schema)
+            draft7 = Draft7Validator(schema)
+            mismatches = [payload for payload in fuzz_payloads(1)
+                          if fast(payload) != draft7_errors(draft7, payload)]
+            self.assertEqual(mismatches[:3], [])
+
+
+class FastValidatorTest(unittest.TestCase):
+
+    def test_conditional_required(self):
+        fast = compile_schema(CONDITIONAL_SCHEMA)
+        payload = dict(VALID_PAYLOADS[1])
+        del payload["cmcc_type"]
+        self.assertEqual(fast(payload), [{"path": "root", "message": "'cmcc_type' is a required property"}])
+
+    def test_unsupported_keyword(self):
+        with self.assertRaises(UnsupportedSchema):
+            compile_schema({"type": "object", "properties": {"n": {"type": "integer", "minimum": 1}}})
+        with self.assertRaises(UnsupportedSchema):
+            compile_schema({"type": "object", "additionalProperties": {"type": "string"}})
+
+    def test_validate_activate_payload(self):
+        validate_activate_payload(VALID_PAYLOADS[0])
+        with self.assertRaises(SchemaInvalid) as ctx:
+            validate_activate_payload({"name": "张三"})
+        self.assertIn({"path": "root", "message": "'password' is a required property"}, ctx.exception.errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,23 @@
 """
 PPPoE激活请求校验模块
-提供JSON Schema校验和ISP专属格式校验
+提供JSON Schema校验（导入时编译的快速校验，见 fast.py）和ISP专属格式校验
 """
 import json
-import re
+import logging
 from pathlib import Path
-from jsonschema import Draft7Validator, ValidationError
+
+try:
+    from jsonschema import Draft7Validator
+except ImportError:
+    # jsonschema 不在部署依赖中；快速校验不依赖它，只有 schema 无法编译时才需要
+    Draft7Validator = None
+
+import isp_registry
+from isp_registry import UsernameFormatError
+
+from .fast import compile_schema, UnsupportedSchema
+
+logger = logging.getLogger(__name__)
 
 # 加载JSON Schema
 SCHEMA_PATH = Path(__file__).parent.parent / "schemas" / "activate.schema.json"
@@ -13,7 +25,16 @@ SCHEMA_PATH = Path(__file__).parent.parent / "schemas" / "activate.schema.json"
 with open(SCHEMA_PATH, encoding="utf-8") as f:
     ACTIVATE_SCHEMA = json.load(f)
 
-validator = Draft7Validator(ACTIVATE_SCHEMA)
+validator = Draft7Validator(ACTIVATE_SCHEMA) if Draft7Validator is not None else None
+
+# 导入时编译的快速校验（结果与 Draft7Validator 一致）；schema 用到不支持的关键字时退回 Draft7Validator
+try:
+    fast_validator = compile_schema(ACTIVATE_SCHEMA)
+except UnsupportedSchema as e:
+    if validator is None:
+        raise RuntimeError(f"激活请求 schema 无法编译为快速校验，且未安装 jsonschema: {e}")
+    logger.warning(f"激活请求 schema 无法编译为快速校验，使用 Draft7Validator: {e}")
+    fast_validator = None
 
 
 class SchemaInvalid(Exception):
@@ -23,11 +44,6 @@ class SchemaInvalid(Exception):
         super().__init__("JSON schema validation failed")
 
 
-class UsernameFormatError(Exception):
-    """用户名格式错误异常"""
-    pass
-
-
 def validate_activate_payload(payload: dict):
     """
     校验激活请求的JSON Schema
@@ -38,6 +54,12 @@ def validate_activate_payload(payload: dict):
     Raises:
         SchemaInvalid: 当JSON Schema校验失败时
     """
+    if fast_validator is not None:
+        errors = fast_validator(payload)
+        if errors:
+            raise SchemaInvalid(errors)
+        return
+
     errors = sorted(validator.iter_errors(payload), key=lambda e: e.path)
 
     if errors:
@@ -52,33 +74,13 @@ def validate_activate_payload(payload: dict):
 
 def validate_username_by_isp(isp: str, username: str):
     """
-    根据ISP类型校验用户名格式
-    
+    根据ISP类型校验用户名格式（规则见 isp_registry.ISPS，正则在导入时预编译）
+
     Args:
         isp: ISP类型 (cdu, cmccgx, 96301, 10010, direct)
         username: 用户名
-        
+
     Raises:
         UsernameFormatError: 当用户名格式不符合ISP要求时
     """
-    if isp == "cmccgx":
-        # 中国移动：11位手机号，1开头
-        if not re.fullmatch(r"1\d{10}", username):
-            raise UsernameFormatError("INVALID_CMCC_MOBILE")
-
-    elif isp == "96301":
-        # 中国电信：11位手机号，1开头
-        if not re.fullmatch(r"1\d{10}", username):
-            raise UsernameFormatError("INVALID_TELECOM_MOBILE")
-
-    elif isp == "10010":
-        # 中国联通：11位手机号，1开头
-        if not re.fullmatch(r"1\d{10}", username):
-            raise UsernameFormatError("INVALID_UNICOM_MOBILE")
-
-    elif isp == "cdu":
-        # 校园网：6-12位数字
-        if not re.fullmatch(r"\d{6,12}", username):
-            raise UsernameFormatError("INVALID_STUDENT_ID")
-
-    # direct类型不做格式校验
+    isp_registry.validate_username(isp, username)
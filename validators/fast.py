@@ -0,0 +1,197 @@
+"""
+JSON Schema 快速校验
+把 schemas/activate.schema.json 在导入时编译成一组嵌套的检查函数：
+字段表、枚举集合、正则都预先生成，校验一次请求只做字典 / 集合查找和长度比较，
+不经过 jsonschema 的关键字分派和错误对象构造。
+
+只支持激活请求 schema 用到的关键字（见 SUPPORTED_KEYWORDS），
+遇到其他关键字时 compile_schema 抛出 UnsupportedSchema，由调用方退回 Draft7Validator。
+错误信息的路径和措辞与 Draft7Validator 保持一致
+"""
+import re
+
+# 支持的关键字（"$schema" / "title" 等注解关键字不参与校验）
+SUPPORTED_KEYWORDS = frozenset({
+    'type', 'enum', 'const', 'minLength', 'maxLength', 'pattern',
+    'required', 'properties', 'additionalProperties', 'allOf', 'if', 'then'
+})
+ANNOTATION_KEYWORDS = frozenset({'$schema', '$id', 'title', 'description', '$comment'})
+
+# JSON Schema 类型 -> Python 类型
+_TYPES = {
+    'string': str,
+    'object': dict
+}
+
+
+class UnsupportedSchema(ValueError):
+    """schema 使用了快速校验不支持的关键字"""
+    pass
+
+
+def compile_schema(schema: dict):
+    """
+    编译 schema
+
+    Args:
+        schema: JSON Schema（draft-07）
+
+    Returns:
+        callable: validate(instance) -> list，返回错误列表 [{"path", "message"}]，校验通过时为空列表
+
+    Raises:
+        UnsupportedSchema: schema 使用了不支持的关键字或类型
+    """
+    check = _compile(schema, 'root')
+
+    def validate(instance) -> list:
+        errors = []
+        check(instance, (), errors)
+        errors.sort(key=lambda error: error[0])
+        return [{"path": ".".join(path) if path else "root", "message": message}
+                for path, message in errors]
+
+    return validate
+
+
+def _compile(schema: dict, where: str):
+    """编译一个 schema 节点，返回 check(instance, path, errors)"""
+    unknown = set(schema) - SUPPORTED_KEYWORDS - ANNOTATION_KEYWORDS
+    if unknown:
+        raise UnsupportedSchema(f"{where}: 不支持的关键字 {', '.join(sorted(unknown))}")
+    if 'then' in schema and 'if' not in schema:
+        raise UnsupportedSchema(f"{where}: then 缺少 if")
+
+    checks = []
+
+    type_name = schema.get('type')
+    expected_type = None
+    if type_name is not None:
+        if type_name not in _TYPES:
+            raise UnsupportedSchema(f"{where}: 不支持的类型 {type_name!r}")
+        expected_type = _TYPES[type_name]
+
+    if 'enum' in schema:
+        options = schema['enum']
+        allowed = frozenset(options)
+        if not all(isinstance(option, str) for option in options):
+            raise UnsupportedSchema(f"{where}: enum 只支持字符串")
+
+        def check_enum(value, path, errors):
+            if value.__class__ is not str or value not in allowed:
+                errors.append((path, f"{value!r} is not one of {options!r}"))
+        checks.append(check_enum)
+
+    if 'const' in schema:
+        const = schema['const']
+        if not isinstance(const, str):
+            raise UnsupportedSchema(f"{where}: const 只支持字符串")
+
+        def check_const(value, path, errors):
+            if value.__class__ is not str or value != const:
+                errors.append((path, f"{const!r} was expected"))
+        checks.append(check_const)
+
+    string_checks = _compile_string(schema)
+    object_checks = _compile_object(schema, where)
+
+    def check_typed(value, path, errors):
+        if isinstance(value, str):
+            for check_one in string_checks:
+                check_one(value, path, errors)
+        elif isinstance(value, dict):
+            for check_one in object_checks:
+                check_one(value, path, errors)
+
+    if string_checks or object_checks:
+        checks.append(check_typed)
+
+    for index, sub_schema in enumerate(schema.get('allOf', ())):
+        checks.append(_compile(sub_schema, f"{where}.allOf[{index}]"))
+
+    if 'if' in schema:
+        check_if = _compile(schema['if'], f"{where}.if")
+        check_then = _compile(schema['then'], f"{where}.then") if 'then' in schema else None
+
+        def check_condition(value, path, errors):
+            scratch = []
+            check_if(value, path, scratch)
+            if not scratch and check_then is not None:
+                check_then(value, path, errors)
+        checks.append(check_condition)
+
+    def check(value, path, errors):
+        # 类型不符时 Draft7Validator 仍会报告其他关键字的错误，但这些关键字对非本类型的值不生效
+        if expected_type is not None and not isinstance(value, expected_type):
+            errors.append((path, f"{value!r} is not of type {type_name!r}"))
+        for check_one in checks:
+            check_one(value, path, errors)
+
+    return check
+
+
+def _compile_string(schema: dict) -> list:
+    """字符串关键字（minLength / maxLength / pattern）"""
+    checks = []
+    min_length = schema.get('minLength')
+    max_length = schema.get('maxLength')
+    if min_length is not None:
+        def check_min(value, path, errors):
+            if len(value) < min_length:
+                message = "should be non-empty" if min_length == 1 else "is too short"
+                errors.append((path, f"{value!r} {message}"))
+        checks.append(check_min)
+    if max_length is not None:
+        def check_max(value, path, errors):
+            if len(value) > max_length:
+                message = "is expected to be empty" if max_length == 0 else "is too long"
+                errors.append((path, f"{value!r} {message}"))
+        checks.append(check_max)
+    if 'pattern' in schema:
+        pattern = schema['pattern']
+        search = re.compile(pattern).search
+
+        def check_pattern(value, path, errors):
+            if search(value) is None:
+                errors.append((path, f"{value!r} does not match {pattern!r}"))
+        checks.append(check_pattern)
+    return checks
+
+
+def _compile_object(schema: dict, where: str) -> list:
+    """对象关键字（required / properties / additionalProperties）"""
+    checks = []
+    required = tuple(schema.get('required', ()))
+    if required:
+        def check_required(value, path, errors):
+            for name in required:
+                if name not in value:
+                    errors.append((path, f"{name!r} is a required property"))
+        checks.append(check_required)
+
+    properties = {
+        name: _compile(sub_schema, f"{where}.{name}")
+        for name, sub_schema in schema.get('properties', {}).items()
+    }
+    additional = schema.get('additionalProperties', True)
+    if additional not in (True, False):
+        raise UnsupportedSchema(f"{where}: additionalProperties 只支持 true / false")
+
+    if additional is False:
+        def check_additional(value, path, errors):
+            extras = [name for name in value if name not in properties]
+            if extras:
+                extras.sort()
+                listed = ", ".join(repr(name) for name in extras)
+                verb = "was" if len(extras) == 1 else "were"
+                errors.append((path, f"Additional properties are not allowed ({listed} {verb} unexpected)"))
+        checks.append(check_additional)
+
+    if properties:
+        def check_properties(value, path, errors):
+            for name, item in value.items():
+                check_item = properties.get(name)
+                if check_item is not None:
+                    check_item(item, path + (name,), errors)
+        checks.append(check_properties)
+    return checks